@@ -1,23 +1,44 @@
+import csv
+import io
+import json
+import math
+import os
+
 from dotenv import load_dotenv
 from flask import Flask, jsonify, make_response, Response, request
 # from flask_cors import CORS
 
-from meal_max.models import kitchen_model
-from meal_max.models.battle_model import BattleModel
-from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+from meal_max.models import kitchen_model, simulation_model
+from meal_max.models.arena_model import ArenaConflictError, create_arena_store
+from meal_max.models.battle_model import TOURNAMENT_MAX_MEALS, BattleModel
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import instrument_app, metrics_response
+from meal_max.utils.migrations import migrate
+from meal_max.utils.random_utils import get_random_pool
+from meal_max.utils.response_cache import cached_json_response, response_cache
+from meal_max.utils.sql_utils import check_database_connection, check_table_exists, get_pool_stats
 
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Bring the schema up to date before serving. Workers starting together take turns, and once
+# the database is current this only reads its schema version.
+if os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true":
+    migrate()
+
 app = Flask(__name__)
+configure_logger(app.logger)
+instrument_app(app)
 # This bypasses standard security stuff we'll talk about later
 # If you get errors that use words like cross origin or flight,
 # uncomment this
 # CORS(app)
 
-# Initialize the BattleModel
-battle_model = BattleModel()
+# Each client battles in its own arena; the routes without an arena ID share the default one.
+# Set ARENA_BACKEND=sqlite when running more than one worker process.
+arena_store = create_arena_store()
+DEFAULT_ARENA = 'default'
 
 ####################################################
 #
@@ -58,6 +79,85 @@ def db_check() -> Response:
     except Exception as e:
         return make_response(jsonify({'error': str(e)}), 404)
 
+@app.route('/api/db-pool-stats', methods=['GET'])
+def db_pool_stats() -> Response:
+    """
+    Route to report the size and wait metrics of the database connection pool.
+
+    Returns:
+        JSON response with the connection pool counters.
+    """
+    app.logger.info('Retrieving connection pool stats')
+    return make_response(jsonify({'status': 'success', 'pool': get_pool_stats()}), 200)
+
+@app.route('/api/random-pool-stats', methods=['GET'])
+def random_pool_stats() -> Response:
+    """
+    Route to report the hit, miss and refill metrics of the random number pool.
+
+    Returns:
+        JSON response with the random number pool counters.
+    """
+    app.logger.info('Retrieving random pool stats')
+    return make_response(jsonify({'status': 'success', 'pool': get_random_pool().stats()}), 200)
+
+@app.route('/api/meal-cache-stats', methods=['GET'])
+def meal_cache_stats() -> Response:
+    """
+    Route to report the size and hit/miss counters of the meal cache.
+
+    Returns:
+        JSON response with the meal cache counters.
+    """
+    app.logger.info('Retrieving meal cache stats')
+    return make_response(jsonify({'status': 'success', 'cache': kitchen_model.meal_cache.stats()}), 200)
+
+@app.route('/api/response-cache-stats', methods=['GET'])
+def response_cache_stats() -> Response:
+    """
+    Route to report the size and hit/miss counters of the cache of serialized leaderboard and meal responses.
+
+    Returns:
+        JSON response with the response cache counters.
+    """
+    app.logger.info('Retrieving response cache stats')
+    return make_response(jsonify({'status': 'success', 'cache': response_cache.stats()}), 200)
+
+@app.route('/api/battle-stats-buffer-stats', methods=['GET'])
+def battle_stats_buffer_stats() -> Response:
+    """
+    Route to report the pending results and flush counters of the write-behind battle stats buffer.
+
+    Returns:
+        JSON response with the buffer counters, or null when write-behind mode is off.
+    """
+    app.logger.info('Retrieving battle stats buffer stats')
+    stats_buffer = kitchen_model.stats_buffer
+    return make_response(jsonify({'status': 'success', 'buffer': stats_buffer.stats() if stats_buffer else None}), 200)
+
+@app.route('/api/arena-stats', methods=['GET'])
+def arena_stats() -> Response:
+    """
+    Route to report the number of live arenas and the arena store eviction counters.
+
+    Returns:
+        JSON response with the arena store counters.
+    """
+    app.logger.info('Retrieving arena stats')
+    return make_response(jsonify({'status': 'success', 'arenas': arena_store.stats()}), 200)
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose request latencies, database and random provider timings to Prometheus.
+
+    Each worker process reports its own series.
+
+    Returns:
+        Plain text response in the Prometheus exposition format.
+    """
+    return metrics_response()
+
 
 ##########################################################
 #
@@ -115,6 +215,67 @@ def add_meal() -> Response:
         app.logger.error("Failed to add combatant: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+def read_bulk_rows(stream, content_type: str):
+    """
+    Lazily parses the body of a bulk meal load.
+
+    Args:
+        stream: The raw request body stream.
+        content_type (str): 'text/csv' for CSV with a header row, anything else is read as NDJSON.
+
+    Yields:
+        The parsed rows. NDJSON lines that are not valid JSON are yielded as the raw string
+        so they are reported as invalid rows.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8')
+    if content_type == 'text/csv':
+        yield from csv.DictReader(text)
+        return
+
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield line
+
+@app.route('/api/create-meals/bulk', methods=['POST'])
+def add_meals_bulk() -> Response:
+    """
+    Route to add many meals to the database in one request.
+
+    The body is read incrementally, either as NDJSON (one meal object per line) or, with a
+    Content-Type of text/csv, as CSV with a meal,cuisine,price,difficulty header.
+
+    Query Parameters:
+        - batch_size (int, optional): The number of meals inserted per transaction. Default is 500.
+
+    Returns:
+        JSON response with the number of meals inserted and the per-row errors.
+    Raises:
+        400 error if the batch size is invalid.
+        500 error if there is an issue adding the meals to the database.
+    """
+    app.logger.info('Bulk loading meals')
+    try:
+        try:
+            batch_size = int(request.args.get('batch_size', 500))
+            if batch_size < 1:
+                raise ValueError
+        except ValueError:
+            return make_response(jsonify({'error': 'batch_size must be a positive integer'}), 400)
+
+        rows = read_bulk_rows(request.stream, request.mimetype)
+        result = kitchen_model.create_meals_bulk(rows, batch_size=batch_size)
+
+        app.logger.info("Bulk load complete: %d inserted, %d failed", result['inserted'], result['failed'])
+        return make_response(jsonify({'status': 'bulk load complete', **result}), 201)
+    except Exception as e:
+        app.logger.error("Failed to bulk load meals: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
 def delete_meal(meal_id: int) -> Response:
     """
@@ -144,13 +305,16 @@ def get_meal_by_id(meal_id: int) -> Response:
         - meal_id (int): The ID of the meal.
 
     Returns:
-        JSON response with the meal details or error message.
+        JSON response with the meal details or error message, or 304 if the client's
+        If-None-Match still matches the current ETag.
     """
     try:
         app.logger.info(f"Retrieving meal by ID: {meal_id}")
 
-        meal = kitchen_model.get_meal_by_id(meal_id)
-        return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+        # A rebuild follows a new data version, which may come from another worker's write that
+        # this process's meal cache has not seen, so it reads the meal from the database
+        return cached_json_response('/api/get-meal-by-id', meal_id, kitchen_model.get_data_version(),
+                                    lambda: {'status': 'success', 'meal': kitchen_model.get_meal_by_id(meal_id, fresh=True)})
     except Exception as e:
         app.logger.error(f"Error retrieving meal by ID: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -164,7 +328,8 @@ def get_meal_by_name(meal_name: str) -> Response:
         - meal_name (str): The name of the meal.
 
     Returns:
-        JSON response with the meal details or error message.
+        JSON response with the meal details or error message, or 304 if the client's
+        If-None-Match still matches the current ETag.
     """
     try:
         app.logger.info(f"Retrieving meal by name: {meal_name}")
@@ -172,12 +337,52 @@ def get_meal_by_name(meal_name: str) -> Response:
         if not meal_name:
             return make_response(jsonify({'error': 'Meal name is required'}), 400)
 
-        meal = kitchen_model.get_meal_by_name(meal_name)
-        return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+        # Read from the database on a rebuild, as in get_meal_by_id
+        return cached_json_response('/api/get-meal-by-name', meal_name, kitchen_model.get_data_version(),
+                                    lambda: {'status': 'success', 'meal': kitchen_model.get_meal_by_name(meal_name, fresh=True)})
     except Exception as e:
         app.logger.error(f"Error retrieving meal by name: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/search-meals', methods=['GET'])
+def search_meals() -> Response:
+    """
+    Route to search meals by name and cuisine, best matches first.
+
+    Query Parameters:
+        - q (str): The search text. The last word also matches the start of a word.
+        - limit (int): The maximum number of meals to return, at most 100. Default is 20.
+        - offset (int): The number of matches to skip. Default is 0.
+
+    Returns:
+        JSON response with the matching meals and the offset of the next page.
+    Raises:
+        400 error if the query or the pagination parameters are invalid.
+        500 error if there is an issue searching the meals.
+    """
+    try:
+        query = request.args.get('q', '')
+        try:
+            limit = int(request.args.get('limit', 20))
+            offset = int(request.args.get('offset', 0))
+            if not 0 < limit <= 100 or offset < 0:
+                raise ValueError
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be between 1 and 100, offset must be a non-negative integer'}), 400)
+
+        app.logger.info("Searching meals for %r", query)
+
+        try:
+            meals = kitchen_model.search_meals(query, limit=limit, offset=offset)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        next_offset = offset + limit if len(meals) == limit else None
+
+        return make_response(jsonify({'status': 'success', 'meals': meals, 'next_offset': next_offset}), 200)
+    except Exception as e:
+        app.logger.error(f"Error searching meals: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 ############################################################
 #
@@ -189,19 +394,33 @@ def get_meal_by_name(meal_name: str) -> Response:
 @app.route('/api/battle', methods=['GET'])
 def battle() -> Response:
     """
-    Route to initiate a battle between the two currently prepared meals.
+    Route to initiate a battle between the two meals prepared in the default arena.
+    """
+    return arena_battle(DEFAULT_ARENA)
+
+@app.route('/api/arenas/<string:arena_id>/battle', methods=['GET'])
+def arena_battle(arena_id: str) -> Response:
+    """
+    Route to initiate a battle between the two currently prepared meals of an arena.
+
+    Path Parameter:
+        - arena_id (str): The ID of the arena.
 
     Returns:
         JSON response indicating the result of the battle and the winner.
     Raises:
+        409 error if other requests kept changing the arena until the retries ran out.
         500 error if there is an issue during the battle.
     """
     try:
         app.logger.info('Two meals enter, one meal leaves!')
 
-        winner = battle_model.battle()
+        winner = arena_store.run(arena_id, lambda battle_model: battle_model.battle())
 
         return make_response(jsonify({'status': 'battle complete', 'winner': winner}), 200)
+    except ArenaConflictError as e:
+        app.logger.error(f"Battle error: {e}")
+        return make_response(jsonify({'error': str(e)}), 409)
     except Exception as e:
         app.logger.error(f"Battle error: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -209,7 +428,17 @@ def battle() -> Response:
 @app.route('/api/clear-combatants', methods=['POST'])
 def clear_combatants() -> Response:
     """
-    Route to clear the list of combatants for the battle.
+    Route to clear the list of combatants of the default arena.
+    """
+    return arena_clear_combatants(DEFAULT_ARENA)
+
+@app.route('/api/arenas/<string:arena_id>/clear-combatants', methods=['POST'])
+def arena_clear_combatants(arena_id: str) -> Response:
+    """
+    Route to clear the list of combatants for the battle in an arena.
+
+    Path Parameter:
+        - arena_id (str): The ID of the arena.
 
     Returns:
         JSON response indicating success of the operation.
@@ -218,7 +447,7 @@ def clear_combatants() -> Response:
     """
     try:
         app.logger.info('Clearing all combatants...')
-        battle_model.clear_combatants()
+        arena_store.run(arena_id, lambda battle_model: battle_model.clear_combatants())
         app.logger.info('Combatants cleared.')
         return make_response(jsonify({'status': 'combatants cleared'}), 200)
     except Exception as e:
@@ -228,14 +457,24 @@ def clear_combatants() -> Response:
 @app.route('/api/get-combatants', methods=['GET'])
 def get_combatants() -> Response:
     """
-    Route to get the list of combatants for the battle.
+    Route to get the list of combatants of the default arena.
+    """
+    return arena_get_combatants(DEFAULT_ARENA)
+
+@app.route('/api/arenas/<string:arena_id>/get-combatants', methods=['GET'])
+def arena_get_combatants(arena_id: str) -> Response:
+    """
+    Route to get the list of combatants for the battle in an arena.
+
+    Path Parameter:
+        - arena_id (str): The ID of the arena.
 
     Returns:
         JSON response with the list of combatants.
     """
     try:
         app.logger.info('Getting combatants...')
-        combatants = battle_model.get_combatants()
+        combatants = arena_store.run(arena_id, lambda battle_model: list(battle_model.get_combatants()))
         return make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
     except Exception as e:
         app.logger.error("Failed to get combatants: %s", str(e))
@@ -244,7 +483,17 @@ def get_combatants() -> Response:
 @app.route('/api/prep-combatant', methods=['POST'])
 def prep_combatant() -> Response:
     """
-    Route to prepare a prep a meal making it a combatant for a battle.
+    Route to prepare a meal as a combatant in the default arena.
+    """
+    return arena_prep_combatant(DEFAULT_ARENA)
+
+@app.route('/api/arenas/<string:arena_id>/prep-combatant', methods=['POST'])
+def arena_prep_combatant(arena_id: str) -> Response:
+    """
+    Route to prepare a prep a meal making it a combatant for a battle in an arena.
+
+    Path Parameter:
+        - arena_id (str): The ID of the arena.
 
     Parameters:
         - meal (str): The name of the meal
@@ -252,6 +501,7 @@ def prep_combatant() -> Response:
     Returns:
         JSON response indicating the success of combatant preparation.
     Raises:
+        409 error if other requests kept changing the arena until the retries ran out.
         500 error if there is an issue preparing combatants.
     """
     try:
@@ -264,8 +514,15 @@ def prep_combatant() -> Response:
 
         try:
             meal = kitchen_model.get_meal_by_name(meal)
-            battle_model.prep_combatant(meal)
-            combatants = battle_model.get_combatants()
+
+            def prep(battle_model: BattleModel) -> list:
+                battle_model.prep_combatant(meal)
+                return list(battle_model.get_combatants())
+
+            combatants = arena_store.run(arena_id, prep)
+        except ArenaConflictError as e:
+            app.logger.error("Failed to prepare combatant: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 409)
         except Exception as e:
             app.logger.error("Failed to prepare combatant: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
@@ -275,6 +532,61 @@ def prep_combatant() -> Response:
         app.logger.error("Failed to prepare combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/arenas/<string:arena_id>', methods=['DELETE'])
+def delete_arena(arena_id: str) -> Response:
+    """
+    Route to drop an arena and its combatants before it would expire on its own.
+
+    Path Parameter:
+        - arena_id (str): The ID of the arena.
+
+    Returns:
+        JSON response indicating success of the operation.
+    """
+    try:
+        arena_store.delete(arena_id)
+        return make_response(jsonify({'status': 'arena deleted'}), 200)
+    except Exception as e:
+        app.logger.error("Failed to delete arena: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/tournament', methods=['POST'])
+def run_tournament() -> Response:
+    """
+    Route to run a whole tournament between many meals in one request.
+
+    Expected JSON Input:
+        - meal_ids (list[int]): The IDs of the meals entering the tournament, in seeding order,
+          at most TOURNAMENT_MAX_MEALS of them.
+        - mode (str, optional): 'single_elimination' (default) or 'round_robin'.
+
+    Returns:
+        JSON response with the full bracket, per-match scores and deltas, and the result.
+        Round-robin ties are broken head-to-head, then by seed.
+    Raises:
+        400 error if input validation fails or too many meals are entered.
+        500 error if there is an issue running the tournament.
+    """
+    try:
+        data = request.get_json()
+        meal_ids = data.get('meal_ids')
+        mode = data.get('mode', 'single_elimination')
+
+        if not isinstance(meal_ids, list) or not all(isinstance(meal_id, int) for meal_id in meal_ids):
+            return make_response(jsonify({'error': 'meal_ids must be a list of meal IDs'}), 400)
+        if len(meal_ids) > TOURNAMENT_MAX_MEALS:
+            return make_response(jsonify({'error': f'At most {TOURNAMENT_MAX_MEALS} meals can enter a tournament'}), 400)
+
+        app.logger.info("Running %s tournament with %d meals", mode, len(meal_ids))
+        # Tournaments never touch the combatants list, so they need no arena
+        tournament = BattleModel().run_tournament(meal_ids, mode)
+
+        return make_response(jsonify({'status': 'tournament complete', 'tournament': tournament}), 200)
+    except Exception as e:
+        app.logger.error("Tournament error: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 ############################################################
 #
@@ -283,31 +595,217 @@ def prep_combatant() -> Response:
 ############################################################
 
 
+def read_leaderboard_cursor(cursor):
+    """
+    Parses a leaderboard keyset cursor, the "<sort value>:<meal ID>" of the last meal on a page.
+
+    Args:
+        cursor (str): The cursor sent back by the client, or None for the first page.
+
+    Returns:
+        tuple: The (sort value, meal ID) pair, or None for the first page.
+
+    Raises:
+        ValueError: If the cursor is malformed or its sort value is not a finite number.
+    """
+    if cursor is None:
+        return None
+    sort_value, _, meal_id = cursor.rpartition(':')
+    sort_value = float(sort_value)
+    # float() accepts "nan" and "inf", which no meal is ranked at
+    if not math.isfinite(sort_value):
+        raise ValueError(f"Invalid cursor sort value: {sort_value}")
+    return sort_value, int(meal_id)
+
 @app.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard() -> Response:
     """
-    Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
+    Route to get the leaderboard of meals sorted by wins, battles, win percentage or Elo rating.
 
     Query Parameters:
-        - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - sort (str): The field to sort by ('wins', 'battles', 'win_pct' or 'rating'). Default is 'wins'.
+        - limit (int): The maximum number of meals to return, at most 1000. Default is 100.
+        - offset (int): The number of meals to skip. Default is 0.
+        - cursor (str): Keyset pagination cursor, the next_cursor of the previous page.
 
     Returns:
-        JSON response with a sorted leaderboard of meals.
+        JSON response with a sorted leaderboard of meals and the cursor for the next page, or
+        304 if the client's If-None-Match still matches the current ETag.
     Raises:
+        400 error if the sort field or the pagination parameters are invalid.
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
+        if sort_by not in kitchen_model.LEADERBOARD_SORT_COLUMNS:
+            return make_response(jsonify({'error': f"sort must be one of {', '.join(kitchen_model.LEADERBOARD_SORT_COLUMNS)}"}), 400)
+        try:
+            limit = int(request.args.get('limit', 100))
+            offset = int(request.args.get('offset', 0))
+            after = read_leaderboard_cursor(request.args.get('cursor'))
+            if not 0 < limit <= 1000 or offset < 0:
+                raise ValueError
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be between 1 and 1000, offset must be a non-negative integer and cursor a next_cursor'}), 400)
+
         app.logger.info("Generating leaderboard sorted by %s", sort_by)
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+        def build() -> dict:
+            leaderboard_data, next_after = kitchen_model.get_leaderboard_page(sort_by, limit=limit, offset=offset, after=after)
+            # repr keeps every digit of a float sort value, so the cursor round-trips exactly
+            next_cursor = f"{next_after[0]!r}:{next_after[1]}" if next_after else None
+            return {'status': 'success', 'leaderboard': leaderboard_data, 'next_cursor': next_cursor}
 
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        return cached_json_response('/api/leaderboard', (sort_by, limit, offset, after),
+                                    kitchen_model.get_data_version(), build)
     except Exception as e:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+############################################################
+#
+# Battle History
+#
+############################################################
+
+
+def read_history_page():
+    """
+    Reads the limit and before_id pagination parameters shared by the battle history routes.
+
+    Returns:
+        tuple: The limit and the before_id cursor (None for the first page).
+
+    Raises:
+        ValueError: If limit is not between 1 and 1000 or before_id is not an integer.
+    """
+    limit = int(request.args.get('limit', 100))
+    before_id = request.args.get('before_id')
+    before_id = int(before_id) if before_id is not None else None
+    if not 0 < limit <= 1000:
+        raise ValueError
+    return limit, before_id
+
+@app.route('/api/battles', methods=['GET'])
+def get_battles() -> Response:
+    """
+    Route to get the battles a meal fought, newest first.
+
+    Query Parameters:
+        - meal_id (int): The ID of the meal.
+        - limit (int): The maximum number of battles to return, at most 1000. Default is 100.
+        - before_id (int): Keyset pagination cursor, the next_cursor of the previous page.
+
+    Returns:
+        JSON response with the battles and the cursor for the next page.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue retrieving the battles.
+    """
+    try:
+        try:
+            meal_id = int(request.args['meal_id'])
+            limit, before_id = read_history_page()
+        except (KeyError, ValueError):
+            return make_response(jsonify({'error': 'meal_id is required, limit must be between 1 and 1000 and before_id must be an integer'}), 400)
+
+        app.logger.info("Retrieving battles for meal %d", meal_id)
+        battles = kitchen_model.get_battle_history(meal_id, limit=limit, before_id=before_id)
+        next_cursor = battles[-1]['id'] if len(battles) == limit else None
+
+        return make_response(jsonify({'status': 'success', 'battles': battles, 'next_cursor': next_cursor}), 200)
+    except Exception as e:
+        app.logger.error("Error retrieving battles: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/head-to-head', methods=['GET'])
+def get_head_to_head() -> Response:
+    """
+    Route to get the battles between two meals, newest first.
+
+    Query Parameters:
+        - a (int): The ID of one meal.
+        - b (int): The ID of the other meal.
+        - limit (int): The maximum number of battles to return, at most 1000. Default is 100.
+        - before_id (int): Keyset pagination cursor, the next_cursor of the previous page.
+
+    Returns:
+        JSON response with the battles, the cursor for the next page and, on the first page,
+        the win counts of both meals.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue retrieving the battles.
+    """
+    try:
+        try:
+            meal_a = int(request.args['a'])
+            meal_b = int(request.args['b'])
+            limit, before_id = read_history_page()
+        except (KeyError, ValueError):
+            return make_response(jsonify({'error': 'a and b are required, limit must be between 1 and 1000 and before_id must be an integer'}), 400)
+
+        app.logger.info("Retrieving head-to-head for meals %d and %d", meal_a, meal_b)
+        battles = kitchen_model.get_head_to_head(meal_a, meal_b, limit=limit, before_id=before_id)
+        next_cursor = battles[-1]['id'] if len(battles) == limit else None
+
+        response = {'status': 'success', 'battles': battles, 'next_cursor': next_cursor}
+        if before_id is None:
+            response['summary'] = kitchen_model.get_head_to_head_summary(meal_a, meal_b)
+        return make_response(jsonify(response), 200)
+    except Exception as e:
+        app.logger.error("Error retrieving head-to-head: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Analytics
+#
+############################################################
+
+
+@app.route('/api/win-probabilities', methods=['GET'])
+def get_win_probabilities() -> Response:
+    """
+    Route to estimate the chance of meals beating each other by simulation, without running real battles.
+
+    Query Parameters:
+        - meal_ids (str, optional): Comma-separated meal IDs to build the full matrix for.
+          Without it the whole catalog is summarized per meal, if it has at most
+          SIMULATION_MAX_CATALOG_MEALS meals.
+        - draws (int, optional): The number of simulated battles per pair, at most
+          SIMULATION_MAX_DRAWS. Default is 1000.
+        - seed (int, optional): The seed for reproducible results.
+
+    Returns:
+        JSON response with the win probability matrix or per-meal summary.
+    Raises:
+        400 error if input validation fails, or the simulation would be too large.
+        500 error if there is an issue running the simulation.
+    """
+    try:
+        try:
+            meal_ids = request.args.get('meal_ids')
+            if meal_ids is not None:
+                meal_ids = [int(meal_id) for meal_id in meal_ids.split(',')]
+            draws = int(request.args.get('draws', 1000))
+            seed = request.args.get('seed')
+            seed = int(seed) if seed is not None else None
+        except ValueError:
+            return make_response(jsonify({'error': 'meal_ids, draws and seed must be integers'}), 400)
+
+        app.logger.info("Simulating win probabilities with %d draws", draws)
+        try:
+            result = simulation_model.simulate_win_probabilities(meal_ids, draws=draws, seed=seed)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error("Error simulating win probabilities: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Benchmarks for kitchen_model and BattleModel against real SQLite databases.
+
+Each catalog size gets a fresh temporary database built by the schema migrations and
+filled with that many meals, so the timings include real query and index costs. Random
+numbers come from a seeded in-process provider, never from random.org.
+
+Run from the meal_max directory:
+
+    python -m benchmarks.bench_kitchen_model --output results.json
+    python -m benchmarks.bench_kitchen_model --sizes 1000 100000 --baseline results.json
+
+With --baseline, any operation whose median got slower than the threshold allows is
+reported as a regression and the exit status is 1.
+"""
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Optional
+
+from meal_max.models import kitchen_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.utils import sql_utils
+from meal_max.utils.migrations import migrate
+from meal_max.utils.random_utils import RandomPool, set_random_pool
+
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+DEFAULT_ITERATIONS = 1000
+DEFAULT_THRESHOLD = 0.25
+
+CUISINES = ("Italian", "Thai", "Mexican", "Indian", "French", "Japanese", "Greek", "Korean")
+DIFFICULTIES = ("LOW", "MED", "HIGH")
+
+
+def populate(db_path: str, size: int, rng: random.Random, batch_size: int = 10000) -> None:
+    """
+    Creates the schema and fills the meals table with size meals with varied stats.
+
+    Args:
+        db_path (str): The database file to create.
+        size (int): How many meals to insert. They get the IDs 1 to size.
+        rng (random.Random): The source of the meal attributes.
+        batch_size (int): Rows inserted per executemany call.
+    """
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        for start in range(0, size, batch_size):
+            rows = []
+            for i in range(start, min(start + batch_size, size)):
+                battles = rng.randrange(200)
+                rows.append((
+                    f"Meal {i + 1}", CUISINES[i % len(CUISINES)], round(rng.uniform(5, 50), 2),
+                    rng.choice(DIFFICULTIES), battles, rng.randint(0, battles), round(rng.gauss(1500, 150), 1),
+                ))
+            conn.executemany(
+                "INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins, rating) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of sorted samples.
+
+    Args:
+        samples (list[float]): The samples, sorted ascending.
+        fraction (float): The percentile as a fraction, for example 0.95.
+
+    Returns:
+        float: The sample at that rank.
+    """
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def time_operation(operation: Callable[[int], Any], iterations: int,
+                   setup: Optional[Callable[[int], Any]] = None, warmup: int = 0) -> dict[str, float]:
+    """
+    Calls an operation repeatedly and summarizes how long each call took.
+
+    Args:
+        operation (Callable[[int], Any]): Called with the iteration number.
+        iterations (int): How many timed calls to make.
+        setup (Optional[Callable[[int], Any]]): Called untimed before each call, for example to clear a cache.
+        warmup (int): How many untimed calls to make first.
+
+    Returns:
+        dict[str, float]: The iteration count, mean, percentiles and extremes in microseconds, and throughput.
+    """
+    for i in range(warmup):
+        if setup:
+            setup(-i - 1)
+        operation(-i - 1)
+
+    samples = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        'iterations': iterations,
+        'mean_us': round(total / iterations * 1e6, 2),
+        'p50_us': round(percentile(samples, 0.50) * 1e6, 2),
+        'p95_us': round(percentile(samples, 0.95) * 1e6, 2),
+        'p99_us': round(percentile(samples, 0.99) * 1e6, 2),
+        'min_us': round(samples[0] * 1e6, 2),
+        'max_us': round(samples[-1] * 1e6, 2),
+        'ops_per_sec': round(iterations / total, 1) if total else 0.0,
+    }
+
+
+def benchmark_size(size: int, iterations: int, seed: int, workdir: str) -> dict[str, dict[str, float]]:
+    """
+    Builds a database of size meals and times every benchmarked operation against it.
+
+    Reads run before writes, so they all see the freshly generated catalog.
+
+    Args:
+        size (int): The number of meals in the catalog.
+        iterations (int): Timed calls per operation.
+        seed (int): Seeds the generated data, the meal picks and the random provider.
+        workdir (str): The directory to create the database in.
+
+    Returns:
+        dict[str, dict[str, float]]: The timings of each operation.
+    """
+    rng = random.Random(seed)
+    db_path = os.path.join(workdir, f"meal_max_{size}.db")
+    populate(db_path, size, rng)
+
+    provider_rng = random.Random(seed)
+    set_random_pool(RandomPool(lambda num: [provider_rng.randrange(100) / 100 for _ in range(num)], background=False))
+    previous_db_path = sql_utils.DB_PATH
+    sql_utils.DB_PATH = db_path
+    kitchen_model.meal_cache.clear()
+
+    meal_ids = [rng.randint(1, size) for _ in range(iterations)]
+    warmup = min(50, iterations)
+    results = {}
+
+    def clear_cache(i: int) -> None:
+        kitchen_model.meal_cache.clear()
+
+    try:
+        results['get_meal_by_id'] = time_operation(
+            lambda i: kitchen_model.get_meal_by_id(meal_ids[i]), iterations, setup=clear_cache, warmup=warmup)
+        results['get_meal_by_id_cached'] = time_operation(
+            lambda i: kitchen_model.get_meal_by_id(meal_ids[0]), iterations, warmup=warmup)
+        results['get_meal_by_name'] = time_operation(
+            lambda i: kitchen_model.get_meal_by_name(f"Meal {meal_ids[i]}"), iterations, setup=clear_cache, warmup=warmup)
+        for sort_by in kitchen_model.LEADERBOARD_SORT_COLUMNS:
+            results[f'get_leaderboard_{sort_by}'] = time_operation(
+                lambda i: kitchen_model.get_leaderboard(sort_by=sort_by, limit=10), iterations, warmup=warmup)
+
+        results['update_meal_stats'] = time_operation(
+            lambda i: kitchen_model.update_meal_stats(meal_ids[i], 'win' if i % 2 else 'loss'), iterations, warmup=warmup)
+
+        battle_model = BattleModel()
+
+        def battle_cycle(i: int) -> None:
+            battle_model.clear_combatants()
+            meal_1 = meal_ids[i]
+            meal_2 = meal_1 % size + 1
+            battle_model.prep_combatant(kitchen_model.get_meal_by_id(meal_1))
+            battle_model.prep_combatant(kitchen_model.get_meal_by_id(meal_2))
+            battle_model.battle()
+
+        results['battle'] = time_operation(battle_cycle, iterations, setup=clear_cache, warmup=warmup)
+
+        results['create_meal'] = time_operation(
+            lambda i: kitchen_model.create_meal(f"Benchmark meal {i}", "Fusion", 10.0, "MED"), iterations, warmup=warmup)
+
+    finally:
+        sql_utils.close_pool()
+        sql_utils.DB_PATH = previous_db_path
+        kitchen_model.meal_cache.clear()
+        set_random_pool(None)
+
+    return results
+
+
+def run_benchmarks(sizes: list[int], iterations: int = DEFAULT_ITERATIONS, seed: int = 0) -> dict[str, Any]:
+    """
+    Runs the benchmarks at every catalog size, each against its own temporary database.
+
+    Args:
+        sizes (list[int]): The catalog sizes to benchmark.
+        iterations (int): Timed calls per operation.
+        seed (int): Seeds the generated data and the random provider.
+
+    Returns:
+        dict[str, Any]: The environment, settings and per-size timings, ready to dump as JSON.
+    """
+    if iterations < 1:
+        raise ValueError(f"Invalid number of iterations: {iterations}. Must be at least 1.")
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'iterations': iterations,
+        'seed': seed,
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            if size < 2:
+                raise ValueError(f"Invalid catalog size: {size}. Must be at least 2.")
+            print(f"Benchmarking {size} meals...", file=sys.stderr)
+            report['results'][str(size)] = benchmark_size(size, iterations, seed, workdir)
+    return report
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            metric: str = 'p50_us') -> list[dict[str, Any]]:
+    """
+    Compares a report with a baseline, operation by operation, at the sizes both cover.
+
+    Args:
+        report (dict[str, Any]): The report of the current run.
+        baseline (dict[str, Any]): A report from an earlier run.
+        threshold (float): How much slower than the baseline an operation may get, as a fraction.
+        metric (str): The timing to compare.
+
+    Returns:
+        list[dict[str, Any]]: One entry per operation, with the ratio and whether it regressed.
+    """
+    comparison = []
+    for size, operations in report['results'].items():
+        for name, timings in operations.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base or not base.get(metric):
+                continue
+            ratio = timings[metric] / base[metric]
+            comparison.append({
+                'size': int(size),
+                'operation': name,
+                'baseline': base[metric],
+                'current': timings[metric],
+                'ratio': round(ratio, 3),
+                'regression': ratio > 1 + threshold,
+            })
+    return comparison
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark kitchen_model and BattleModel against real SQLite databases.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="catalog sizes to benchmark")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="timed calls per operation")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated data and random numbers")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="a previous JSON report to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--metric", default="p50_us", choices=("mean_us", "p50_us", "p95_us", "p99_us"),
+                        help="timing compared against the baseline")
+    args = parser.parse_args(argv)
+
+    # Per-call INFO logging would dominate the timings
+    logging.disable(logging.INFO)
+
+    report = run_benchmarks(args.sizes, args.iterations, args.seed)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['comparison'] = compare(report, baseline, args.threshold, args.metric)
+        regressions = [entry for entry in report['comparison'] if entry['regression']]
+        for entry in report['comparison']:
+            print("%-8s %-8d %-28s %10.2f -> %10.2f  x%.2f" % (
+                "REGRESS" if entry['regression'] else "ok", entry['size'], entry['operation'],
+                entry['baseline'], entry['current'], entry['ratio']), file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
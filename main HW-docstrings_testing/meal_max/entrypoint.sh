@@ -5,13 +5,12 @@ if [ -f .env ]; then
     export $(cat .env | xargs)
 fi
 
-# Check if CREATE_DB is true, and run the database creation script if so
-if [ "$CREATE_DB" = "true" ]; then
-    echo "Creating the database..."
-    /app/sql/create_db.sh
-else
-    echo "Skipping database creation."
-fi
+# Create the database or bring its schema up to date, keeping existing data
+/app/sql/create_db.sh || exit 1
+# The workers would only find nothing left to migrate
+export MIGRATE_ON_STARTUP=false
 
-# Start the Python application
-exec python app.py
+# Start the application under gunicorn with WORKERS processes (default 4).
+# Arenas live in the database so any worker can serve any arena.
+export ARENA_BACKEND="${ARENA_BACKEND:-sqlite}"
+exec gunicorn --workers "${WORKERS:-4}" --threads "${THREADS:-4}" --bind 0.0.0.0:5000 app:app
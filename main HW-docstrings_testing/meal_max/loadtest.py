@@ -0,0 +1,127 @@
+"""
+Concurrent HTTP load generator for a running meal_max service.
+
+Unlike smoketest.sh, which checks each route once, this replays a weighted mix of real
+routes from many threads for a fixed time and reports throughput, latency percentiles and
+error rates per route. Every worker battles in its own arena, so workers do not fight over
+combatants.
+
+    python loadtest.py --base-url http://localhost:5000/api --concurrency 16 --duration 30 --report loadtest.json
+
+The workers, reporting and options are in meal_max.utils.loadtest_harness; this
+module only defines the meal_max route mix.
+"""
+import json
+import random
+import sys
+from typing import Callable, Optional
+
+import requests
+
+from meal_max.utils.loadtest_harness import Client, run_cli
+
+
+####################################################
+#
+# meal_max Scenario
+#
+####################################################
+
+
+class MealMaxScenario:
+    """
+    The meal_max route mix: arena battles, leaderboard pages and meal lookups.
+
+    A battle task preps combatants until the worker's arena holds two, then battles, so a
+    battle shows up as one or two prep-combatant requests and one battle request.
+
+    Attributes:
+        meals (int): The number of meals seeded before the run.
+        weights (dict[str, int]): The relative frequency of each task.
+    """
+
+    service = "meal_max"
+
+    def __init__(self, meals: int = 200, weights: Optional[dict[str, int]] = None):
+        self.meals = meals
+        self.weights = weights or {'battle': 4, 'leaderboard': 3, 'get-meal-by-id': 2, 'get-meal-by-name': 1}
+        self.tasks: dict[str, Callable[[Client, dict, random.Random], None]] = {
+            'battle': self.battle,
+            'leaderboard': self.leaderboard,
+            'get-meal-by-id': self.get_meal_by_id,
+            'get-meal-by-name': self.get_meal_by_name,
+        }
+        self.meal_ids: list[int] = []
+        self.meal_names: list[str] = []
+
+    def setup(self, base_url: str) -> None:
+        """
+        Bulk loads the seed meals, skipping those left over from earlier runs, and looks up their IDs.
+
+        Args:
+            base_url (str): The API root of the running service.
+
+        Raises:
+            RuntimeError: If the seed meals cannot be created or found.
+        """
+        base_url = base_url.rstrip("/")
+        self.meal_names = [f"Load test meal {i}" for i in range(self.meals)]
+        cuisines = ("Italian", "Thai", "Mexican", "Indian", "French", "Japanese")
+        body = "\n".join(json.dumps({
+            'meal': name, 'cuisine': cuisines[i % len(cuisines)], 'price': 5 + i % 40, 'difficulty': ("LOW", "MED", "HIGH")[i % 3],
+        }) for i, name in enumerate(self.meal_names))
+        response = requests.post(f"{base_url}/create-meals/bulk", data=body,
+                                 headers={'Content-Type': 'application/x-ndjson'}, timeout=60)
+        if response.status_code != 201:
+            raise RuntimeError(f"Failed to seed meals: {response.status_code} {response.text}")
+
+        self.meal_ids = []
+        for name in self.meal_names:
+            response = requests.get(f"{base_url}/get-meal-by-name/{name}", timeout=10)
+            if response.status_code != 200:
+                raise RuntimeError(f"Seed meal {name} not found: {response.status_code} {response.text}")
+            self.meal_ids.append(response.json()['meal']['id'])
+
+    def start_worker(self, worker_id: int) -> dict:
+        return {'arena': f"loadtest-{worker_id}", 'combatants': None}
+
+    def battle(self, client: Client, state: dict, rng: random.Random) -> None:
+        arena = state['arena']
+        if state['combatants'] is None:
+            # The arena may hold combatants from an earlier run
+            client.request("POST /arenas/<arena_id>/clear-combatants", "POST", f"/arenas/{arena}/clear-combatants")
+            state['combatants'] = []
+
+        while len(state['combatants']) < 2:
+            # A meal cannot battle itself
+            meal = rng.choice([name for name in rng.sample(self.meal_names, 2) if name not in state['combatants']])
+            response = client.request("POST /arenas/<arena_id>/prep-combatant", "POST", f"/arenas/{arena}/prep-combatant",
+                                      json={'meal': meal})
+            if response is None or response.status_code != 200:
+                state['combatants'] = None
+                return
+            state['combatants'].append(meal)
+
+        response = client.request("GET /arenas/<arena_id>/battle", "GET", f"/arenas/{arena}/battle")
+        # The winner stays in the arena for the next battle
+        state['combatants'] = [response.json()['winner']] if response is not None and response.status_code == 200 else None
+
+    def leaderboard(self, client: Client, state: dict, rng: random.Random) -> None:
+        sort = rng.choice(("wins", "win_pct", "battles", "rating"))
+        client.request("GET /leaderboard", "GET", "/leaderboard", params={'sort': sort, 'limit': 10})
+
+    def get_meal_by_id(self, client: Client, state: dict, rng: random.Random) -> None:
+        client.request("GET /get-meal-by-id/<meal_id>", "GET", f"/get-meal-by-id/{rng.choice(self.meal_ids)}")
+
+    def get_meal_by_name(self, client: Client, state: dict, rng: random.Random) -> None:
+        client.request("GET /get-meal-by-name/<meal_name>", "GET", f"/get-meal-by-name/{rng.choice(self.meal_names)}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    return run_cli("Replay a weighted mix of meal_max routes against a running service.",
+                   lambda parser: parser.add_argument("--meals", type=int, default=200, help="number of meals to seed"),
+                   lambda args: MealMaxScenario(meals=args.meals), argv)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+from contextlib import contextmanager
+from dataclasses import asdict
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterator, TypeVar
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import BattleRecord, Meal, record_battle_results
+from meal_max.utils.cache_utils import TTLCache
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Arena store settings, overridable from the environment. The 'memory' backend keeps arenas
+# in this process, the 'sqlite' backend shares them between worker processes.
+ARENA_BACKEND = os.getenv("ARENA_BACKEND", "memory")
+ARENA_RETRIES = int(os.getenv("ARENA_RETRIES", "5"))
+ARENA_SHARDS = int(os.getenv("ARENA_SHARDS", "64"))
+ARENA_MAX = int(os.getenv("ARENA_MAX", "100000"))
+ARENA_TTL = float(os.getenv("ARENA_TTL", "1800"))
+
+T = TypeVar("T")
+
+
+class ArenaConflictError(RuntimeError):
+    """Raised when an arena kept changing under an operation until it ran out of retries."""
+
+
+class Arena:
+    """
+    One client's BattleModel, together with the lock that serializes requests against it.
+
+    Attributes:
+        battle_model (BattleModel): The combatants and battle logic of the arena.
+        lock (threading.Lock): Held for the whole of each operation on the arena.
+    """
+
+    def __init__(self):
+        self.battle_model = BattleModel()
+        self.lock = threading.Lock()
+
+
+class ArenaStore:
+    """
+    A thread-safe store of arenas keyed by ID.
+
+    Arenas are spread over independently locked shards, so requests for different arenas
+    rarely contend. Each shard is an LRU cache with a sliding time to live, so arenas are
+    dropped once idle for ttl seconds, or earlier when the store is full.
+
+    Attributes:
+        shards (int): The number of independently locked shards.
+        max_arenas (int): The maximum number of arenas kept across all shards.
+        ttl (float): How long an arena may sit idle before it is dropped, in seconds.
+    """
+
+    def __init__(self, shards: int = ARENA_SHARDS, max_arenas: int = ARENA_MAX, ttl: float = ARENA_TTL):
+        if shards < 1:
+            raise ValueError(f"Invalid number of shards: {shards}. Must be at least 1.")
+        if max_arenas < shards:
+            raise ValueError(f"Invalid maximum number of arenas: {max_arenas}. Must be at least {shards}.")
+
+        self.shards = shards
+        self.max_arenas = max_arenas
+        self.ttl = ttl
+        self._shards = [TTLCache(max_size=-(-max_arenas // shards), ttl=ttl) for _ in range(shards)]
+
+    def _shard(self, arena_id: Hashable) -> TTLCache:
+        return self._shards[hash(arena_id) % self.shards]
+
+    @contextmanager
+    def arena(self, arena_id: Hashable) -> Iterator[BattleModel]:
+        """
+        Opens an arena, creating it on first use, with its lock held until the block exits.
+
+        Args:
+            arena_id (Hashable): The ID of the arena.
+
+        Yields:
+            BattleModel: The arena's BattleModel, safe to use for the duration of the block.
+        """
+        arena = self._shard(arena_id).get_or_set(arena_id, Arena, touch=True)
+        with arena.lock:
+            yield arena.battle_model
+
+    def run(self, arena_id: Hashable, operation: Callable[[BattleModel], T]) -> T:
+        """
+        Runs an operation against an arena with its lock held.
+
+        Args:
+            arena_id (Hashable): The ID of the arena.
+            operation (Callable[[BattleModel], T]): The operation to run.
+
+        Returns:
+            T: Whatever the operation returned.
+        """
+        with self.arena(arena_id) as battle_model:
+            return operation(battle_model)
+
+    def delete(self, arena_id: Hashable) -> None:
+        """
+        Drops an arena and its combatants.
+
+        Args:
+            arena_id (Hashable): The ID of the arena.
+        """
+        logger.info("Deleting arena %s", arena_id)
+        self._shard(arena_id).invalidate(arena_id)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the number of arenas and the lookup and eviction counters, summed over all shards.
+
+        Returns:
+            dict[str, Any]: The store counters.
+        """
+        totals = {'arenas': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'deleted': 0}
+        for shard in self._shards:
+            stats = shard.stats()
+            totals['arenas'] += stats['size']
+            totals['hits'] += stats['hits']
+            totals['misses'] += stats['misses']
+            totals['expired'] += stats['expired']
+            totals['evictions'] += stats['evictions']
+            totals['deleted'] += stats['invalidations']
+        return {'backend': 'memory', 'shards': self.shards, 'max_arenas': self.max_arenas, 'ttl': self.ttl, **totals}
+
+
+class DeferredBattleModel(BattleModel):
+    """
+    A BattleModel that holds battle results back instead of writing them, so an operation
+    can be retried, or thrown away, until its new combatants list has been saved.
+
+    Attributes:
+        pending_results (list[tuple[Meal, Meal, BattleRecord]]): The held back (winner, loser, battle) results.
+    """
+
+    def __init__(self, combatants: list[Meal]):
+        super().__init__()
+        self.combatants = combatants
+        self.pending_results: list[tuple[Meal, Meal, BattleRecord]] = []
+
+    def record_result(self, winner: Meal, loser: Meal, battle: BattleRecord) -> None:
+        self.pending_results.append((winner, loser, battle))
+
+
+class SqliteArenaStore:
+    """
+    An arena store shared by every worker process through the arenas table.
+
+    Each operation reads the arena and its version, runs against a private copy, and saves
+    the new combatants only if the version is unchanged. On a conflict the operation is
+    rerun on the fresh state. Battle results are held back and written in the same
+    transaction as the save, so a retried battle is only ever recorded once, and a battle
+    that cannot be recorded leaves the arena as it was.
+
+    Attributes:
+        ttl (float): How long an arena may go unchanged before it is dropped, in seconds.
+        retries (int): How many times an operation is rerun after a conflict.
+    """
+
+    def __init__(self, ttl: float = ARENA_TTL, retries: int = ARENA_RETRIES):
+        self.ttl = ttl
+        self.retries = retries
+
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._conflicts = 0
+        self._failures = 0
+
+    def _load(self, cursor: sqlite3.Cursor, arena_id: str) -> tuple[list[Meal], int]:
+        cursor.execute("SELECT combatants, version, updated_at FROM arenas WHERE id = ?", (arena_id,))
+        row = cursor.fetchone()
+        if not row:
+            return [], 0
+        combatants, version, updated_at = row
+        if updated_at < time.time() - self.ttl:
+            # Expired but not swept yet, keep the version so the next save still has to win it
+            return [], version
+        return [Meal(**meal) for meal in json.loads(combatants)], version
+
+    def _save(self, cursor: sqlite3.Cursor, arena_id: str, combatants: list[Meal], version: int) -> bool:
+        combatants_json = json.dumps([asdict(meal) for meal in combatants])
+        if version == 0:
+            cursor.execute(
+                "INSERT OR IGNORE INTO arenas (id, combatants, version, updated_at) VALUES (?, ?, 1, ?)",
+                (arena_id, combatants_json, time.time())
+            )
+        else:
+            cursor.execute(
+                "UPDATE arenas SET combatants = ?, version = version + 1, updated_at = ? WHERE id = ? AND version = ?",
+                (combatants_json, time.time(), arena_id, version)
+            )
+        return cursor.rowcount == 1
+
+    def _sweep(self, cursor: sqlite3.Cursor) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.ttl / 10:
+                return
+            self._last_sweep = now
+        cursor.execute("DELETE FROM arenas WHERE updated_at < ?", (now - self.ttl,))
+        if cursor.rowcount:
+            logger.info("Dropped %d expired arenas", cursor.rowcount)
+
+    def run(self, arena_id: str, operation: Callable[[BattleModel], T]) -> T:
+        """
+        Runs an operation against an arena, retrying it on the latest state after a conflict.
+
+        Args:
+            arena_id (str): The ID of the arena.
+            operation (Callable[[BattleModel], T]): The operation to run. It may run more than once.
+
+        Returns:
+            T: Whatever the successful run of the operation returned.
+
+        Raises:
+            ArenaConflictError: If the arena changed under every attempt.
+            ValueError: If the operation itself fails, for example when a battle meal was deleted.
+            sqlite3.Error: If any database error occurs.
+        """
+        try:
+            for attempt in range(self.retries + 1):
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    combatants, version = self._load(cursor, arena_id)
+
+                battle_model = DeferredBattleModel(list(combatants))
+                result = operation(battle_model)
+                if battle_model.combatants == combatants and not battle_model.pending_results:
+                    return result
+
+                def save(cursor: sqlite3.Cursor) -> bool:
+                    saved = self._save(cursor, arena_id, battle_model.combatants, version)
+                    if saved and version == 0:
+                        self._sweep(cursor)
+                    return saved
+
+                if battle_model.pending_results:
+                    # A ValueError from a result rolls the save back with it
+                    saved = record_battle_results(
+                        [(winner.id, loser.id, battle) for winner, loser, battle in battle_model.pending_results],
+                        guard=save)
+                else:
+                    with get_db_connection() as conn:
+                        saved = save(conn.cursor())
+                        conn.commit()
+
+                if saved:
+                    return result
+                with self._lock:
+                    self._conflicts += 1
+                logger.info("Arena %s changed during an operation, retrying (attempt %d)", arena_id, attempt + 1)
+
+            with self._lock:
+                self._failures += 1
+            raise ArenaConflictError(f"Arena {arena_id} is busy, try again")
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+    def delete(self, arena_id: str) -> None:
+        """
+        Drops an arena and its combatants.
+
+        Args:
+            arena_id (str): The ID of the arena.
+
+        Raises:
+            sqlite3.Error: If any database error occurs.
+        """
+        logger.info("Deleting arena %s", arena_id)
+        try:
+            with get_db_connection() as conn:
+                conn.execute("DELETE FROM arenas WHERE id = ?", (arena_id,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the number of arenas and this process's conflict counters.
+
+        Returns:
+            dict[str, Any]: The store counters.
+
+        Raises:
+            sqlite3.Error: If any database error occurs.
+        """
+        with get_db_connection() as conn:
+            arenas = conn.execute("SELECT COUNT(*) FROM arenas").fetchone()[0]
+        with self._lock:
+            return {'backend': 'sqlite', 'ttl': self.ttl, 'arenas': arenas, 'conflicts': self._conflicts, 'failures': self._failures}
+
+
+def create_arena_store(backend: str = ARENA_BACKEND):
+    """
+    Creates the arena store for the configured backend.
+
+    Args:
+        backend (str): 'memory' for a single process, 'sqlite' to share arenas between worker processes.
+
+    Returns:
+        ArenaStore | SqliteArenaStore: The new store.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "memory":
+        return ArenaStore()
+    if backend == "sqlite":
+        return SqliteArenaStore()
+    raise ValueError(f"Invalid arena backend: {backend}. Expected 'memory' or 'sqlite'.")
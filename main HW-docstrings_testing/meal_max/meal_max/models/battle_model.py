@@ -1,15 +1,24 @@
 import logging
-from typing import List
+import os
+from typing import Any, List
 
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+from meal_max.models.kitchen_model import BattleRecord, Meal, get_meals_by_ids, record_battle_result, update_meal_stats_bulk
 from meal_max.utils.logger import configure_logger
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import get_random, get_random_numbers
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Subtracted from a meal's battle score, harder meals lose less
+DIFFICULTY_MODIFIER = {"HIGH": 1, "MED": 2, "LOW": 3}
+
+# The most meals one tournament can enter. A round robin plays n * (n - 1) / 2 matches in a
+# single request and transaction, so this bounds both the response and the write.
+TOURNAMENT_MAX_MEALS = int(os.getenv("TOURNAMENT_MAX_MEALS", "64"))
+
+
 class BattleModel:
     """
     A model to handle battles between meals, determining winners based on their scores.
@@ -76,15 +85,36 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
-        # Update stats for both combatants
-        update_meal_stats(winner.id, 'win')
-        update_meal_stats(loser.id, 'loss')
+        # Update stats for both combatants and append the battle to the history in one transaction
+        self.record_result(winner, loser, BattleRecord(
+            meal_1_id=combatant_1.id,
+            meal_2_id=combatant_2.id,
+            score_1=score_1,
+            score_2=score_2,
+            delta=delta,
+            random_number=random_number,
+            winner_id=winner.id,
+        ))
 
         # Remove the losing combatant from combatants
         self.combatants.remove(loser)
 
         return winner.meal
 
+    def record_result(self, winner: Meal, loser: Meal, battle: BattleRecord) -> None:
+        """
+        Writes the outcome of a battle fought by battle().
+
+        Args:
+            winner (Meal): The meal that won.
+            loser (Meal): The meal that lost.
+            battle (BattleRecord): The battle, for the battle history.
+
+        Raises:
+            ValueError: If either meal does not exist or is marked as deleted.
+        """
+        record_battle_result(winner.id, loser.id, battle=battle)
+
     def clear_combatants(self):
         """
         Clears the list of combatants, preparing for a new battle.
@@ -106,14 +136,12 @@ class BattleModel:
             float: The calculated battle score for the combatant.
         """
 
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
-
         # Log the calculation process
         logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
                     combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
 
         # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
+        score = (combatant.price * len(combatant.cuisine)) - DIFFICULTY_MODIFIER[combatant.difficulty]
 
         # Log the calculated score
         logger.info("Battle score for %s: %.3f", combatant.meal, score)
@@ -151,4 +179,136 @@ class BattleModel:
         self.combatants.append(combatant_data)
 
         # Log the current state of combatants
-        logger.info("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
\ No newline at end of file
+        logger.info("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
+
+    ##################################################
+    # Tournament Functions
+    ##################################################
+
+    def run_tournament(self, meal_ids: List[int], mode: str = "single_elimination") -> dict[str, Any]:
+        """
+        Runs a whole tournament server-side, without touching the combatants list.
+
+        All meals are loaded in one query, all random numbers are drawn in one batch, and
+        every win/loss is written in one transaction, together with the battle history, once
+        the last match is decided.
+        Matches follow the same rules as battle(), with the first-listed meal as combatant 1.
+
+        Round-robin standings are ordered by wins. Meals level on wins are ordered by the wins
+        they took off each other (for two meals, whoever won their match), and meals still level
+        after that by seed, the order they were entered in.
+
+        Args:
+            meal_ids (List[int]): The IDs of the meals entering the tournament, in seeding order.
+            mode (str): 'single_elimination' or 'round_robin'.
+
+        Returns:
+            dict[str, Any]: The bracket as a list of rounds of matches with their scores, deltas
+                and random numbers, plus the champion (single elimination) or standings (round robin).
+
+        Raises:
+            ValueError: If the mode is invalid, fewer than two or more than TOURNAMENT_MAX_MEALS
+                distinct meals are entered, or any meal is not found or is marked as deleted.
+        """
+        if mode not in ("single_elimination", "round_robin"):
+            logger.error("Invalid tournament mode: %s", mode)
+            raise ValueError(f"Invalid tournament mode: {mode}. Expected 'single_elimination' or 'round_robin'.")
+        if len(meal_ids) < 2:
+            logger.error("Not enough meals to start a tournament.")
+            raise ValueError("At least two meals are needed for a tournament.")
+        if len(meal_ids) > TOURNAMENT_MAX_MEALS:
+            logger.error("Too many meals to start a tournament: %d", len(meal_ids))
+            raise ValueError(f"At most {TOURNAMENT_MAX_MEALS} meals can enter a tournament.")
+        if len(set(meal_ids)) != len(meal_ids):
+            logger.error("Duplicate meal IDs in tournament entry: %s", meal_ids)
+            raise ValueError("Each meal can only enter a tournament once.")
+
+        logger.info("Starting %s tournament with %d meals", mode, len(meal_ids))
+
+        meals = get_meals_by_ids(meal_ids)
+        scores = {meal.id: self.get_battle_score(meal) for meal in meals}
+
+        n = len(meals)
+        match_count = n - 1 if mode == "single_elimination" else n * (n - 1) // 2
+        random_numbers = iter(get_random_numbers(match_count))
+        results = []
+        history: List[BattleRecord] = []
+
+        def play(round_number: int, combatant_1: Meal, combatant_2: Meal) -> dict[str, Any]:
+            score_1 = scores[combatant_1.id]
+            score_2 = scores[combatant_2.id]
+            delta = abs(score_1 - score_2) / 100
+            random_number = next(random_numbers)
+            if delta > random_number:
+                winner, loser = combatant_1, combatant_2
+            else:
+                winner, loser = combatant_2, combatant_1
+            results.append((winner.id, 'win'))
+            results.append((loser.id, 'loss'))
+            history.append(BattleRecord(combatant_1.id, combatant_2.id, score_1, score_2, delta, random_number, winner.id))
+            return {
+                'round': round_number,
+                'combatant_1': combatant_1.meal,
+                'combatant_2': combatant_2.meal,
+                'score_1': score_1,
+                'score_2': score_2,
+                'delta': delta,
+                'random_number': random_number,
+                'winner': winner.meal,
+                'loser': loser.meal,
+                '_winner': winner,
+            }
+
+        rounds: List[List[dict[str, Any]]] = []
+        if mode == "single_elimination":
+            # Pad the first round to a power of two; the top seeds get the byes
+            bracket_size = 1
+            while bracket_size < n:
+                bracket_size *= 2
+            byes = bracket_size - n
+            advancing = meals[:byes]
+            playing = meals[byes:]
+
+            round_number = 1
+            while len(playing) > 1 or advancing:
+                matches = [play(round_number, playing[i], playing[i + 1]) for i in range(0, len(playing), 2)]
+                rounds.append(matches)
+                playing = advancing + [match['_winner'] for match in matches]
+                advancing = []
+                round_number += 1
+
+            outcome = {'champion': playing[0].meal}
+        else:
+            wins = {meal.id: 0 for meal in meals}
+            beaten: dict[int, set] = {meal.id: set() for meal in meals}
+            matches = []
+            for i in range(n):
+                for j in range(i + 1, n):
+                    match = play(1, meals[i], meals[j])
+                    winner_id = match['_winner'].id
+                    wins[winner_id] += 1
+                    beaten[winner_id].add(meals[j].id if winner_id == meals[i].id else meals[i].id)
+                    matches.append(match)
+            rounds.append(matches)
+
+            level: dict[int, set] = {}
+            for meal in meals:
+                level.setdefault(wins[meal.id], set()).add(meal.id)
+            seeds = {meal.id: seed for seed, meal in enumerate(meals, start=1)}
+
+            def rank(meal: Meal) -> tuple:
+                head_to_head = len(beaten[meal.id] & level[wins[meal.id]])
+                return -wins[meal.id], -head_to_head, seeds[meal.id]
+
+            standings = sorted(meals, key=rank)
+            outcome = {'standings': [{'meal': meal.meal, 'seed': seeds[meal.id], 'wins': wins[meal.id],
+                                      'losses': n - 1 - wins[meal.id]} for meal in standings]}
+
+        for matches in rounds:
+            for match in matches:
+                del match['_winner']
+
+        update_meal_stats_bulk(results, battles=history)
+        logger.info("Tournament finished after %d matches", match_count)
+
+        return {'mode': mode, 'rounds': rounds, **outcome}
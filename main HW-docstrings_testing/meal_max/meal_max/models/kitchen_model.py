@@ -1,16 +1,51 @@
-from dataclasses import dataclass
+import atexit
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 import logging
+import os
+import re
 import sqlite3
-from typing import Any
+import threading
+from typing import Any, Callable, Iterable, Optional
 
+from meal_max.models.rating_model import apply_ratings
+from meal_max.utils.cache_utils import MISSING, TTLCache
+from meal_max.utils import sql_utils
 from meal_max.utils.sql_utils import get_db_connection
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.write_behind import WriteBehindBuffer
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Process-local read-through cache for get_meal_by_id and get_meal_by_name, keyed by
+# ('id', meal_id) and ('name', meal_name). Misses for unknown or deleted meals are cached
+# too, for a shorter time. Other worker processes only see writes once entries expire.
+MEAL_CACHE_NEGATIVE_TTL = float(os.getenv("MEAL_CACHE_NEGATIVE_TTL", "5"))
+meal_cache = TTLCache(
+    max_size=int(os.getenv("MEAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("MEAL_CACHE_TTL", "60")),
+)
+
+# Bumped by every write this module makes, including results that only reach the write-behind
+# buffer. get_data_version combines it with the database's own version, which also moves
+# on writes by other worker processes.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+# Write-behind mode for battle results. When on, record_battle_result only buffers the
+# counter deltas in memory and a background thread writes them every BATTLE_STATS_FLUSH_MS,
+# or as soon as BATTLE_STATS_FLUSH_MAX results are pending. Results still buffered when the
+# process is killed without a clean shutdown are lost. While flushes fail, results are kept
+# for the next one, up to BATTLE_STATS_BUFFER_MAX, after which new results are refused.
+BATTLE_STATS_WRITE_BEHIND = os.getenv("BATTLE_STATS_WRITE_BEHIND", "false").lower() == "true"
+BATTLE_STATS_FLUSH_MS = int(os.getenv("BATTLE_STATS_FLUSH_MS", "500"))
+BATTLE_STATS_FLUSH_MAX = int(os.getenv("BATTLE_STATS_FLUSH_MAX", "1000"))
+BATTLE_STATS_BUFFER_MAX = int(os.getenv("BATTLE_STATS_BUFFER_MAX", "100000"))
+
+
 @dataclass
 class Meal:
     id: int
@@ -37,6 +72,101 @@ class Meal:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
 
 
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+@dataclass
+class BattleRecord:
+    meal_1_id: int
+    meal_2_id: int
+    score_1: float
+    score_2: float
+    delta: float
+    random_number: float
+    winner_id: int
+    created_at: str = field(default_factory=_utc_now)
+
+    """
+    An object that represents one battle for the append-only battle history.
+
+    Attributes:
+        meal_1_id (int): The ID of combatant 1.
+        meal_2_id (int): The ID of combatant 2.
+        score_1 (float): The battle score of combatant 1.
+        score_2 (float): The battle score of combatant 2.
+        delta (float): The normalized difference between the scores.
+        random_number (float): The random draw the delta was compared against.
+        winner_id (int): The ID of the meal that won.
+        created_at (str): When the battle was fought, in UTC.
+    """
+
+    @property
+    def loser_id(self) -> int:
+        return self.meal_2_id if self.winner_id == self.meal_1_id else self.meal_1_id
+
+
+def _cache_meal(meal: Meal) -> None:
+    meal_cache.set(('id', meal.id), meal)
+    meal_cache.set(('name', meal.meal), meal)
+
+
+def _cache_missing(key: tuple, message: str) -> None:
+    meal_cache.set(key, message, ttl=MEAL_CACHE_NEGATIVE_TTL)
+
+
+def _from_cache(cached: Any) -> Meal:
+    # Cached misses are stored as the error message to raise
+    if isinstance(cached, Meal):
+        return cached
+    logger.info(cached)
+    raise ValueError(cached)
+
+
+def invalidate_meal(meal_id: Optional[int] = None, meal_name: Optional[str] = None) -> None:
+    """
+    Drops a meal from the meal cache, by ID, by name, or both.
+
+    If only the ID is given and the meal is cached under it, its name entry is dropped too.
+
+    Args:
+        meal_id (Optional[int]): The ID of the meal.
+        meal_name (Optional[str]): The name of the meal.
+    """
+    if meal_id is not None and meal_name is None:
+        cached = meal_cache.get(('id', meal_id))
+        if isinstance(cached, Meal):
+            meal_name = cached.meal
+    keys = []
+    if meal_id is not None:
+        keys.append(('id', meal_id))
+    if meal_name is not None:
+        keys.append(('name', meal_name))
+    meal_cache.invalidate(*keys)
+
+
+def _bump_data_version() -> None:
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+
+def get_data_version() -> tuple:
+    """
+    Returns a version of the catalog, its stats and ratings that changes after every write.
+
+    Reads made at the same version return the same results, so callers can cache anything
+    derived from them under it.
+
+    Returns:
+        tuple: An opaque, hashable version, only meaningful compared with another one.
+
+    Raises:
+        sqlite3.Error: If the database version cannot be read.
+    """
+    return (_data_version, sql_utils.get_data_version())
+
+
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
     """
     Creates a new meal in the meals table.
@@ -66,7 +196,10 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
                 VALUES (?, ?, ?, ?)
             """, (meal, cuisine, price, difficulty))
             conn.commit()
+            _bump_data_version()
 
+            # The name, or the new ID, may be cached as not found
+            invalidate_meal(cursor.lastrowid, meal)
             logger.info("Meal successfully added to the database: %s", meal)
 
     except sqlite3.IntegrityError:
@@ -78,6 +211,170 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
         raise e
 
 
+def _validate_bulk_row(row: Any) -> tuple:
+    """
+    Validates one row of a bulk load using the same rules as Meal.
+
+    Args:
+        row (Any): The parsed row, expected to be a dict with meal, cuisine, price and difficulty.
+
+    Returns:
+        tuple: The (meal, cuisine, price, difficulty) values ready to insert.
+
+    Raises:
+        ValueError: If the row is malformed or any field is invalid.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"Invalid row: {row!r}")
+
+    meal = row.get('meal')
+    cuisine = row.get('cuisine')
+    if not meal or not cuisine:
+        raise ValueError("Invalid row: meal and cuisine are required")
+
+    try:
+        price = float(row.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid price: {row.get('price')}. Price must be a positive number.")
+
+    # Meal.__post_init__ enforces the price and difficulty rules
+    validated = Meal(id=0, meal=meal, cuisine=cuisine, price=price, difficulty=row.get('difficulty'))
+    return (validated.meal, validated.cuisine, validated.price, validated.difficulty)
+
+
+def _insert_bulk_chunk(chunk: list[tuple], errors: list[dict[str, Any]]) -> int:
+    """
+    Inserts one validated chunk of a bulk load in a single transaction.
+
+    Names that already exist in the catalog are reported in errors instead of being inserted.
+
+    Args:
+        chunk (list[tuple]): (row number, (meal, cuisine, price, difficulty)) pairs.
+        errors (list[dict[str, Any]]): The error list to append per-row failures to.
+
+    Returns:
+        int: The number of meals inserted.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    if not chunk:
+        return 0
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        names = [values[0] for _, values in chunk]
+        existing = set()
+        # Older SQLite builds cap a statement at 999 bound parameters
+        for start in range(0, len(names), 500):
+            batch = names[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f"SELECT meal FROM meals WHERE meal IN ({placeholders})", batch)
+            existing.update(row[0] for row in cursor.fetchall())
+
+        to_insert = []
+        for row_number, values in chunk:
+            if values[0] in existing:
+                errors.append({'row': row_number, 'meal': values[0], 'error': f"Meal with name '{values[0]}' already exists"})
+            else:
+                to_insert.append((row_number, values))
+
+        try:
+            cursor.executemany("""
+                INSERT INTO meals (meal, cuisine, price, difficulty)
+                VALUES (?, ?, ?, ?)
+            """, [values for _, values in to_insert])
+            # executemany does not report the new IDs, so read them back inside the transaction
+            new_ids = []
+            inserted_names = [values[0] for _, values in to_insert]
+            for start in range(0, len(inserted_names), 500):
+                batch = inserted_names[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                cursor.execute(f"SELECT id FROM meals WHERE meal IN ({placeholders})", batch)
+                new_ids.extend(row[0] for row in cursor.fetchall())
+            conn.commit()
+            _bump_data_version()
+            # The names, or the new IDs, may be cached as not found
+            meal_cache.invalidate(*(('name', name) for name in inserted_names), *(('id', meal_id) for meal_id in new_ids))
+            return len(to_insert)
+        except sqlite3.IntegrityError:
+            # Another writer got in between the check and the insert, fall back to row by row
+            conn.rollback()
+
+        inserted_keys = []
+        for row_number, values in to_insert:
+            try:
+                cursor.execute("""
+                    INSERT INTO meals (meal, cuisine, price, difficulty)
+                    VALUES (?, ?, ?, ?)
+                """, values)
+                inserted_keys += [('name', values[0]), ('id', cursor.lastrowid)]
+            except sqlite3.IntegrityError:
+                errors.append({'row': row_number, 'meal': values[0], 'error': f"Meal with name '{values[0]}' already exists"})
+        conn.commit()
+        _bump_data_version()
+        meal_cache.invalidate(*inserted_keys)
+        return len(inserted_keys) // 2
+
+
+def create_meals_bulk(rows: Iterable[Any], batch_size: int = 500) -> dict[str, Any]:
+    """
+    Creates many meals at once, validating and inserting them in batches.
+
+    Rows are consumed lazily, so the input can be a stream. Each batch is inserted with
+    executemany in a single transaction. Invalid rows and duplicate names are reported
+    per row and do not abort the rest of the load.
+
+    Args:
+        rows (Iterable[Any]): The meals to create, each a dict with meal, cuisine, price and difficulty.
+        batch_size (int): The number of rows to validate and insert per transaction.
+
+    Returns:
+        dict[str, Any]: The number of rows inserted and failed, and the per-row errors.
+            Rows are numbered from 1 in input order.
+
+    Raises:
+        ValueError: If batch_size is not positive.
+        sqlite3.Error: If any database error occurs.
+    """
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+
+    inserted = 0
+    errors: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    chunk: list[tuple] = []
+
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                values = _validate_bulk_row(row)
+            except ValueError as e:
+                meal = row.get('meal') if isinstance(row, dict) else None
+                errors.append({'row': row_number, 'meal': meal, 'error': str(e)})
+                continue
+
+            if values[0] in seen:
+                errors.append({'row': row_number, 'meal': values[0], 'error': f"Meal with name '{values[0]}' already exists"})
+                continue
+            seen.add(values[0])
+
+            chunk.append((row_number, values))
+            if len(chunk) >= batch_size:
+                inserted += _insert_bulk_chunk(chunk, errors)
+                chunk = []
+
+        inserted += _insert_bulk_chunk(chunk, errors)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    errors.sort(key=lambda error: error['row'])
+    logger.info("Bulk load finished: %d meals inserted, %d rows failed", inserted, len(errors))
+    return {'inserted': inserted, 'failed': len(errors), 'errors': errors}
+
+
 def delete_meal(meal_id: int) -> None:
     """
     Soft deletes a meal from the catalog by marking it as deleted.
@@ -93,9 +390,9 @@ def delete_meal(meal_id: int) -> None:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT deleted FROM meals WHERE id = ?", (meal_id,))
+            cursor.execute("SELECT deleted, meal FROM meals WHERE id = ?", (meal_id,))
             try:
-                deleted = cursor.fetchone()[0]
+                deleted, meal_name = cursor.fetchone()
                 if deleted:
                     logger.info("Meal with ID %s has already been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
@@ -105,6 +402,8 @@ def delete_meal(meal_id: int) -> None:
 
             cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
             conn.commit()
+            _bump_data_version()
+            invalidate_meal(meal_id, meal_name)
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
 
@@ -112,62 +411,162 @@ def delete_meal(meal_id: int) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+# Leaderboard sort columns, each backed by a (deleted, column DESC, id) index
+LEADERBOARD_SORT_COLUMNS = ("wins", "win_pct", "battles", "rating")
+
+
+def get_leaderboard(sort_by: str="wins", limit: Optional[int] = None, offset: int = 0,
+                    after: Optional[tuple[float, int]] = None) -> list[dict[str, Any]]:
     """
-    Retrieves the leaderboard of meals based on the numbers of wins.
+    Retrieves the leaderboard of meals sorted by wins, win percentage, battles or Elo rating.
+
+    See get_leaderboard_page, which also returns the keyset cursor for the next page.
 
     Args:
-        sort_by (str): The criteria to sort by, which is "wins".
+        sort_by (str): The criteria to sort by, "wins", "win_pct", "battles" or "rating".
+        limit (Optional[int]): The maximum number of meals to return, or None for all of them.
+        offset (int): The number of meals to skip.
+        after (Optional[tuple[float, int]]): Keyset pagination cursor, the next cursor of the previous page.
 
     Returns:
-        dict[str, Any]: A dictionary list representing the leaderboard of meals.
+        list[dict[str, Any]]: A dictionary list representing the leaderboard of meals.
 
     Raises:
-        ValueError: If an invalid sort_by parameter is provided.
+        ValueError: If an invalid sort_by, limit or offset is provided.
         sqlite3.Error: If any database error occurs.
     """
+    return get_leaderboard_page(sort_by, limit=limit, offset=offset, after=after)[0]
 
-    if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
-    elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
-    else:
+def get_leaderboard_page(sort_by: str="wins", limit: Optional[int] = None, offset: int = 0,
+                         after: Optional[tuple[float, int]] = None) -> tuple[list[dict[str, Any]], Optional[tuple[float, int]]]:
+    """
+    Retrieves a page of the leaderboard of meals, and the keyset cursor for the next page.
+
+    Ties are broken by meal ID, so pages are stable. Each sort is served from an index, so a
+    page costs O(k log n) rather than a scan and sort of the whole catalog. The cursor is the
+    (sort value, ID) of the last meal on the page as it was ranked then, so a page picks up
+    where the previous one ended even if that meal has battled since.
+
+    In write-behind mode, results still in the buffer are merged in. The first page is exact:
+    limit plus one row per buffered meal are fetched, together with the buffered meals
+    themselves, and the top limit after merging are returned. Later pages are approximate,
+    since offset and after count positions in the flushed table, so a meal can show up on
+    two pages or on none until the buffer is flushed.
+
+    Args:
+        sort_by (str): The criteria to sort by, "wins", "win_pct", "battles" or "rating".
+        limit (Optional[int]): The maximum number of meals to return, or None for all of them.
+        offset (int): The number of meals to skip.
+        after (Optional[tuple[float, int]]): Keyset pagination cursor, the next cursor of the previous page.
+            Only meals ranked after it are returned.
+
+    Returns:
+        tuple[list[dict[str, Any]], Optional[tuple[float, int]]]: The meals on the page, and the
+            cursor for the next page, or None if this page is not full.
+
+    Raises:
+        ValueError: If an invalid sort_by, limit or offset is provided.
+        sqlite3.Error: If any database error occurs.
+    """
+
+    if sort_by not in LEADERBOARD_SORT_COLUMNS:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    if limit is not None and limit < 0:
+        raise ValueError(f"Invalid limit: {limit}. Must be non-negative.")
+    if offset < 0:
+        raise ValueError(f"Invalid offset: {offset}. Must be non-negative.")
+
+    columns = "id, meal, cuisine, price, difficulty, battles, wins, win_pct, rating"
+    first_page = offset == 0 and after is None
+
+    def read(pending: dict) -> list[tuple]:
+        query = f"SELECT {columns} FROM meals WHERE deleted = FALSE"
+        params: list[Any] = []
+
+        if after is not None:
+            # The first condition lets SQLite seek into the index, the second skips ties already seen
+            query += f" AND {sort_by} <= ? AND ({sort_by} < ? OR id > ?)"
+            params += [after[0], after[0], after[1]]
+
+        query += f" ORDER BY {sort_by} DESC, id ASC"
+        if limit is not None or offset:
+            # Each buffered meal can push at most one fetched meal out of the page
+            query += " LIMIT ? OFFSET ?"
+            params += [limit + len(pending) if limit is not None else -1, offset]
 
-    try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
+            cursor.execute(query, params)
             rows = cursor.fetchall()
 
-        leaderboard = []
+            if pending and first_page and limit is not None:
+                # Buffered meals ranked below the fetched rows can still climb into the page
+                fetched = {row[0] for row in rows}
+                missing = [meal_id for meal_id in pending if meal_id not in fetched]
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    cursor.execute(f"SELECT {columns} FROM meals WHERE deleted = FALSE AND id IN ({','.join('?' * len(batch))})",
+                                   batch)
+                    rows += cursor.fetchall()
+
+        return rows
+
+    try:
+        if stats_buffer is not None:
+            # Results still waiting in the write-behind buffer are not in the table yet
+            rows, pending = stats_buffer.read_with_pending(read)
+        else:
+            rows, pending = read({}), {}
+
+        ranked = []
         for row in rows:
+            battles, wins, win_pct = row[5], row[6], row[7]
+            if row[0] in pending:
+                battles += pending[row[0]][0]
+                wins += pending[row[0]][1]
+                win_pct = wins / battles
+            # Ratings only move when the buffer is flushed
+            sort_value = {'wins': wins, 'battles': battles, 'win_pct': win_pct, 'rating': row[8]}[sort_by]
             meal = {
                 'id': row[0],
                 'meal': row[1],
                 'cuisine': row[2],
                 'price': row[3],
                 'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+                'battles': battles,
+                'wins': wins,
+                'win_pct': round(win_pct * 100, 1),  # Convert to percentage
+                'rating': round(row[8], 1)
             }
-            leaderboard.append(meal)
+            ranked.append((sort_value, meal))
+
+        if pending:
+            ranked.sort(key=lambda entry: (-entry[0], entry[1]['id']))
+            if limit is not None:
+                ranked = ranked[:limit]
+
+        next_after = None
+        if limit and len(ranked) == limit:
+            next_after = (ranked[-1][0], ranked[-1][1]['id'])
 
         logger.info("Leaderboard retrieved successfully")
-        return leaderboard
+        return [meal for _, meal in ranked], next_after
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_meal_by_id(meal_id: int) -> Meal:
+def get_meal_by_id(meal_id: int, fresh: bool = False) -> Meal:
     """
     Retrieves a meal from the catalog by its meal ID.
 
+    Results, including not-found and deleted meals, are served from the meal cache while fresh.
+
     Args:
         meal_id (int): The ID of the meal to retrieve.
+        fresh (bool): If True, drop the meal from the cache and read it from the database, for
+            callers that must see writes made by other worker processes.
 
     Returns:
         Meal: The Meal object that corresponds to the meal_id.
@@ -177,6 +576,13 @@ def get_meal_by_id(meal_id: int) -> Meal:
         sqlite3.Error: If any database error occurs.
     """
 
+    if fresh:
+        invalidate_meal(meal_id=meal_id)
+    else:
+        cached = meal_cache.get(('id', meal_id))
+        if cached is not MISSING:
+            return _from_cache(cached)
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -186,10 +592,14 @@ def get_meal_by_id(meal_id: int) -> Meal:
             if row:
                 if row[5]:
                     logger.info("Meal with ID %s has been deleted", meal_id)
+                    _cache_missing(('id', meal_id), f"Meal with ID {meal_id} has been deleted")
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                _cache_meal(meal)
+                return meal
             else:
                 logger.info("Meal with ID %s not found", meal_id)
+                _cache_missing(('id', meal_id), f"Meal with ID {meal_id} not found")
                 raise ValueError(f"Meal with ID {meal_id} not found")
 
     except sqlite3.Error as e:
@@ -197,12 +607,16 @@ def get_meal_by_id(meal_id: int) -> Meal:
         raise e
 
 
-def get_meal_by_name(meal_name: str) -> Meal:
+def get_meal_by_name(meal_name: str, fresh: bool = False) -> Meal:
     """
     Retrieves a meal from the catalog based on its name.
 
+    Results, including not-found and deleted meals, are served from the meal cache while fresh.
+
     Args:
         meal_name (str): The name of the meal to retrieve.
+        fresh (bool): If True, drop the meal from the cache and read it from the database, for
+            callers that must see writes made by other worker processes.
 
     Returns:
         Meal: The Meal object corresponding to the meal_name.
@@ -212,6 +626,12 @@ def get_meal_by_name(meal_name: str) -> Meal:
         sqlite3.Error: If any database error occurs.
     """
 
+    cached = meal_cache.get(('name', meal_name))
+    if fresh:
+        invalidate_meal(cached.id if isinstance(cached, Meal) else None, meal_name)
+    elif cached is not MISSING:
+        return _from_cache(cached)
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -221,10 +641,14 @@ def get_meal_by_name(meal_name: str) -> Meal:
             if row:
                 if row[5]:
                     logger.info("Meal with name %s has been deleted", meal_name)
+                    _cache_missing(('name', meal_name), f"Meal with name {meal_name} has been deleted")
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                meal = Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                _cache_meal(meal)
+                return meal
             else:
                 logger.info("Meal with name %s not found", meal_name)
+                _cache_missing(('name', meal_name), f"Meal with name {meal_name} not found")
                 raise ValueError(f"Meal with name {meal_name} not found")
 
     except sqlite3.Error as e:
@@ -232,6 +656,106 @@ def get_meal_by_name(meal_name: str) -> Meal:
         raise e
 
 
+# Relative bm25 weights of the meal and cuisine columns, so name matches rank first
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+# bm25 scores every match, so a query matching more meals than this is returned in catalog
+# order instead, which keeps broad queries like a single letter or a cuisine fast
+SEARCH_RANK_MAX = int(os.getenv("SEARCH_RANK_MAX", "5000"))
+
+
+def _search_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches every word, the last one as a prefix.
+
+    Each word is quoted, so FTS5 operators and punctuation in the input are matched literally.
+
+    Args:
+        query (str): The search text, for example "chicken tikk".
+
+    Returns:
+        str: The FTS5 query, for example '"chicken" "tikk"*'.
+
+    Raises:
+        ValueError: If the query contains no words.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        raise ValueError("Search query must contain at least one letter or digit")
+    return " ".join('"%s"' % term for term in terms) + "*"
+
+
+def search_meals(query: str, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+    """
+    Searches meal names and cuisines, best matches first.
+
+    Every word of the query must match a word in the meal name or cuisine, and the last word
+    may be the start of one, so results can follow a search box as the user types. Matches
+    are ranked by bm25, with name matches weighted above cuisine matches. Queries matching
+    more than SEARCH_RANK_MAX meals are not ranked and come back in catalog order. Deleted
+    meals are never returned.
+
+    Args:
+        query (str): The search text.
+        limit (int): The maximum number of meals to return.
+        offset (int): The number of matches to skip.
+
+    Returns:
+        list[dict[str, Any]]: The matching meals with their bm25 score, lower is better, or None if not ranked.
+
+    Raises:
+        ValueError: If the query contains no words, or the limit or offset is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    if limit < 1:
+        raise ValueError(f"Invalid limit: {limit}. Must be positive.")
+    if offset < 0:
+        raise ValueError(f"Invalid offset: {offset}. Must be non-negative.")
+    match = _search_query(query)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM meals_fts WHERE meals_fts MATCH ? LIMIT ?)",
+                (match, SEARCH_RANK_MAX + 1)
+            )
+            ranked = cursor.fetchone()[0] <= SEARCH_RANK_MAX
+
+            # Only the page is joined back to the meals table
+            if ranked:
+                hits = f"""
+                    SELECT rowid, bm25(meals_fts, {SEARCH_WEIGHTS[0]}, {SEARCH_WEIGHTS[1]}) AS score
+                    FROM meals_fts WHERE meals_fts MATCH ? ORDER BY score, rowid LIMIT ? OFFSET ?
+                """
+            else:
+                hits = "SELECT rowid, NULL AS score FROM meals_fts WHERE meals_fts MATCH ? ORDER BY rowid LIMIT ? OFFSET ?"
+            cursor.execute(f"""
+                WITH hits AS ({hits})
+                SELECT meals.id, meals.meal, meals.cuisine, meals.price, meals.difficulty, hits.score
+                FROM hits JOIN meals ON meals.id = hits.rowid
+                ORDER BY hits.score, hits.rowid
+            """, (match, limit, offset))
+            rows = cursor.fetchall()
+
+        logger.info("Search for %r returned %d meals (ranked: %s)", query, len(rows), ranked)
+        return [
+            {
+                'id': row[0],
+                'meal': row[1],
+                'cuisine': row[2],
+                'price': row[3],
+                'difficulty': row[4],
+                'score': round(row[5], 4) if row[5] is not None else None,
+            }
+            for row in rows
+        ]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
 def update_meal_stats(meal_id: int, result: str) -> None:
     """
     Updates the meal's statistics based on the result of a battle.
@@ -253,9 +777,12 @@ def update_meal_stats(meal_id: int, result: str) -> None:
                 deleted = cursor.fetchone()[0]
                 if deleted:
                     logger.info("Meal with ID %s has been deleted", meal_id)
+                    # The cache may still hold the meal if another process deleted it
+                    invalidate_meal(meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
             except TypeError:
                 logger.info("Meal with ID %s not found", meal_id)
+                invalidate_meal(meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
 
             if result == 'win':
@@ -266,7 +793,491 @@ def update_meal_stats(meal_id: int, result: str) -> None:
                 raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
 
             conn.commit()
+            _bump_data_version()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def _raise_for_missing_meals(cursor: sqlite3.Cursor, meal_ids: list[int]) -> None:
+    """
+    Works out which meal made a guarded update touch fewer rows than expected, and raises for it.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor to query with.
+        meal_ids (list[int]): The meals the update was meant to touch, checked in order.
+
+    Raises:
+        ValueError: For the first meal that is not found or is marked as deleted.
+    """
+    found = {}
+    for start in range(0, len(meal_ids), 500):
+        batch = meal_ids[start:start + 500]
+        placeholders = ", ".join("?" * len(batch))
+        cursor.execute(f"SELECT id, deleted FROM meals WHERE id IN ({placeholders})", batch)
+        found.update(cursor.fetchall())
+
+    for meal_id in meal_ids:
+        # The cache may still hold the meal if another process deleted it
+        invalidate_meal(meal_id)
+    for meal_id in meal_ids:
+        if meal_id not in found:
+            logger.info("Meal with ID %s not found", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} not found")
+        if found[meal_id]:
+            logger.info("Meal with ID %s has been deleted", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} has been deleted")
+
+
+def _insert_battles(cursor: sqlite3.Cursor, battles: Iterable[BattleRecord]) -> None:
+    cursor.executemany("""
+        INSERT INTO battles (meal_1_id, meal_2_id, score_1, score_2, delta, random_number, winner_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (b.meal_1_id, b.meal_2_id, b.score_1, b.score_2, b.delta, b.random_number, b.winner_id, b.created_at)
+        for b in battles
+    ])
+
+
+def record_battle_result(winner_id: int, loser_id: int, battle: Optional[BattleRecord] = None) -> None:
+    """
+    Records the outcome of a battle atomically.
+
+    Both counters are updated by a single UPDATE guarded by deleted = FALSE, and its row
+    count replaces a separate existence check, so the whole result is one statement and
+    one commit. Either both meals are updated or neither is. The Elo ratings of both meals
+    are updated in the same transaction. In write-behind mode the result is buffered instead
+    and written with the next flush.
+
+    Args:
+        winner_id (int): The ID of the meal that won.
+        loser_id (int): The ID of the meal that lost.
+        battle (Optional[BattleRecord]): The battle to append to the history in the same transaction.
+
+    Raises:
+        ValueError: If the IDs are the same, or either meal does not exist or is marked as deleted.
+            In write-behind mode only the first check is made here, and results for meals
+            that are gone by flush time are dropped.
+        sqlite3.Error: If any database error occurs.
+    """
+    record_battle_results([(winner_id, loser_id, battle)])
+
+
+def record_battle_results(results: list[tuple[int, int, Optional[BattleRecord]]],
+                          guard: Optional[Callable[[sqlite3.Cursor], bool]] = None) -> bool:
+    """
+    Records the outcomes of several battles in one transaction, after an optional guard.
+
+    The guard runs first, on the same cursor and in the same transaction, so a caller can tie
+    the results to a write of its own, such as a compare-and-swap, that must land with them.
+    If the guard returns False, or any result fails, the whole transaction is rolled back,
+    the guard's writes included. In write-behind mode the guard commits on its own and the
+    results are buffered after it.
+
+    Args:
+        results (list[tuple[int, int, Optional[BattleRecord]]]): The (winner ID, loser ID, battle) of each battle.
+        guard (Optional[Callable[[sqlite3.Cursor], bool]]): Runs first and returns whether to go on.
+
+    Returns:
+        bool: False if the guard refused and nothing was written, True otherwise.
+
+    Raises:
+        ValueError: If a meal battles itself, or a meal does not exist or is marked as deleted.
+            Nothing is written in that case.
+        WriteBehindFullError: In write-behind mode, if the buffer is full because flushes keep
+            failing. The guard has already committed by then.
+        sqlite3.Error: If any database error occurs.
+    """
+    for winner_id, loser_id, _ in results:
+        if winner_id == loser_id:
+            raise ValueError(f"A meal cannot battle itself: {winner_id}")
+
+    try:
+        if stats_buffer is not None:
+            if guard is not None:
+                with get_db_connection() as conn:
+                    if not guard(conn.cursor()):
+                        conn.rollback()
+                        return False
+                    conn.commit()
+            deltas: dict[int, list[int]] = {}
+            for winner_id, loser_id, _ in results:
+                deltas.setdefault(winner_id, [0, 0])[0] += 1
+                deltas[winner_id][1] += 1
+                deltas.setdefault(loser_id, [0, 0])[0] += 1
+            # One add, so a full buffer refuses all of the results or none of them
+            stats_buffer.add(deltas, results=len(results), events=[battle for _, _, battle in results if battle])
+            for winner_id, loser_id, _ in results:
+                logger.info("Buffered battle result: %s beat %s", winner_id, loser_id)
+            _bump_data_version()
+            return True
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            if guard is not None and not guard(cursor):
+                conn.rollback()
+                return False
+
+            for winner_id, loser_id, battle in results:
+                cursor.execute("""
+                    UPDATE meals
+                    SET battles = battles + 1, wins = wins + (id = ?)
+                    WHERE id IN (?, ?) AND deleted = FALSE
+                """, (winner_id, winner_id, loser_id))
+
+                if cursor.rowcount != 2:
+                    conn.rollback()
+                    _raise_for_missing_meals(cursor, [winner_id, loser_id])
+
+                apply_ratings(cursor, [(winner_id, loser_id)])
+                if battle is not None:
+                    _insert_battles(cursor, [battle])
+            conn.commit()
+            _bump_data_version()
+            for winner_id, loser_id, _ in results:
+                logger.info("Recorded battle result: %s beat %s", winner_id, loser_id)
+            return True
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def write_stats_deltas(deltas: dict[int, Any], battles: Iterable[BattleRecord] = ()) -> int:
+    """
+    Adds buffered battle and win counts to many meals in a single transaction.
+
+    Unlike update_meal_stats_bulk this does not fail on meals that have been deleted since the
+    results were buffered, their deltas are dropped so the rest of the batch still lands.
+    The battles themselves did happen, so they are always added to the history, and replayed
+    in order to update the Elo ratings.
+
+    Args:
+        deltas (dict[int, Any]): The (battles, wins) to add, keyed by meal ID.
+        battles (Iterable[BattleRecord]): The buffered battles to append to the history.
+
+    Returns:
+        int: The number of meals updated.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE meals SET battles = battles + ?, wins = wins + ? WHERE id = ? AND deleted = FALSE",
+                [(battle_count, wins, meal_id) for meal_id, (battle_count, wins) in deltas.items()]
+            )
+            updated = cursor.rowcount
+            battles = list(battles)
+            apply_ratings(cursor, [(battle.winner_id, battle.loser_id) for battle in battles])
+            _insert_battles(cursor, battles)
+            conn.commit()
+            _bump_data_version()
+
+        if updated != len(deltas):
+            logger.warning("Dropped buffered stats for %d deleted or missing meals", len(deltas) - updated)
+        logger.info("Wrote buffered stats for %d meals", updated)
+        return updated
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
-        raise e
\ No newline at end of file
+        raise e
+
+
+stats_buffer: Optional[WriteBehindBuffer] = None
+if BATTLE_STATS_WRITE_BEHIND:
+    stats_buffer = WriteBehindBuffer(write_stats_deltas, width=2, interval_ms=BATTLE_STATS_FLUSH_MS,
+                                     max_pending=BATTLE_STATS_FLUSH_MAX, max_buffered=BATTLE_STATS_BUFFER_MAX)
+    atexit.register(stats_buffer.stop)
+    os.register_at_fork(after_in_child=stats_buffer.reset_after_fork)
+
+
+def flush_battle_stats() -> int:
+    """
+    Writes every battle result still held by the write-behind buffer.
+
+    Returns:
+        int: The number of results flushed, 0 when write-behind mode is off.
+
+    Raises:
+        sqlite3.Error: If any database error occurs. The results stay buffered.
+    """
+    if stats_buffer is None:
+        return 0
+    return stats_buffer.flush()
+
+
+def get_meals_by_ids(meal_ids: list[int]) -> list[Meal]:
+    """
+    Retrieves several meals from the catalog with a single query (per 500 IDs).
+
+    Args:
+        meal_ids (list[int]): The IDs of the meals to retrieve.
+
+    Returns:
+        list[Meal]: The Meal objects, in the same order as meal_ids.
+
+    Raises:
+        ValueError: If any meal is not found or is marked as deleted.
+        sqlite3.Error: If any database error occurs.
+    """
+    if not meal_ids:
+        return []
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            rows = {}
+            # Older SQLite builds cap a statement at 999 bound parameters
+            for start in range(0, len(meal_ids), 500):
+                batch = list(meal_ids[start:start + 500])
+                placeholders = ", ".join("?" * len(batch))
+                cursor.execute(f"SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id IN ({placeholders})", batch)
+                rows.update((row[0], row) for row in cursor.fetchall())
+
+        meals = []
+        for meal_id in meal_ids:
+            row = rows.get(meal_id)
+            if not row:
+                logger.info("Meal with ID %s not found", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} not found")
+            if row[5]:
+                logger.info("Meal with ID %s has been deleted", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} has been deleted")
+            meals.append(Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4]))
+        return meals
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def update_meal_stats_bulk(results: Iterable[tuple[int, str]], battles: Iterable[BattleRecord] = ()) -> None:
+    """
+    Applies many battle results in a single transaction.
+
+    Results for the same meal are summed first, so each meal is updated once. Elo ratings
+    only move for the given battles, since results alone do not say who beat whom.
+
+    Args:
+        results (Iterable[tuple[int, str]]): (meal_id, result) pairs, where result is 'win' or 'loss'.
+        battles (Iterable[BattleRecord]): The battles to append to the history in the same transaction.
+
+    Raises:
+        ValueError: If a result is invalid, or a meal does not exist or is marked as deleted.
+            Nothing is written in that case.
+        sqlite3.Error: If any database error occurs.
+    """
+    totals: dict[int, list[int]] = {}
+    for meal_id, result in results:
+        if result not in ('win', 'loss'):
+            raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
+        battles_wins = totals.setdefault(meal_id, [0, 0])
+        battles_wins[0] += 1
+        if result == 'win':
+            battles_wins[1] += 1
+
+    if not totals:
+        return
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE meals SET battles = battles + ?, wins = wins + ? WHERE id = ? AND deleted = FALSE",
+                [(battle_count, wins, meal_id) for meal_id, (battle_count, wins) in totals.items()]
+            )
+
+            if cursor.rowcount != len(totals):
+                conn.rollback()
+                _raise_for_missing_meals(cursor, list(totals))
+
+            battles = list(battles)
+            apply_ratings(cursor, [(battle.winner_id, battle.loser_id) for battle in battles])
+            _insert_battles(cursor, battles)
+            conn.commit()
+            _bump_data_version()
+            logger.info("Updated stats for %d meals", len(totals))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_battle_catalog() -> list[tuple]:
+    """
+    Retrieves the fields that decide battles for every meal that is not deleted.
+
+    Returns:
+        list[tuple]: (id, meal, price, cuisine length, difficulty) rows ordered by ID.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, meal, price, length(cuisine), difficulty
+                FROM meals
+                WHERE deleted = FALSE
+                ORDER BY id
+            """)
+            rows = cursor.fetchall()
+
+        logger.info("Retrieved battle catalog of %d meals", len(rows))
+        return rows
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+##################################################
+# Battle History Functions
+##################################################
+
+BATTLE_COLUMNS = "id, meal_1_id, meal_2_id, score_1, score_2, delta, random_number, winner_id, created_at"
+
+
+def _battle_to_dict(row: tuple) -> dict[str, Any]:
+    return {
+        'id': row[0],
+        'meal_1_id': row[1],
+        'meal_2_id': row[2],
+        'score_1': row[3],
+        'score_2': row[4],
+        'delta': row[5],
+        'random_number': row[6],
+        'winner_id': row[7],
+        'created_at': row[8],
+    }
+
+
+def _validate_page(limit: int, before_id: Optional[int]) -> int:
+    if limit < 1:
+        raise ValueError(f"Invalid limit: {limit}. Must be at least 1.")
+    # Battle IDs are positive, so this cursor starts from the newest battle
+    return before_id if before_id is not None else 2 ** 63 - 1
+
+
+def get_battle_history(meal_id: int, limit: int = 100, before_id: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Retrieves the battles a meal fought, newest first.
+
+    Each side of the meal is read with its own index seek and the two pages are merged, so a
+    page costs O(limit log n) however many battles are stored.
+
+    Args:
+        meal_id (int): The ID of the meal.
+        limit (int): The maximum number of battles to return.
+        before_id (Optional[int]): Keyset pagination cursor, the ID of the last battle on the previous page.
+
+    Returns:
+        list[dict[str, Any]]: The battles, newest first.
+
+    Raises:
+        ValueError: If the limit is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    before_id = _validate_page(limit, before_id)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT {BATTLE_COLUMNS} FROM battles
+                    WHERE meal_1_id = ? AND id < ? ORDER BY id DESC LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT {BATTLE_COLUMNS} FROM battles
+                    WHERE meal_2_id = ? AND id < ? ORDER BY id DESC LIMIT ?
+                )
+                ORDER BY id DESC
+                LIMIT ?
+            """, (meal_id, before_id, limit, meal_id, before_id, limit, limit))
+            rows = cursor.fetchall()
+
+        logger.info("Retrieved %d battles for meal %s", len(rows), meal_id)
+        return [_battle_to_dict(row) for row in rows]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_head_to_head(meal_a: int, meal_b: int, limit: int = 100, before_id: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Retrieves the battles between two meals, newest first, whichever of them was combatant 1.
+
+    Args:
+        meal_a (int): The ID of one meal.
+        meal_b (int): The ID of the other meal.
+        limit (int): The maximum number of battles to return.
+        before_id (Optional[int]): Keyset pagination cursor, the ID of the last battle on the previous page.
+
+    Returns:
+        list[dict[str, Any]]: The battles, newest first.
+
+    Raises:
+        ValueError: If the limit is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    before_id = _validate_page(limit, before_id)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {BATTLE_COLUMNS} FROM battles
+                WHERE pair_low = ? AND pair_high = ? AND id < ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (min(meal_a, meal_b), max(meal_a, meal_b), before_id, limit))
+            rows = cursor.fetchall()
+
+        logger.info("Retrieved %d battles between meals %s and %s", len(rows), meal_a, meal_b)
+        return [_battle_to_dict(row) for row in rows]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_head_to_head_summary(meal_a: int, meal_b: int) -> dict[str, int]:
+    """
+    Counts how often each of two meals beat the other, from the covering pair index alone.
+
+    Args:
+        meal_a (int): The ID of one meal.
+        meal_b (int): The ID of the other meal.
+
+    Returns:
+        dict[str, int]: The number of battles and the wins of each meal.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT winner_id, COUNT(*) FROM battles
+                WHERE pair_low = ? AND pair_high = ?
+                GROUP BY winner_id
+            """, (min(meal_a, meal_b), max(meal_a, meal_b)))
+            wins = dict(cursor.fetchall())
+
+        return {
+            'battles': sum(wins.values()),
+            'a_wins': wins.get(meal_a, 0),
+            'b_wins': wins.get(meal_b, 0),
+        }
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
@@ -0,0 +1,141 @@
+import argparse
+import logging
+import os
+import sqlite3
+from typing import Any, Iterable
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rating of a meal that has not battled yet, must match the column default in sql/migrations/0004_meal_ratings.sql
+RATING_INITIAL = 1500.0
+# The most rating points a single battle can move
+RATING_K_FACTOR = float(os.getenv("RATING_K_FACTOR", "32"))
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """
+    Calculates the chance of a meal beating an opponent under the Elo model.
+
+    Args:
+        rating (float): The rating of the meal.
+        opponent_rating (float): The rating of its opponent.
+
+    Returns:
+        float: The expected score, between 0 and 1.
+    """
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def update_elo(winner_rating: float, loser_rating: float, k: float = RATING_K_FACTOR) -> tuple[float, float]:
+    """
+    Calculates the new ratings of both meals after a battle.
+
+    Args:
+        winner_rating (float): The rating of the meal that won.
+        loser_rating (float): The rating of the meal that lost.
+        k (float): The K-factor.
+
+    Returns:
+        tuple[float, float]: The new winner and loser ratings.
+    """
+    change = k * (1 - expected_score(winner_rating, loser_rating))
+    return winner_rating + change, loser_rating - change
+
+
+def apply_ratings(cursor: sqlite3.Cursor, results: Iterable[tuple[int, int]]) -> None:
+    """
+    Applies the Elo updates of some battles, in order, inside the caller's transaction.
+
+    The caller must already hold the write lock, for example by having updated the battle
+    counters first, so no other writer can change the ratings between the read and the write.
+    Meals that are marked as deleted keep their rating.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor of the open transaction.
+        results (Iterable[tuple[int, int]]): (winner_id, loser_id) pairs in the order the battles were fought.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    results = list(results)
+    meal_ids = list({meal_id for result in results for meal_id in result})
+    ratings = {}
+    for start in range(0, len(meal_ids), 500):
+        batch = meal_ids[start:start + 500]
+        placeholders = ", ".join("?" * len(batch))
+        cursor.execute(f"SELECT id, rating FROM meals WHERE id IN ({placeholders})", batch)
+        ratings.update(cursor.fetchall())
+
+    for winner_id, loser_id in results:
+        if winner_id in ratings and loser_id in ratings:
+            ratings[winner_id], ratings[loser_id] = update_elo(ratings[winner_id], ratings[loser_id])
+
+    cursor.executemany(
+        "UPDATE meals SET rating = ? WHERE id = ? AND deleted = FALSE",
+        [(rating, meal_id) for meal_id, rating in ratings.items()]
+    )
+
+
+def recompute_ratings(batch_size: int = 10000) -> dict[str, Any]:
+    """
+    Rebuilds every rating from the battle history in one streaming pass.
+
+    Battles are read in the order they were fought, batch_size rows at a time, so memory is
+    bounded by the number of meals rather than the number of battles. The whole rebuild is one
+    write transaction, so new battles wait for it instead of being lost.
+
+    Args:
+        batch_size (int): The number of battles fetched per round trip.
+
+    Returns:
+        dict[str, Any]: The number of battles replayed and meals rated.
+
+    Raises:
+        ValueError: If the batch size is not positive.
+        sqlite3.Error: If any database error occurs.
+    """
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size: {batch_size}. Must be at least 1.")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+
+            ratings: dict[int, float] = {}
+            replayed = 0
+            cursor.execute("SELECT meal_1_id, meal_2_id, winner_id FROM battles ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for meal_1_id, meal_2_id, winner_id in rows:
+                    loser_id = meal_2_id if winner_id == meal_1_id else meal_1_id
+                    ratings[winner_id], ratings[loser_id] = update_elo(
+                        ratings.get(winner_id, RATING_INITIAL), ratings.get(loser_id, RATING_INITIAL)
+                    )
+                replayed += len(rows)
+
+            cursor.execute("UPDATE meals SET rating = ?", (RATING_INITIAL,))
+            cursor.executemany("UPDATE meals SET rating = ? WHERE id = ?", [(rating, meal_id) for meal_id, rating in ratings.items()])
+            conn.commit()
+
+        logger.info("Recomputed ratings for %d meals from %d battles", len(ratings), replayed)
+        return {'battles': replayed, 'meals': len(ratings)}
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild every meal rating from the battle history.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="battles fetched per round trip")
+    args = parser.parse_args()
+    print(recompute_ratings(batch_size=args.batch_size))
@@ -0,0 +1,199 @@
+import logging
+import os
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+from meal_max.models.battle_model import DIFFICULTY_MODIFIER
+from meal_max.models.kitchen_model import get_battle_catalog
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Largest catalog subset for which the full matrix is returned instead of a summary
+MAX_MATRIX_MEALS = 1000
+
+# A simulation runs inside a request, so both its size and its precision are bounded. The
+# summary costs O(n^2) in the catalog size, and draws past the cap only shrink an error that
+# is already below 0.5%.
+SIMULATION_MAX_DRAWS = int(os.getenv("SIMULATION_MAX_DRAWS", "100000"))
+SIMULATION_MAX_CATALOG_MEALS = int(os.getenv("SIMULATION_MAX_CATALOG_MEALS", "5000"))
+
+# The random numbers battles are decided with: two decimal places, from 0.00 to 0.99
+RANDOM_DRAW_VALUES = np.arange(100) / 100
+
+
+def get_battle_scores(prices: np.ndarray, cuisine_lengths: np.ndarray, difficulties: list[str]) -> np.ndarray:
+    """
+    Vectorized version of BattleModel.get_battle_score.
+
+    Args:
+        prices (np.ndarray): The price of each meal.
+        cuisine_lengths (np.ndarray): The length of each meal's cuisine name.
+        difficulties (list[str]): The difficulty of each meal.
+
+    Returns:
+        np.ndarray: The battle score of each meal.
+    """
+    modifiers = np.fromiter((DIFFICULTY_MODIFIER[difficulty] for difficulty in difficulties), dtype=np.float64, count=len(difficulties))
+    return prices * cuisine_lengths - modifiers
+
+
+def load_catalog() -> dict[str, Any]:
+    """
+    Loads every meal that is not deleted into NumPy arrays.
+
+    Returns:
+        dict[str, Any]: The meal ids, names and battle scores, aligned by position.
+    """
+    rows = get_battle_catalog()
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    prices = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    cuisine_lengths = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    scores = get_battle_scores(prices, cuisine_lengths, [row[4] for row in rows])
+    return {'ids': ids, 'names': [row[1] for row in rows], 'scores': scores}
+
+
+def get_win_probabilities(delta: np.ndarray) -> np.ndarray:
+    """
+    Returns the exact chance that combatant 1 wins at each delta.
+
+    Combatant 1 wins when delta is greater than the random number, which takes one of the 100
+    values 0.00 to 0.99, so the chance is ceil(delta * 100) / 100, capped at 1. It is counted
+    against the same floats battle() compares with, so rounding in delta cannot move it.
+
+    Args:
+        delta (np.ndarray): The score deltas, |score_1 - score_2| / 100.
+
+    Returns:
+        np.ndarray: The chance that combatant 1 wins, for each delta.
+    """
+    return np.searchsorted(RANDOM_DRAW_VALUES, delta, side='left') / len(RANDOM_DRAW_VALUES)
+
+
+def iter_win_probability_blocks(scores: np.ndarray, draws: int, rng: np.random.Generator,
+                                block_size: int = 1024) -> Iterator[tuple[int, int, np.ndarray]]:
+    """
+    Estimates, block by block, how often meal i beats meal j when i is combatant 1.
+
+    As in BattleModel.battle, combatant 1 wins when |score_i - score_j| / 100 is greater than a
+    random number, so each of the draws per pair is a Bernoulli trial with the p given by
+    get_win_probabilities.
+    The number of wins over all draws is sampled directly from the equivalent binomial
+    distribution, so the cost per pair does not grow with draws. Only one block of
+    block_size x block_size pairs is held in memory at a time.
+
+    Args:
+        scores (np.ndarray): The battle score of each meal.
+        draws (int): The number of simulated battles per pair.
+        rng (np.random.Generator): The seeded generator to draw from.
+        block_size (int): The number of rows and columns per block.
+
+    Yields:
+        tuple[int, int, np.ndarray]: The first row, the first column, and the block of estimated
+            win probabilities. Pairs of a meal with itself are NaN.
+    """
+    n = len(scores)
+    for row_start in range(0, n, block_size):
+        row_scores = scores[row_start:row_start + block_size]
+        for col_start in range(0, n, block_size):
+            col_scores = scores[col_start:col_start + block_size]
+
+            delta = np.abs(row_scores[:, None] - col_scores[None, :]) / 100
+            wins = rng.binomial(draws, get_win_probabilities(delta))
+            block = wins / draws
+
+            # A meal never battles itself
+            overlap_start = max(row_start, col_start)
+            overlap_end = min(row_start + len(row_scores), col_start + len(col_scores))
+            for k in range(overlap_start, overlap_end):
+                block[k - row_start, k - col_start] = np.nan
+
+            yield row_start, col_start, block
+
+
+def simulate_win_probabilities(meal_ids: Optional[list[int]] = None, draws: int = 1000,
+                               seed: Optional[int] = None, block_size: int = 1024) -> dict[str, Any]:
+    """
+    Estimates the chance of every meal beating every other meal without running real battles.
+
+    With meal_ids, the full pairwise matrix for those meals is returned. Without, the whole
+    catalog is simulated and summarized per meal, so memory stays bounded by the block size
+    rather than the square of the catalog size. Runs are bounded by SIMULATION_MAX_DRAWS and,
+    for the summary, SIMULATION_MAX_CATALOG_MEALS.
+
+    Args:
+        meal_ids (Optional[list[int]]): The meals to build the matrix for, or None for the whole catalog.
+        draws (int): The number of simulated battles per pair, at most SIMULATION_MAX_DRAWS.
+        seed (Optional[int]): The seed for the random generator, for reproducible results.
+        block_size (int): The number of rows and columns simulated at once.
+
+    Returns:
+        dict[str, Any]: With meal_ids, the meals and the matrix where matrix[i][j] is the chance
+            that meal i beats meal j as combatant 1 (None on the diagonal). Without, the meals
+            with their average chance of winning as combatant 1 and as combatant 2.
+
+    Raises:
+        ValueError: If draws is out of range or block_size is not positive, too many meals are
+            requested or in the catalog, or a requested meal is not found or is marked as deleted.
+    """
+    if not 1 <= draws <= SIMULATION_MAX_DRAWS:
+        raise ValueError(f"Invalid number of draws: {draws}. Must be between 1 and {SIMULATION_MAX_DRAWS}.")
+    if block_size < 1:
+        raise ValueError(f"Invalid block size: {block_size}. Must be at least 1.")
+
+    catalog = load_catalog()
+    ids, names, scores = catalog['ids'], catalog['names'], catalog['scores']
+    rng = np.random.default_rng(seed)
+
+    if meal_ids is not None:
+        if len(meal_ids) > MAX_MATRIX_MEALS:
+            raise ValueError(f"Too many meals for a matrix: {len(meal_ids)}. At most {MAX_MATRIX_MEALS} are allowed.")
+        positions = np.searchsorted(ids, meal_ids)
+        for meal_id, position in zip(meal_ids, positions):
+            if position >= len(ids) or ids[position] != meal_id:
+                logger.info("Meal with ID %s not found", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} not found")
+
+        matrix = np.empty((len(meal_ids), len(meal_ids)))
+        for row_start, col_start, block in iter_win_probability_blocks(scores[positions], draws, rng, block_size):
+            matrix[row_start:row_start + block.shape[0], col_start:col_start + block.shape[1]] = block
+
+        logger.info("Simulated win probability matrix for %d meals with %d draws", len(meal_ids), draws)
+        return {
+            'meals': [{'id': int(ids[p]), 'meal': names[p], 'score': float(scores[p])} for p in positions],
+            'matrix': [[None if np.isnan(p) else float(p) for p in row] for row in matrix],
+            'draws': draws,
+        }
+
+    n = len(ids)
+    if n > SIMULATION_MAX_CATALOG_MEALS:
+        logger.error("Catalog of %d meals is too large to simulate", n)
+        raise ValueError(f"Catalog too large to simulate: {n} meals. At most {SIMULATION_MAX_CATALOG_MEALS} are allowed, "
+                         f"pass meal_ids to simulate a subset.")
+
+    first_totals = np.zeros(n)
+    second_totals = np.zeros(n)
+    for row_start, col_start, block in iter_win_probability_blocks(scores, draws, rng, block_size):
+        first_totals[row_start:row_start + block.shape[0]] += np.nansum(block, axis=1)
+        # Meal j as combatant 2 wins whenever combatant 1 loses
+        second_totals[col_start:col_start + block.shape[1]] += np.nansum(1 - block, axis=0)
+
+    opponents = max(n - 1, 1)
+    logger.info("Simulated win probabilities for a catalog of %d meals with %d draws", n, draws)
+    return {
+        'meals': [
+            {
+                'id': int(ids[i]),
+                'meal': names[i],
+                'score': float(scores[i]),
+                'win_prob_as_combatant_1': float(first_totals[i] / opponents),
+                'win_prob_as_combatant_2': float(second_totals[i] / opponents),
+            }
+            for i in range(n)
+        ],
+        'draws': draws,
+    }
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+# Returned by TTLCache.get when a key is not cached
+MISSING = object()
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries also expire after a time to live.
+
+    Attributes:
+        max_size (int): The maximum number of entries before the least recently used is evicted.
+        ttl (float): The default time to live of an entry, in seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        if max_size < 1:
+            raise ValueError(f"Invalid cache size: {max_size}. Must be at least 1.")
+        if ttl <= 0:
+            raise ValueError(f"Invalid cache TTL: {ttl}. Must be positive.")
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Looks up a key, refreshing its LRU position.
+
+        Args:
+            key (Hashable): The key to look up.
+
+        Returns:
+            Any: The cached value, or MISSING if the key is not cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return MISSING
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expired += 1
+                self._misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Caches a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (Hashable): The key to cache the value under.
+            value (Any): The value to cache.
+            ttl (Optional[float]): The time to live in seconds, defaults to the cache TTL.
+        """
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], touch: bool = False) -> Any:
+        """
+        Looks up a key, atomically caching factory() under it if it is not cached.
+
+        Args:
+            key (Hashable): The key to look up.
+            factory (Callable[[], Any]): Creates the value on a miss. Called with the cache lock held.
+            touch (bool): Whether a hit also restarts the time to live, so only idle entries expire.
+
+        Returns:
+            Any: The cached or newly created value.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                if touch:
+                    self._entries[key] = (entry[0], now + self.ttl)
+                self._hits += 1
+                return entry[0]
+
+            if entry is not None:
+                self._expired += 1
+            self._misses += 1
+            value = factory()
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        Drops the given keys from the cache, if present.
+
+        Args:
+            keys (Hashable): The keys to drop.
+        """
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, MISSING) is not MISSING:
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Drops every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the cache size and hit/miss counters.
+
+        Returns:
+            dict[str, Any]: The cache counters.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
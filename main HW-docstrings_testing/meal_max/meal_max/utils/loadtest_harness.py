@@ -0,0 +1,289 @@
+"""
+Harness for the concurrent HTTP load generator of the meal_max service, loadtest.py.
+
+Unlike smoketest.sh, which checks each route once, a load test replays a weighted mix of real
+routes from many threads for a fixed time and reports throughput, latency percentiles and
+error rates per route. This module holds the workers, the recording and the command line;
+loadtest.py only defines the scenario, an object with:
+
+    service (str): The name of the service, for the report.
+    weights (dict[str, int]): The relative frequency of each task.
+    tasks (dict[str, Callable[[Client, dict, random.Random], None]]): Each task by name.
+    setup(base_url): Seeds the service before the run.
+    start_worker(worker_id) -> dict: The state handed to each of a worker's tasks.
+
+The JSON report goes to --report, or to stdout. With --max-error-rate the exit status is 1
+when the overall error rate is higher, so the tool can gate a deployment.
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import requests
+
+
+DEFAULT_BASE_URL = "http://localhost:5000/api"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 30.0
+DEFAULT_TIMEOUT = 10.0
+
+
+####################################################
+#
+# Load Generator
+#
+####################################################
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of sorted samples, or 0.0 if there are none.
+
+    Args:
+        samples (list[float]): The samples, sorted ascending.
+        fraction (float): The percentile as a fraction, for example 0.95.
+
+    Returns:
+        float: The sample at that rank.
+    """
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    """
+    Summarizes the requests made to one route, or to all of them.
+
+    Args:
+        latencies (list[float]): The latency of every request, in seconds.
+        errors (int): How many of the requests failed.
+        elapsed (float): The length of the run, in seconds.
+
+    Returns:
+        dict[str, Any]: The request and error counts, throughput and latency percentiles in milliseconds.
+    """
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / count * 1000, 2) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if count else 0.0,
+    }
+
+
+class Recorder:
+    """
+    Collects the outcome of every request, by route, from all worker threads.
+    """
+
+    def __init__(self):
+        self._latencies: dict[str, list[float]] = defaultdict(list)
+        self._errors: dict[str, int] = defaultdict(int)
+        self._statuses: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def record(self, route: str, latency: float, status: Optional[int]) -> None:
+        """
+        Records one request. Transport failures and 4xx/5xx responses count as errors.
+
+        Args:
+            route (str): The route template, for example "GET /leaderboard".
+            latency (float): How long the request took, in seconds.
+            status (Optional[int]): The response status, or None if no response arrived.
+        """
+        with self._lock:
+            self._latencies[route].append(latency)
+            self._statuses[route][str(status) if status is not None else 'failed'] += 1
+            if status is None or status >= 400:
+                self._errors[route] += 1
+            self.total += 1
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        """
+        Summarizes everything recorded so far, overall and per route.
+
+        Args:
+            elapsed (float): The length of the run, in seconds.
+
+        Returns:
+            dict[str, Any]: The totals and the per-route summaries with status counts.
+        """
+        with self._lock:
+            routes = {}
+            for route in sorted(self._latencies):
+                routes[route] = summarize(self._latencies[route], self._errors[route], elapsed)
+                routes[route]['statuses'] = dict(self._statuses[route])
+            all_latencies = [latency for latencies in self._latencies.values() for latency in latencies]
+            totals = summarize(all_latencies, sum(self._errors.values()), elapsed)
+        return {'totals': totals, 'routes': routes}
+
+
+class Client:
+    """
+    One worker's keep-alive HTTP session, recording every request under its route template.
+
+    Attributes:
+        base_url (str): The API root, for example "http://localhost:5000/api".
+        timeout (float): The request timeout in seconds.
+    """
+
+    def __init__(self, base_url: str, recorder: Recorder, timeout: float = DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._recorder = recorder
+
+    def request(self, route: str, method: str, path: str, **kwargs: Any) -> Optional[requests.Response]:
+        """
+        Sends a request and records its latency and status.
+
+        Args:
+            route (str): The name to report the request under.
+            method (str): The HTTP method.
+            path (str): The path below the API root.
+            **kwargs: Passed on to requests, for example json or params.
+
+        Returns:
+            Optional[requests.Response]: The response, or None if the request failed in transit.
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            self._recorder.record(route, time.perf_counter() - start, None)
+            return None
+        self._recorder.record(route, time.perf_counter() - start, response.status_code)
+        return response
+
+
+def run_load(scenario: Any, base_url: str, concurrency: int = DEFAULT_CONCURRENCY, duration: float = DEFAULT_DURATION,
+             max_requests: Optional[int] = None, seed: int = 0, timeout: float = DEFAULT_TIMEOUT) -> dict[str, Any]:
+    """
+    Seeds the service, then replays the scenario's weighted task mix from many threads.
+
+    Args:
+        scenario (Any): Provides setup(base_url), start_worker(worker_id) and the weighted tasks.
+        base_url (str): The API root of the running service.
+        concurrency (int): The number of worker threads, each with its own connection.
+        duration (float): How long to run, in seconds.
+        max_requests (Optional[int]): Stop early after this many requests.
+        seed (int): Seeds each worker's task and data choices.
+        timeout (float): The request timeout in seconds.
+
+    Returns:
+        dict[str, Any]: The run settings, totals and per-route results.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Invalid concurrency: {concurrency}. Must be at least 1.")
+    if duration <= 0:
+        raise ValueError(f"Invalid duration: {duration}. Must be positive.")
+
+    scenario.setup(base_url)
+
+    recorder = Recorder()
+    stop = threading.Event()
+    names = list(scenario.weights)
+    weights = [scenario.weights[name] for name in names]
+
+    def worker(worker_id: int) -> None:
+        client = Client(base_url, recorder, timeout)
+        rng = random.Random(seed * 1000003 + worker_id)
+        state = scenario.start_worker(worker_id)
+        while not stop.is_set():
+            task = rng.choices(names, weights)[0]
+            scenario.tasks[task](client, state, rng)
+            if max_requests is not None and recorder.total >= max_requests:
+                stop.set()
+
+    started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    threads = [threading.Thread(target=worker, args=(worker_id,), daemon=True) for worker_id in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'service': scenario.service,
+        'base_url': base_url,
+        'started_at': started_at,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'seed': seed,
+        'mix': dict(scenario.weights),
+        **recorder.report(elapsed),
+    }
+
+
+def print_summary(report: dict[str, Any]) -> None:
+    """
+    Prints a per-route table of the report to stderr.
+
+    Args:
+        report (dict[str, Any]): The report returned by run_load.
+    """
+    line = "%-48s %8s %9s %8s %9s %9s %9s"
+    print(line % ("route", "requests", "rps", "errors", "p50 ms", "p95 ms", "p99 ms"), file=sys.stderr)
+    for route, stats in list(report['routes'].items()) + [("TOTAL", report['totals'])]:
+        print(line % (route, stats['requests'], stats['throughput_rps'], "%.2f%%" % (stats['error_rate'] * 100),
+                      stats['p50_ms'], stats['p95_ms'], stats['p99_ms']), file=sys.stderr)
+
+
+def run_cli(description: str, add_arguments: Callable[[argparse.ArgumentParser], None],
+            make_scenario: Callable[[argparse.Namespace], Any], argv: Optional[list[str]] = None) -> int:
+    """
+    Runs a scenario from the command line, prints the summary and writes the JSON report.
+
+    Args:
+        description (str): The help text of the command.
+        add_arguments (Callable[[argparse.ArgumentParser], None]): Adds the scenario's own options.
+        make_scenario (Callable[[argparse.Namespace], Any]): Builds the scenario from the parsed options.
+        argv (Optional[list[str]]): The arguments, or None for sys.argv.
+
+    Returns:
+        int: The exit status, 1 if the error rate is above --max-error-rate, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="API root of the service")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="number of concurrent workers")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="how long to run, in seconds")
+    parser.add_argument("--max-requests", type=int, help="stop after this many requests")
+    add_arguments(parser)
+    parser.add_argument("--seed", type=int, default=0, help="seed for the task and data choices")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="request timeout in seconds")
+    parser.add_argument("--report", help="write the JSON report here instead of stdout")
+    parser.add_argument("--max-error-rate", type=float, help="exit with status 1 if the error rate is higher")
+    args = parser.parse_args(argv)
+
+    report = run_load(make_scenario(args), args.base_url, args.concurrency, args.duration,
+                      args.max_requests, args.seed, args.timeout)
+    print_summary(report)
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.max_error_rate is not None and report['totals']['error_rate'] > args.max_error_rate:
+        return 1
+    return 0
@@ -0,0 +1,167 @@
+"""
+Numbered schema migrations, tracked by PRAGMA user_version.
+
+Every file in MIGRATIONS_DIR named NNNN_description.sql is one migration, and the database's
+user_version is the number of the last one applied. Each pending migration runs in its own
+BEGIN IMMEDIATE transaction together with the user_version bump, so a failed migration leaves
+nothing behind and processes migrating the same database at once apply each migration exactly
+once. When nothing is pending, migrate only reads user_version.
+
+Apply the pending migrations from the meal_max directory with:
+
+    python -m meal_max.utils.migrations --db /app/sql/meal_max.db
+"""
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+from typing import Optional
+
+from meal_max.utils import sql_utils
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+MIGRATIONS_DIR = os.getenv(
+    "MIGRATIONS_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "sql", "migrations"))
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_\w+\.sql$")
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> list[tuple[int, str]]:
+    """
+    Lists the migrations in a directory in the order they apply.
+
+    Args:
+        directory (str): The directory holding the NNNN_description.sql files.
+
+    Returns:
+        list[tuple[int, str]]: The number and path of every migration, numbered 1, 2, 3 and so on.
+
+    Raises:
+        ValueError: If the numbers do not run from 1 without gaps or duplicates.
+    """
+    migrations = []
+    for name in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(name)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(directory, name)))
+    migrations.sort()
+
+    for expected, (number, path) in enumerate(migrations, start=1):
+        if number != expected:
+            raise ValueError(f"Invalid migration {os.path.basename(path)}: expected number {expected}.")
+    return migrations
+
+
+def split_statements(script: str) -> list[str]:
+    """
+    Splits an SQL script into complete statements, keeping trigger bodies in one piece.
+
+    Args:
+        script (str): The SQL script.
+
+    Returns:
+        list[str]: The statements in the order they appear.
+
+    Raises:
+        ValueError: If the script ends in an incomplete statement.
+    """
+    statements = []
+    current = ""
+    for line in script.splitlines(keepends=True):
+        if not current and (not line.strip() or line.lstrip().startswith("--")):
+            continue
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    if current.strip():
+        raise ValueError(f"Incomplete SQL statement: {current.strip()[:80]}")
+    return statements
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Returns the number of the last migration applied to a database.
+
+    Args:
+        conn (sqlite3.Connection): A connection to the database.
+
+    Returns:
+        int: The database's user_version, 0 for a database that was never migrated.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path: Optional[str] = None, directory: str = MIGRATIONS_DIR) -> int:
+    """
+    Applies the migrations a database has not seen yet, in order.
+
+    Args:
+        db_path (Optional[str]): The database to migrate. Defaults to sql_utils.DB_PATH.
+        directory (str): The directory holding the migrations.
+
+    Returns:
+        int: The schema version of the database afterwards.
+
+    Raises:
+        sqlite3.Error: If a migration fails. Earlier migrations stay applied.
+        ValueError: If the migrations are misnumbered or a script is incomplete.
+    """
+    db_path = db_path or sql_utils.DB_PATH
+    migrations = load_migrations(directory)
+    latest = migrations[-1][0] if migrations else 0
+
+    # Autocommit mode, so the transactions below are exactly the ones we begin
+    conn = sqlite3.connect(db_path, timeout=sql_utils.DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    try:
+        version = get_schema_version(conn)
+        if version > latest:
+            logger.warning("Database %s is at schema version %d, newer than the latest migration %d",
+                           db_path, version, latest)
+            return version
+
+        for number, path in migrations[version:]:
+            with open(path) as f:
+                statements = split_statements(f.read())
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have applied it while we waited for the write lock
+                if get_schema_version(conn) >= number:
+                    conn.execute("ROLLBACK")
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK")
+                logger.error("Database error in migration %s: %s", os.path.basename(path), str(e))
+                raise e
+            logger.info("Applied migration %s to %s", os.path.basename(path), db_path)
+
+        return get_schema_version(conn)
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply the pending schema migrations to the meal_max database.")
+    parser.add_argument("--db", default=None, help="the database file, defaults to DB_PATH")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="the directory holding the migrations")
+    args = parser.parse_args(argv)
+
+    version = migrate(args.db, args.dir)
+    print(f"Database {args.db or sql_utils.DB_PATH} is at schema version {version}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,49 +1,400 @@
+from collections import deque
 import logging
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Optional
+
 import requests
 
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("random_provider_request_seconds", "Time spent waiting on the random number provider.")
+metrics.describe("random_provider_failures_total", "Failed random number provider requests, by reason.")
 
-def get_random() -> float:
+
+# random.org serves at most this many numbers per request
+RANDOM_ORG_MAX_NUM = 10000
+
+# pool settings, overridable from the environment
+RANDOM_ORG_URL = os.getenv("RANDOM_ORG_URL", "https://www.random.org/decimal-fractions/")
+RANDOM_POOL_SIZE = int(os.getenv("RANDOM_POOL_SIZE", "1000"))
+RANDOM_POOL_LOW_WATER = int(os.getenv("RANDOM_POOL_LOW_WATER", "250"))
+RANDOM_POOL_FALLBACK = os.getenv("RANDOM_POOL_FALLBACK", "true").lower() == "true"
+# after a failed refill, an empty pool falls back for this many seconds instead of waiting on the provider
+RANDOM_POOL_RETRY_AFTER = float(os.getenv("RANDOM_POOL_RETRY_AFTER", "30"))
+
+
+class RandomOrgProvider:
     """
-    Makes a GET request to random.org to fetche a single random decimal number with two decimal places.
-    
-    Returns:
-        float: A random decimal number between 0 and 1, with two decimal places.
+    Fetches random decimal numbers with two decimal places from random.org, or any server
+    that speaks the same plain-text API, over a keep-alive session.
 
-    Raises:
-        RuntimeError: If the request times out or fails for other reasons.
-        ValueError: If the response from random.org cannot be parsed as a float.
+    Attributes:
+        url (str): The decimal-fractions endpoint to query.
+        timeout (float): The request timeout in seconds.
     """
-    
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
 
-    try:
-        # Log the request to random.org
-        logger.info("Fetching random number from %s", url)
+    def __init__(self, url: str = RANDOM_ORG_URL, timeout: float = 5, session: Optional[requests.Session] = None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
 
-        response = requests.get(url, timeout=5)
+    def __call__(self, num: int) -> list[float]:
+        """
+        Fetches num random numbers in a single request.
 
-        # Check if the request was successful
-        response.raise_for_status()
+        Args:
+            num (int): How many numbers to fetch, at most RANDOM_ORG_MAX_NUM.
 
-        random_number_str = response.text.strip()
+        Returns:
+            list[float]: num random decimal numbers between 0 and 1.
+
+        Raises:
+            RuntimeError: If the request times out or fails for other reasons.
+            ValueError: If the response cannot be parsed or has the wrong number of values.
+        """
+        params = {'num': num, 'dec': 2, 'col': 1, 'format': 'plain', 'rnd': 'new'}
 
         try:
-            random_number = float(random_number_str)
+            logger.info("Fetching %d random numbers from %s", num, self.url)
+
+            with metrics.timer("random_provider_request_seconds"):
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+
+            # Check if the request was successful
+            response.raise_for_status()
+
+            try:
+                numbers = [float(line) for line in response.text.split()]
+            except ValueError:
+                raise ValueError("Invalid response from random.org: %s" % response.text.strip())
+            if len(numbers) != num:
+                raise ValueError("Expected %d numbers from random.org, got %d" % (num, len(numbers)))
+
+            return numbers
+
+        except requests.exceptions.Timeout:
+            metrics.inc("random_provider_failures_total", (('reason', 'timeout'),))
+            logger.error("Request to random.org timed out.")
+            raise RuntimeError("Request to random.org timed out.")
+
+        except requests.exceptions.RequestException as e:
+            metrics.inc("random_provider_failures_total", (('reason', 'error'),))
+            logger.error("Request to random.org failed: %s", e)
+            raise RuntimeError("Request to random.org failed: %s" % e)
+
         except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
+            metrics.inc("random_provider_failures_total", (('reason', 'invalid'),))
+            raise
+
+
+def local_random() -> float:
+    """
+    Draws a random decimal number with two decimal places from the operating system CSPRNG.
+
+    Returns:
+        float: A random decimal number between 0 and 1, in the same format random.org returns.
+    """
+    return secrets.randbelow(100) / 100
+
+
+class RandomPool:
+    """
+    A pool of prefetched random numbers, refilled in bulk from a provider.
+
+    When the pool drops below the low-water mark a background thread refills it. An empty
+    pool, such as a new one after a worker starts, is refilled inline before it is drawn
+    from. If that refill fails, numbers come from the local CSPRNG when fallback is on, and
+    the pool does not wait on the provider again for RANDOM_POOL_RETRY_AFTER seconds.
+
+    Attributes:
+        provider (Callable[[int], list[float]]): Fetches the given number of random numbers.
+        capacity (int): The number of numbers the pool is filled up to.
+        low_water (int): The pool size that triggers a refill.
+        fallback (bool): Whether to fall back to the local CSPRNG instead of failing.
+        background (bool): Whether refills run on a background thread instead of inline.
+    """
+
+    def __init__(self, provider: Callable[[int], list[float]], capacity: int = RANDOM_POOL_SIZE,
+                 low_water: int = RANDOM_POOL_LOW_WATER, fallback: bool = RANDOM_POOL_FALLBACK,
+                 background: bool = True):
+        if capacity < 1:
+            raise ValueError(f"Invalid pool capacity: {capacity}. Must be at least 1.")
+        if not 0 <= low_water <= capacity:
+            raise ValueError(f"Invalid low-water mark: {low_water}. Must be between 0 and {capacity}.")
+
+        self.provider = provider
+        self.capacity = capacity
+        self.low_water = low_water
+        self.fallback = fallback
+        self.background = background
+
+        self._numbers: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
+        self._inline_refills = 0
+        self._retry_at = 0.0
+        self._refills = 0
+        self._refill_failures = 0
+        self._fetched = 0
+        self._last_refill_ms = 0.0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="random-pool-refill", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.refill()
+                backoff = 1.0
+            except (RuntimeError, ValueError):
+                # Give the provider time to recover before asking again
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                if len(self._numbers) < self.low_water:
+                    self._wake.set()
+
+    def refill(self) -> int:
+        """
+        Tops the pool up to capacity with a single request to the provider.
+
+        Returns:
+            int: The number of random numbers added.
+
+        Raises:
+            RuntimeError: If the provider request fails.
+            ValueError: If the provider response is invalid.
+        """
+        with self._refill_lock:
+            needed = min(self.capacity - len(self._numbers), RANDOM_ORG_MAX_NUM)
+            if needed <= 0:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                numbers = self.provider(needed)
+            except (RuntimeError, ValueError) as e:
+                with self._lock:
+                    self._refill_failures += 1
+                    self._retry_at = time.monotonic() + RANDOM_POOL_RETRY_AFTER
+                logger.error("Random pool refill failed: %s", e)
+                raise
+
+            with self._lock:
+                self._retry_at = 0.0
+                self._numbers.extend(numbers)
+                self._refills += 1
+                self._fetched += len(numbers)
+                self._last_refill_ms = (time.perf_counter() - start) * 1000
+
+            logger.info("Random pool refilled with %d numbers", len(numbers))
+            return len(numbers)
+
+    def _take(self, count: int, record: bool = True) -> list[float]:
+        with self._lock:
+            taken = [self._numbers.popleft() for _ in range(min(count, len(self._numbers)))]
+            if record:
+                self._hits += len(taken)
+                self._misses += count - len(taken)
+            low = len(self._numbers) < self.low_water or len(taken) < count
+        if low and self.background:
+            self._start()
+            self._wake.set()
+        return taken
+
+    def get(self) -> float:
+        """
+        Takes one random number from the pool.
+
+        Returns:
+            float: A random decimal number between 0 and 1, with two decimal places.
 
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        Raises:
+            RuntimeError: If the pool is empty, the provider fails and fallback is off.
+            ValueError: If the provider response is invalid and fallback is off.
+        """
+        return self.get_many(1)[0]
 
-    except requests.exceptions.Timeout:
-        logger.error("Request to random.org timed out.")
-        raise RuntimeError("Request to random.org timed out.")
+    def get_many(self, count: int) -> list[float]:
+        """
+        Takes count random numbers, from the pool first and then straight from the provider.
 
-    except requests.exceptions.RequestException as e:
-        logger.error("Request to random.org failed: %s", e)
-        raise RuntimeError("Request to random.org failed: %s" % e)
\ No newline at end of file
+        Args:
+            count (int): How many random numbers to take.
+
+        Returns:
+            list[float]: count random decimal numbers between 0 and 1.
+
+        Raises:
+            ValueError: If count is negative, or the provider response is invalid and fallback is off.
+            RuntimeError: If the provider fails and fallback is off.
+        """
+        if count < 0:
+            raise ValueError(f"Invalid count: {count}. Must be non-negative.")
+
+        numbers = self._take(count)
+        missing = count - len(numbers)
+        if missing == 0:
+            return numbers
+
+        if missing > self.capacity:
+            # Too many for the pool, fetch the rest straight from the provider
+            try:
+                while missing > 0:
+                    batch = self.provider(min(missing, RANDOM_ORG_MAX_NUM))
+                    numbers.extend(batch)
+                    missing -= len(batch)
+            except (RuntimeError, ValueError):
+                if not self.fallback:
+                    raise
+        elif not self.fallback or time.monotonic() >= self._retry_at:
+            # The pool is cold or drained, refill it inline rather than fall back straight away
+            with self._lock:
+                self._inline_refills += 1
+            try:
+                self.refill()
+                numbers.extend(self._take(missing, record=False))
+            except (RuntimeError, ValueError):
+                if not self.fallback:
+                    raise
+            missing = count - len(numbers)
+            if missing and not self.fallback:
+                raise RuntimeError("Random pool is empty")
+
+        missing = count - len(numbers)
+        if missing:
+            with self._lock:
+                self._fallbacks += missing
+            logger.warning("Random pool empty, drawing %d numbers from the local CSPRNG", missing)
+            numbers.extend(local_random() for _ in range(missing))
+        return numbers
+
+    def stop(self) -> None:
+        """
+        Stops the background refill thread.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the pool hit, miss and refill metrics.
+
+        Returns:
+            dict[str, Any]: The pool counters.
+        """
+        with self._lock:
+            return {
+                'size': len(self._numbers),
+                'capacity': self.capacity,
+                'low_water': self.low_water,
+                'hits': self._hits,
+                'misses': self._misses,
+                'fallbacks': self._fallbacks,
+                'inline_refills': self._inline_refills,
+                'refills': self._refills,
+                'refill_failures': self._refill_failures,
+                'fetched': self._fetched,
+                'last_refill_ms': round(self._last_refill_ms, 3),
+            }
+
+
+_pool: Optional[RandomPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_random_pool() -> RandomPool:
+    """
+    Returns the process-wide random number pool, creating it on first use.
+
+    Returns:
+        RandomPool: The shared pool, backed by random.org.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RandomPool(RandomOrgProvider())
+    return _pool
+
+
+def _reset_random_pool_after_fork() -> None:
+    # The refill thread does not survive fork, so a forked worker starts with a pool of its own
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_random_pool_after_fork)
+
+
+def set_random_pool(pool: Optional[RandomPool]) -> None:
+    """
+    Replaces the process-wide random number pool, for example with one backed by a stub provider.
+
+    Args:
+        pool (Optional[RandomPool]): The new pool, or None to create a default one on next use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.stop()
+        _pool = pool
+
+
+def get_random() -> float:
+    """
+    Takes a single random decimal number with two decimal places from the prefetched pool.
+
+    Returns:
+        float: A random decimal number between 0 and 1, with two decimal places.
+
+    Raises:
+        RuntimeError: If the provider fails and fallback is off.
+        ValueError: If the provider response cannot be parsed and fallback is off.
+    """
+    random_number = get_random_pool().get()
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
+
+
+def get_random_numbers(count: int) -> list[float]:
+    """
+    Takes many random decimal numbers with two decimal places in as few provider requests as possible.
+
+    Args:
+        count (int): How many random numbers to take.
+
+    Returns:
+        list[float]: count random decimal numbers between 0 and 1.
+
+    Raises:
+        ValueError: If count is negative, or the provider response cannot be parsed and fallback is off.
+        RuntimeError: If the provider fails and fallback is off.
+    """
+    numbers = get_random_pool().get_many(count)
+    logger.info("Received %d random numbers", len(numbers))
+    return numbers
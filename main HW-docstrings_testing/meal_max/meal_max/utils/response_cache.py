@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import os
+from typing import Any, Callable, Hashable
+
+from flask import Response, current_app, request
+
+from meal_max.utils.cache_utils import MISSING, TTLCache
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+metrics.describe("response_cache_total", "Cached JSON responses served, by route and outcome (hit, miss or not_modified).")
+
+
+# Serialized JSON responses keyed by (route, parameters, data version). A write moves the
+# data version, so stale entries are never looked up again and age out of the LRU.
+response_cache = TTLCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+)
+
+
+def cached_json_response(route: str, params: Hashable, version: Hashable, build: Callable[[], Any]) -> Response:
+    """
+    Serves a JSON response from the response cache, building and caching it on a miss.
+
+    The ETag is a hash of the response body, so every worker process gives the same content
+    the same tag. A request whose If-None-Match still matches gets 304 Not Modified without
+    a body. Exceptions raised by build propagate and nothing is cached.
+
+    Args:
+        route (str): The route, used as part of the cache key and as the metrics label.
+        params (Hashable): The request parameters that select the response.
+        version (Hashable): The version of the data the response is built from.
+        build (Callable[[], Any]): Returns the payload to serialize on a miss.
+
+    Returns:
+        Response: A 200 response with the cached body, or a 304 response.
+    """
+    key = (route, params, version)
+    entry = response_cache.get(key)
+    if entry is MISSING:
+        body = current_app.json.dumps(build()).encode() + b"\n"
+        entry = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+        response_cache.set(key, entry)
+        outcome = 'miss'
+    else:
+        outcome = 'hit'
+
+    body, etag = entry
+    if request.if_none_match.contains(etag):
+        outcome = 'not_modified'
+    metrics.inc("response_cache_total", labels=(("route", route), ("outcome", outcome)))
+
+    response = Response(body, status=200, mimetype="application/json")
+    response.set_etag(etag)
+    # Clients may keep the response, but must revalidate it before every use
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
@@ -1,26 +1,42 @@
 from contextlib import contextmanager
+import itertools
 import logging
 import os
+import queue
 import sqlite3
+import threading
+import time
+from typing import Any, Optional
 
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("db_connection_acquire_seconds", "Time spent taking a connection from the pool, including opening it.")
+metrics.describe("db_connection_hold_seconds", "Time a connection was held by its caller, which is mostly query time.")
+
 
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# connection pool settings, also overridable from the environment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5.0"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-16000"))  # negative means KiB, so ~16MB
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+
 
 def check_database_connection():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # This ensures the connection is actually active
-        cursor.execute("SELECT 1;")
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # This ensures the connection is actually active
+            cursor.execute("SELECT 1;")
     except sqlite3.Error as e:
         error_message = f"Database connection error: {e}"
         logger.error(error_message)
@@ -28,31 +44,302 @@ def check_database_connection():
 
 def check_table_exists(tablename: str):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
     except sqlite3.Error as e:
         error_message = f"Table check error: {e}"
         logger.error(error_message)
         raise Exception(error_message) from e
 
-###################################################
-#
-# This one yields rather than returns.
-# What is the type of the yielded value?
-#
-###################################################
+
+# Numbers every pool this process opens, so data versions from different pools never collide
+_pool_generations = itertools.count(1)
+
+
+class ConnectionPool:
+    """
+    A bounded pool of persistent SQLite connections.
+
+    Connections are opened lazily, up to max_size, and handed back to the pool instead of
+    being closed. Every connection is opened once in WAL mode with the configured pragmas.
+
+    Attributes:
+        db_path (str): The path of the SQLite database file.
+        max_size (int): The maximum number of open connections.
+        timeout (float): How long, in seconds, to wait for a free connection.
+    """
+
+    def __init__(self, db_path: str, max_size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        if max_size < 1:
+            raise ValueError(f"Invalid pool size: {max_size}. Must be at least 1.")
+
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+
+        self._acquired = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+        self.generation = next(_pool_generations)
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._watch_lock = threading.Lock()
+        self._seen_data_version: Optional[int] = None
+        self._data_changes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens a new connection and applies the pool pragmas to it.
+
+        Returns:
+            sqlite3.Connection: The newly opened connection.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS};")
+        cursor.execute(f"PRAGMA cache_size={DB_CACHE_SIZE};")
+        cursor.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE};")
+        cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS};")
+        cursor.close()
+        logger.info("Opened pooled database connection to %s", self.db_path)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Takes a connection from the pool, opening a new one if the pool is not yet full.
+
+        Returns:
+            sqlite3.Connection: A connection reserved for the caller.
+
+        Raises:
+            RuntimeError: If the pool is closed or no connection frees up within the timeout.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._open < self.max_size:
+                    self._open += 1
+                    open_new = True
+                else:
+                    open_new = False
+
+            if open_new:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                start = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    logger.error("Timed out waiting %.1fs for a database connection", self.timeout)
+                    raise RuntimeError("Timed out waiting for a database connection")
+                finally:
+                    waited = time.perf_counter() - start
+                    with self._lock:
+                        self._waits += 1
+                        self._wait_time += waited
+
+        with self._lock:
+            self._acquired += 1
+        return conn
+
+    def data_version(self) -> tuple[int, int]:
+        """
+        Returns a version that changes whenever any connection commits to the database.
+
+        A dedicated connection, kept out of the pool, polls PRAGMA data_version, which changes
+        after commits by every other connection, in this process or any other. It only reads
+        the WAL header, so no table is touched.
+
+        Returns:
+            tuple[int, int]: The pool generation and the number of changes it has seen.
+        """
+        with self._watch_lock:
+            if self._watcher is None:
+                self._watcher = self._connect()
+            value = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            if value != self._seen_data_version:
+                self._seen_data_version = value
+                self._data_changes += 1
+            return (self.generation, self._data_changes)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Returns a connection to the pool, rolling back anything the caller left uncommitted.
+
+        Args:
+            conn (sqlite3.Connection): The connection to hand back.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.error("Discarding broken pooled connection: %s", str(e))
+            self._discard(conn)
+            return
+
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._open -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """
+        Closes every idle connection. Connections still checked out are closed when released.
+        """
+        self._closed = True
+        with self._watch_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        logger.info("Connection pool for %s closed.", self.db_path)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the pool size and wait metrics.
+
+        Returns:
+            dict[str, Any]: The pool counters.
+        """
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                'db_path': self.db_path,
+                'max_size': self.max_size,
+                'open': self._open,
+                'idle': idle,
+                'in_use': self._open - idle,
+                'acquired': self._acquired,
+                'waits': self._waits,
+                'wait_time_ms': round(self._wait_time * 1000, 3),
+                'timeouts': self._timeouts,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    The pool is rebuilt if DB_PATH has changed since it was created.
+
+    Returns:
+        ConnectionPool: The shared connection pool.
+    """
+    global _pool
+    pool = _pool
+    if pool is not None and pool.db_path == DB_PATH:
+        return pool
+
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def _reset_pool_after_fork() -> None:
+    # SQLite connections must not be shared across fork, so a worker forked from a process
+    # that already opened the pool starts with its own. The inherited connections are
+    # abandoned rather than closed, since closing them could disturb the parent's.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def close_pool() -> None:
+    """
+    Closes the shared connection pool. The next call to get_db_connection opens a new one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """
+    Returns the metrics of the shared connection pool.
+
+    Returns:
+        dict[str, Any]: The pool counters.
+    """
+    return get_pool().stats()
+
+
+def get_data_version() -> tuple[int, int]:
+    """
+    Returns a version of the database contents that changes after every commit, from any process.
+
+    Returns:
+        tuple[int, int]: An opaque version, only meaningful compared with another one.
+    """
+    return get_pool().data_version()
+
+
 @contextmanager
 def get_db_connection():
-    conn = None
+    """
+    Context manager that lends out a pooled SQLite connection.
+
+    The connection goes back to the pool on exit instead of being closed. Anything the
+    caller did not commit is rolled back. The time taken to acquire the connection, and
+    how long the caller held it, are recorded in the metrics registry.
+
+    Yields:
+        sqlite3.Connection: The SQLite connection object.
+    """
+    pool = get_pool()
+    start = time.perf_counter()
+    conn = pool.acquire()
+    acquired = time.perf_counter()
+    metrics.observe("db_connection_acquire_seconds", acquired - start)
     try:
-        conn = sqlite3.connect(DB_PATH)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+        metrics.observe("db_connection_hold_seconds", time.perf_counter() - acquired)
+        pool.release(conn)
@@ -0,0 +1,261 @@
+import logging
+import threading
+from typing import Any, Callable, Hashable, Iterable, Optional, TypeVar
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+T = TypeVar("T")
+
+
+class WriteBehindFullError(RuntimeError):
+    """Raised when a buffer already holds max_buffered results, because flushes keep failing."""
+
+
+class WriteBehindBuffer:
+    """
+    Accumulates per-key counter deltas, and optionally append-only events, in memory and hands
+    them to a flush function in batches.
+
+    A background thread flushes every interval_ms, or sooner once max_pending results have been
+    added. Deltas that fail to flush are merged back in and retried on the next flush, until
+    max_buffered results are held, after which add fails instead of growing the buffer. A batch
+    that is being flushed stays visible through pending until its commit has landed.
+
+    Attributes:
+        flush_fn (Callable[[dict, list], Any]): Writes a {key: [delta, ...]} batch and the list of
+            events added with it, in one transaction.
+        width (int): The number of counters per key.
+        interval_ms (int): How often the background thread flushes, in milliseconds.
+        max_pending (int): The number of added results that triggers an early flush.
+        max_buffered (int): The most results held, pending and in flight, before add fails.
+    """
+
+    def __init__(self, flush_fn: Callable[[dict, list], Any], width: int, interval_ms: int = 500, max_pending: int = 1000,
+                 max_buffered: int = 100000):
+        if interval_ms < 1:
+            raise ValueError(f"Invalid flush interval: {interval_ms}. Must be at least 1 ms.")
+        if max_pending < 1:
+            raise ValueError(f"Invalid max pending: {max_pending}. Must be at least 1.")
+        if max_buffered < max_pending:
+            raise ValueError(f"Invalid max buffered: {max_buffered}. Must be at least max pending ({max_pending}).")
+
+        self.flush_fn = flush_fn
+        self.width = width
+        self.interval_ms = interval_ms
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+
+        self._pending: dict[Hashable, list[int]] = {}
+        self._events: list = []
+        self._pending_results = 0
+        # The batch handed to the flush function, until its commit has landed or failed
+        self._in_flight: dict[Hashable, list[int]] = {}
+        self._in_flight_results = 0
+        self._flushing = False
+        self._flush_generation = 0
+        self._lock = threading.Lock()
+        self._flush_done = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._flushes = 0
+        self._flushed_results = 0
+        self._failures = 0
+        self._rejected = 0
+
+    def _merge(self, deltas: dict[Hashable, Any], into: Optional[dict] = None) -> None:
+        into = self._pending if into is None else into
+        for key, values in deltas.items():
+            counters = into.setdefault(key, [0] * self.width)
+            for i, value in enumerate(values):
+                counters[i] += value
+
+    def _snapshot(self) -> dict[Hashable, tuple]:
+        # Called with the lock held
+        merged: dict[Hashable, list[int]] = {}
+        self._merge(self._in_flight, merged)
+        self._merge(self._pending, merged)
+        return {key: tuple(counters) for key, counters in merged.items()}
+
+    def add(self, deltas: dict[Hashable, Any], results: int = 1, events: Iterable[Any] = ()) -> None:
+        """
+        Adds the counter deltas of one or more results to the buffer.
+
+        Args:
+            deltas (dict[Hashable, Any]): The deltas to add, a sequence of width counters per key.
+            results (int): How many results the deltas stand for.
+            events (Iterable[Any]): Events to write in the same flush as the deltas.
+
+        Raises:
+            WriteBehindFullError: If the buffer already holds max_buffered results.
+        """
+        with self._lock:
+            if self._pending_results + self._in_flight_results + results > self.max_buffered:
+                self._rejected += 1
+                logger.error("Write-behind buffer is full with %d results, flushes are failing",
+                             self._pending_results + self._in_flight_results)
+                raise WriteBehindFullError(
+                    f"Write-behind buffer is full ({self.max_buffered} results), the database is not accepting writes")
+            self._merge(deltas)
+            self._events.extend(events)
+            self._pending_results += results
+            full = self._pending_results >= self.max_pending
+
+        if self._thread is None:
+            self._start()
+        if full:
+            self._wake.set()
+
+    def pending(self) -> dict[Hashable, tuple]:
+        """
+        Returns a snapshot of the deltas that have not been committed yet, in flight ones included.
+
+        Returns:
+            dict[Hashable, tuple]: The pending counters per key.
+        """
+        with self._lock:
+            return self._snapshot()
+
+    def read_with_pending(self, read: Callable[[dict[Hashable, tuple]], T], timeout: float = 5) -> tuple[T, dict[Hashable, tuple]]:
+        """
+        Runs a read of the flushed data together with a snapshot of the deltas it does not include.
+
+        The flush function commits its batch itself, so a read that overlapped a flush could see
+        the batch both in the data and in the buffer, or in neither. Such reads are run again,
+        after waiting up to timeout seconds for the flush to end. If it does not end in time the
+        read goes ahead against the snapshot, in flight deltas included.
+
+        Args:
+            read (Callable[[dict[Hashable, tuple]], T]): Reads the flushed data, given the snapshot.
+            timeout (float): How long to wait for a flush in progress, in seconds.
+
+        Returns:
+            tuple[T, dict[Hashable, tuple]]: What read returned, and the snapshot it was given.
+        """
+        while True:
+            with self._lock:
+                settled = self._flush_done.wait_for(lambda: not self._flushing, timeout)
+                generation = self._flush_generation
+                snapshot = self._snapshot()
+
+            result = read(snapshot)
+
+            with self._lock:
+                if not settled or (self._flush_generation == generation and not self._flushing):
+                    return result, snapshot
+
+    def _land(self, failed: bool) -> None:
+        # Called with the lock held, once the flush function has returned or raised
+        if failed:
+            self._merge(self._in_flight)
+            self._pending_results += self._in_flight_results
+        self._in_flight = {}
+        self._in_flight_results = 0
+        self._flushing = False
+        self._flush_generation += 1
+        self._flush_done.notify_all()
+
+    def flush(self) -> int:
+        """
+        Writes every pending delta through the flush function now.
+
+        Returns:
+            int: The number of results flushed.
+
+        Raises:
+            Exception: Whatever the flush function raised. The deltas are kept for the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                events, self._events = self._events, []
+                results, self._pending_results = self._pending_results, 0
+                if not batch and not events:
+                    return 0
+                self._in_flight, self._in_flight_results = batch, results
+                self._flushing = True
+
+            try:
+                self.flush_fn(batch, events)
+            except Exception:
+                with self._lock:
+                    self._land(failed=True)
+                    self._events[:0] = events
+                    self._failures += 1
+                raise
+
+            with self._lock:
+                self._land(failed=False)
+                self._flushes += 1
+                self._flushed_results += results
+            logger.info("Flushed %d buffered results for %d keys", results, len(batch))
+            return results
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="write-behind-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval_ms / 1000)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Write-behind flush failed, will retry: %s", e)
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and flushes whatever is still pending.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def reset_after_fork(self) -> None:
+        """
+        Forgets the pending deltas and the flush thread inherited from the parent process.
+
+        Called in a forked child, where the parent still owns and will flush those deltas.
+        """
+        self._pending = {}
+        self._events = []
+        self._pending_results = 0
+        self._in_flight = {}
+        self._in_flight_results = 0
+        self._flushing = False
+        self._lock = threading.Lock()
+        self._flush_done = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the buffer size and flush counters.
+
+        Returns:
+            dict[str, Any]: The buffer counters.
+        """
+        with self._lock:
+            return {
+                'pending_keys': len(self._pending),
+                'pending_results': self._pending_results,
+                'in_flight_results': self._in_flight_results,
+                'max_buffered': self.max_buffered,
+                'rejected': self._rejected,
+                'pending_events': len(self._events),
+                'flushes': self._flushes,
+                'flushed_results': self._flushed_results,
+                'failures': self._failures,
+            }
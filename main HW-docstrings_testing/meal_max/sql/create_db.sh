@@ -1,14 +1,6 @@
 #!/bin/bash
 
-# Check if the database file already exists
-if [ -f "$DB_PATH" ]; then
-    echo "Recreating database at $DB_PATH."
-    # Drop and recreate the tables
-    sqlite3 "$DB_PATH" < /app/sql/create_meal_table.sql
-    echo "Database recreated successfully."
-else
-    echo "Creating database at $DB_PATH."
-    # Create the database for the first time
-    sqlite3 "$DB_PATH" < /app/sql/create_meal_table.sql
-    echo "Database created successfully."
-fi
\ No newline at end of file
+# Create the database if needed and apply any pending schema migrations.
+# Existing tables and data are kept; only migrations the database has not seen yet run.
+echo "Migrating database at $DB_PATH."
+cd /app && python -m meal_max.utils.migrations --db "$DB_PATH"
@@ -1,5 +1,5 @@
-DROP TABLE IF EXISTS meals;
-CREATE TABLE meals (
+-- The original meals table. Databases created before migrations already have it.
+CREATE TABLE IF NOT EXISTS meals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     meal TEXT NOT NULL UNIQUE,
     cuisine TEXT NOT NULL,
@@ -8,4 +8,4 @@ CREATE TABLE meals (
     battles INTEGER DEFAULT 0,
     wins INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+);
@@ -0,0 +1,6 @@
+-- Serve every leaderboard sort from an index. The indexes are partial, so deleted meals
+-- take no space in them, and the leaderboard query's deleted = FALSE term selects them.
+ALTER TABLE meals ADD COLUMN win_pct REAL GENERATED ALWAYS AS (CASE WHEN battles > 0 THEN wins * 1.0 / battles ELSE 0 END) VIRTUAL;
+CREATE INDEX idx_meals_leaderboard_wins ON meals (wins DESC, id) WHERE deleted = FALSE;
+CREATE INDEX idx_meals_leaderboard_win_pct ON meals (win_pct DESC, id) WHERE deleted = FALSE;
+CREATE INDEX idx_meals_leaderboard_battles ON meals (battles DESC, id) WHERE deleted = FALSE;
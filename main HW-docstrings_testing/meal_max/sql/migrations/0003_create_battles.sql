@@ -0,0 +1,17 @@
+-- Append-only battle history, read per meal and per pair of meals, newest first
+CREATE TABLE battles (
+    id INTEGER PRIMARY KEY,
+    meal_1_id INTEGER NOT NULL,
+    meal_2_id INTEGER NOT NULL,
+    score_1 REAL NOT NULL,
+    score_2 REAL NOT NULL,
+    delta REAL NOT NULL,
+    random_number REAL NOT NULL,
+    winner_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    pair_low INTEGER GENERATED ALWAYS AS (min(meal_1_id, meal_2_id)) VIRTUAL,
+    pair_high INTEGER GENERATED ALWAYS AS (max(meal_1_id, meal_2_id)) VIRTUAL
+);
+CREATE INDEX idx_battles_meal_1 ON battles (meal_1_id, id);
+CREATE INDEX idx_battles_meal_2 ON battles (meal_2_id, id);
+CREATE INDEX idx_battles_pair ON battles (pair_low, pair_high, id, winner_id);
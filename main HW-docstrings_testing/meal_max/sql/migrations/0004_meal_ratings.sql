@@ -0,0 +1,4 @@
+-- Elo ratings. The default must match RATING_INITIAL in rating_model.py. Ratings of
+-- existing meals can be rebuilt from the battle history with python -m meal_max.models.rating_model.
+ALTER TABLE meals ADD COLUMN rating REAL NOT NULL DEFAULT 1500;
+CREATE INDEX idx_meals_leaderboard_rating ON meals (rating DESC, id) WHERE deleted = FALSE;
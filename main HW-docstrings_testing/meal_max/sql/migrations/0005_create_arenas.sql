@@ -0,0 +1,8 @@
+-- Arenas shared by every worker process, saved with a compare-and-swap on version
+CREATE TABLE arenas (
+    id TEXT PRIMARY KEY,
+    combatants TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX idx_arenas_updated_at ON arenas (updated_at);
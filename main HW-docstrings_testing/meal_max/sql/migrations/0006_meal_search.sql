@@ -0,0 +1,16 @@
+-- Full-text index over meal names and cuisines, holding only meals that are not deleted.
+-- The triggers only fire on changes to the indexed columns, so battle stats updates skip them.
+CREATE VIRTUAL TABLE meals_fts USING fts5(
+    meal, cuisine, content='meals', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3 4'
+);
+INSERT INTO meals_fts (rowid, meal, cuisine) SELECT id, meal, cuisine FROM meals WHERE deleted = FALSE;
+CREATE TRIGGER meals_fts_insert AFTER INSERT ON meals WHEN new.deleted = FALSE BEGIN
+    INSERT INTO meals_fts (rowid, meal, cuisine) VALUES (new.id, new.meal, new.cuisine);
+END;
+CREATE TRIGGER meals_fts_delete AFTER DELETE ON meals WHEN old.deleted = FALSE BEGIN
+    INSERT INTO meals_fts (meals_fts, rowid, meal, cuisine) VALUES ('delete', old.id, old.meal, old.cuisine);
+END;
+CREATE TRIGGER meals_fts_update AFTER UPDATE OF meal, cuisine, deleted ON meals BEGIN
+    INSERT INTO meals_fts (meals_fts, rowid, meal, cuisine) SELECT 'delete', old.id, old.meal, old.cuisine WHERE old.deleted = FALSE;
+    INSERT INTO meals_fts (rowid, meal, cuisine) SELECT new.id, new.meal, new.cuisine WHERE new.deleted = FALSE;
+END;
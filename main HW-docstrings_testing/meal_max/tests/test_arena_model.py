@@ -0,0 +1,263 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.models.arena_model import ArenaConflictError, ArenaStore, SqliteArenaStore, create_arena_store
+from meal_max.models.kitchen_model import Meal, create_meals_bulk, delete_meal, get_battle_history, meal_cache
+from meal_max.utils import cache_utils, sql_utils
+from meal_max.utils.migrations import migrate
+from meal_max.utils.random_utils import RandomPool, set_random_pool
+from meal_max.utils.sql_utils import close_pool, get_db_connection
+
+
+@pytest.fixture
+def store():
+    """Fixture to provide a small arena store."""
+    return ArenaStore(shards=4, max_arenas=8, ttl=60)
+
+@pytest.fixture
+def sample_meal():
+    """Fixture to provide a meal to prep."""
+    return Meal(1, 'Meal 1', 'Italian', 12.5, 'MED')
+
+
+##################################################
+# Arena Store Test Cases
+##################################################
+
+def test_arena_is_reused(store, sample_meal):
+    """Test that the same ID opens the same arena."""
+    with store.arena('a') as battle_model:
+        battle_model.prep_combatant(sample_meal)
+    with store.arena('a') as battle_model:
+        assert battle_model.get_combatants() == [sample_meal]
+
+def test_arenas_are_isolated(store, sample_meal):
+    """Test that combatants prepped in one arena do not show up in another."""
+    with store.arena('a') as battle_model:
+        battle_model.prep_combatant(sample_meal)
+    with store.arena('b') as battle_model:
+        assert battle_model.get_combatants() == []
+
+def test_arena_lock_held(store):
+    """Test that a second request for a busy arena waits, while other arenas stay available."""
+    entered = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold():
+        with store.arena('a'):
+            entered.set()
+            release.wait(timeout=5)
+            order.append('first')
+
+    def wait_for_arena():
+        with store.arena('a'):
+            order.append('second')
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert entered.wait(timeout=5)
+    waiter = threading.Thread(target=wait_for_arena)
+    waiter.start()
+
+    with store.arena('b'):
+        pass
+    release.set()
+    holder.join()
+    waiter.join()
+    assert order == ['first', 'second']
+
+def test_arena_evicted_when_full(store):
+    """Test that the store never holds more than max_arenas, dropping the least recently used."""
+    for i in range(100):
+        with store.arena(i):
+            pass
+
+    stats = store.stats()
+    assert stats['arenas'] <= 8
+    assert stats['evictions'] >= 92
+
+def test_idle_arena_expires(store, sample_meal, monkeypatch):
+    """Test that an arena left idle for longer than the TTL starts over empty."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    with store.arena('a') as battle_model:
+        battle_model.prep_combatant(sample_meal)
+
+    now[0] += 59
+    with store.arena('a') as battle_model:
+        assert len(battle_model.get_combatants()) == 1
+    now[0] += 59
+    with store.arena('a') as battle_model:
+        assert len(battle_model.get_combatants()) == 1
+
+    now[0] += 61
+    with store.arena('a') as battle_model:
+        assert battle_model.get_combatants() == []
+
+def test_delete_arena(store, sample_meal):
+    """Test that a deleted arena starts over empty."""
+    with store.arena('a') as battle_model:
+        battle_model.prep_combatant(sample_meal)
+    store.delete('a')
+
+    with store.arena('a') as battle_model:
+        assert battle_model.get_combatants() == []
+    assert store.stats()['deleted'] == 1
+
+def test_invalid_max_arenas():
+    """Test error when the store cannot hold one arena per shard."""
+    with pytest.raises(ValueError, match="Invalid maximum number of arenas: 2. Must be at least 4."):
+        ArenaStore(shards=4, max_arenas=2)
+
+
+##################################################
+# Shared Arena Store Test Cases
+##################################################
+
+@pytest.fixture
+def shared_db(tmp_path, monkeypatch):
+    """Sets up a database with two meals and a random pool that always draws 0.99."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    migrate()
+    create_meals_bulk([
+        {'meal': 'Meal 1', 'cuisine': 'Italian', 'price': 12.5, 'difficulty': 'MED'},
+        {'meal': 'Meal 2', 'cuisine': 'Thai', 'price': 9.0, 'difficulty': 'LOW'},
+    ])
+    set_random_pool(RandomPool(lambda num: [0.99] * num, capacity=10, low_water=0, fallback=False, background=False))
+    yield [Meal(1, 'Meal 1', 'Italian', 12.5, 'MED'), Meal(2, 'Meal 2', 'Thai', 9.0, 'LOW')]
+    set_random_pool(None)
+    meal_cache.clear()
+    close_pool()
+
+def get_battles_recorded():
+    """Returns the total number of battles recorded on the meals table."""
+    with get_db_connection() as conn:
+        return conn.execute("SELECT SUM(battles) FROM meals").fetchone()[0] // 2
+
+def get_arena_version(arena_id):
+    """Returns the saved version of an arena."""
+    with get_db_connection() as conn:
+        return conn.execute("SELECT version FROM arenas WHERE id = ?", (arena_id,)).fetchone()[0]
+
+def test_shared_arena_seen_by_other_store(shared_db):
+    """Test that an arena prepped through one store, as in one worker, is visible to another."""
+    meal_1, meal_2 = shared_db
+    SqliteArenaStore().run('a', lambda battle_model: battle_model.prep_combatant(meal_1))
+    SqliteArenaStore().run('a', lambda battle_model: battle_model.prep_combatant(meal_2))
+
+    assert SqliteArenaStore().run('a', lambda battle_model: battle_model.get_combatants()) == [meal_1, meal_2]
+    assert SqliteArenaStore().run('b', lambda battle_model: battle_model.get_combatants()) == []
+
+def test_shared_arena_battle(shared_db):
+    """Test that a battle is recorded once and the loser leaves the shared arena."""
+    meal_1, meal_2 = shared_db
+    store = SqliteArenaStore()
+    for meal in shared_db:
+        store.run('a', lambda battle_model, meal=meal: battle_model.prep_combatant(meal))
+
+    winner = store.run('a', lambda battle_model: battle_model.battle())
+    assert winner == 'Meal 2'
+    assert store.run('a', lambda battle_model: battle_model.get_combatants()) == [meal_2]
+    assert get_battles_recorded() == 1
+    assert len(get_battle_history(1)) == 1
+
+def test_conflict_reruns_operation(shared_db):
+    """Test that an operation is rerun on fresh state when another worker saved first."""
+    meal_1, meal_2 = shared_db
+    store = SqliteArenaStore()
+    other_worker = SqliteArenaStore()
+    seen = []
+
+    def prep(battle_model):
+        seen.append(list(battle_model.get_combatants()))
+        if len(seen) == 1:
+            other_worker.run('a', lambda other: other.prep_combatant(meal_1))
+        battle_model.prep_combatant(meal_2)
+
+    store.run('a', prep)
+    assert seen == [[], [meal_1]]
+    assert store.run('a', lambda battle_model: battle_model.get_combatants()) == [meal_1, meal_2]
+    assert store.stats()['conflicts'] == 1
+
+def test_conflicting_battle_recorded_once(shared_db):
+    """Test that a battle that loses the race is not recorded, and the rerun finds one combatant left."""
+    store = SqliteArenaStore()
+    for meal in shared_db:
+        store.run('a', lambda battle_model, meal=meal: battle_model.prep_combatant(meal))
+
+    attempts = []
+
+    def battle(battle_model):
+        attempts.append(1)
+        if len(attempts) == 1:
+            SqliteArenaStore().run('a', lambda other: other.battle())
+        return battle_model.battle()
+
+    with pytest.raises(ValueError, match="Two combatants must be prepped for a battle."):
+        store.run('a', battle)
+    assert get_battles_recorded() == 1
+
+def test_conflict_retries_exhausted(shared_db):
+    """Test error when the arena changes under every attempt."""
+    meal_1, _ = shared_db
+    store = SqliteArenaStore(retries=2)
+
+    def toggle(other):
+        if other.get_combatants():
+            other.clear_combatants()
+        else:
+            other.prep_combatant(meal_1)
+
+    def prep(battle_model):
+        # Another worker saves a new version during every attempt
+        SqliteArenaStore().run('a', toggle)
+        battle_model.prep_combatant(meal_1)
+
+    with pytest.raises(ArenaConflictError, match="Arena a is busy, try again"):
+        store.run('a', prep)
+    assert store.stats()['failures'] == 1
+
+def test_failed_battle_restores_combatants(shared_db):
+    """Test that a battle rejected for a deleted meal leaves both combatants in the arena."""
+    store = SqliteArenaStore()
+    for meal in shared_db:
+        store.run('a', lambda battle_model, meal=meal: battle_model.prep_combatant(meal))
+    delete_meal(1)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        store.run('a', lambda battle_model: battle_model.battle())
+    assert store.run('a', lambda battle_model: battle_model.get_combatants()) == shared_db
+    # The arena save was rolled back with the result, not undone by a second write
+    assert get_arena_version('a') == 2
+
+def test_failed_result_write_rolls_back_arena(shared_db, mocker):
+    """Test that a database error while recording a battle also undoes the arena save."""
+    store = SqliteArenaStore()
+    for meal in shared_db:
+        store.run('a', lambda battle_model, meal=meal: battle_model.prep_combatant(meal))
+    mocker.patch("meal_max.models.kitchen_model.apply_ratings", side_effect=sqlite3.OperationalError("disk I/O error"))
+
+    with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+        store.run('a', lambda battle_model: battle_model.battle())
+    assert store.run('a', lambda battle_model: battle_model.get_combatants()) == shared_db
+    assert get_arena_version('a') == 2
+    assert get_battles_recorded() == 0
+
+def test_shared_arena_expires(shared_db, monkeypatch):
+    """Test that an arena left unchanged for longer than the TTL starts over empty."""
+    meal_1, _ = shared_db
+    store = SqliteArenaStore(ttl=60)
+    store.run('a', lambda battle_model: battle_model.prep_combatant(meal_1))
+
+    from meal_max.models import arena_model
+    now = arena_model.time.time()
+    monkeypatch.setattr(arena_model.time, "time", lambda: now + 61)
+    assert store.run('a', lambda battle_model: battle_model.get_combatants()) == []
+
+def test_invalid_arena_backend():
+    """Test error when asking for an unknown arena backend."""
+    with pytest.raises(ValueError, match="Invalid arena backend: redis"):
+        create_arena_store("redis")
@@ -64,8 +64,8 @@ def test_clear_combatants(battle_model, sample_meal1, sample_meal2):
 
 def test_battle(battle_model, sample_meal1, sample_meal2, mocker):
     """Test conducting a battle between two combatants."""
-    # Mock the update_meal_stats function to avoid side effects during testing
-    mock_update_meal_stats = mocker.patch("meal_max.models.battle_model.update_meal_stats")
+    # Mock the record_battle_result function to avoid side effects during testing
+    mock_record_battle_result = mocker.patch("meal_max.models.battle_model.record_battle_result")
     
     battle_model.prep_combatant(sample_meal1)
     battle_model.prep_combatant(sample_meal2)
@@ -75,8 +75,11 @@ def test_battle(battle_model, sample_meal1, sample_meal2, mocker):
     # Assert that one of the meals is the winner
     assert winner in ['Meal 1', 'Meal 2']
 
-    # Assert that update_meal_stats was called twice for win and loss
-    assert mock_update_meal_stats.call_count == 2
+    # Assert that the win and loss were recorded together in one call
+    mock_record_battle_result.assert_called_once()
+    winner_id, loser_id = mock_record_battle_result.call_args[0]
+    assert {winner_id, loser_id} == {1, 2}
+    assert battle_model.combatants[0].id == winner_id
 
 
 def test_battle_not_enough_combatants(battle_model):
@@ -107,3 +110,82 @@ def test_get_battle_score_high_difficulty(battle_model, sample_meal2):
     battle_model.prep_combatant(sample_meal2)
     score = battle_model.get_battle_score(sample_meal2)
     assert score == (sample_meal2.price * len(sample_meal2.cuisine)) - 1  # Difficulty is 'HIGH', so modifier is 1
+
+
+##################################################
+# Tournament Test Cases
+##################################################
+
+@pytest.fixture()
+def mock_tournament(mocker, sample_meal1, sample_meal2, sample_meal3):
+    """Mocks the batched meal lookup, random draw and stats update used by tournaments."""
+    meals = {meal.id: meal for meal in (sample_meal1, sample_meal2, sample_meal3)}
+    mocker.patch("meal_max.models.battle_model.get_meals_by_ids", side_effect=lambda ids: [meals[i] for i in ids])
+    mocker.patch("meal_max.models.battle_model.get_random_numbers", side_effect=lambda count: [0.5] * count)
+    return mocker.patch("meal_max.models.battle_model.update_meal_stats_bulk")
+
+
+def test_single_elimination_tournament(battle_model, mock_tournament):
+    """Test a single-elimination tournament with a bye for the top seed."""
+    tournament = battle_model.run_tournament([1, 2, 3])
+
+    # Meal 1 has a bye, Meal 2 beats Meal 3, then Meal 1 faces Meal 2
+    assert [len(matches) for matches in tournament['rounds']] == [1, 1]
+    first_match = tournament['rounds'][0][0]
+    assert (first_match['combatant_1'], first_match['combatant_2']) == ('Meal 2', 'Meal 3')
+    assert first_match['delta'] == abs(first_match['score_1'] - first_match['score_2']) / 100
+    assert tournament['champion'] == tournament['rounds'][1][0]['winner']
+
+    # All four results are written in one call
+    mock_tournament.assert_called_once()
+    assert len(mock_tournament.call_args[0][0]) == 4
+
+
+def test_round_robin_tournament(battle_model, mock_tournament):
+    """Test a round-robin tournament where every meal meets every other meal once."""
+    tournament = battle_model.run_tournament([1, 2, 3], mode="round_robin")
+
+    assert len(tournament['rounds'][0]) == 3
+    assert sum(entry['wins'] for entry in tournament['standings']) == 3
+    assert len(mock_tournament.call_args[0][0]) == 6
+    assert battle_model.combatants == []
+
+
+def test_round_robin_tie_broken_head_to_head(battle_model, mocker, sample_meal1, sample_meal2, sample_meal3):
+    """Test that meals level on wins are ranked by their match against each other, then by seed."""
+    sample_meal4 = Meal(id=4, meal='Meal 4', cuisine='Cuisine 4', price=11.0, difficulty='MED')
+    meals = {meal.id: meal for meal in (sample_meal1, sample_meal2, sample_meal3, sample_meal4)}
+    mocker.patch("meal_max.models.battle_model.get_meals_by_ids", side_effect=lambda ids: [meals[i] for i in ids])
+    # Combatant 1 wins on a 0.0 draw and loses on 0.99: Meal 4 beats Meal 1, both finish on two wins
+    mocker.patch("meal_max.models.battle_model.get_random_numbers", return_value=[0.0, 0.0, 0.99, 0.0, 0.99, 0.0])
+    mocker.patch("meal_max.models.battle_model.update_meal_stats_bulk")
+
+    tournament = battle_model.run_tournament([1, 2, 3, 4], mode="round_robin")
+
+    standings = [(entry['meal'], entry['wins'], entry['seed']) for entry in tournament['standings']]
+    assert standings == [('Meal 4', 2, 4), ('Meal 1', 2, 1), ('Meal 2', 1, 2), ('Meal 3', 1, 3)]
+
+
+def test_tournament_too_many_meals(battle_model, mocker):
+    """Test error when more meals enter a tournament than allowed."""
+    mocker.patch("meal_max.models.battle_model.TOURNAMENT_MAX_MEALS", 3)
+    with pytest.raises(ValueError, match="At most 3 meals can enter a tournament."):
+        battle_model.run_tournament([1, 2, 3, 4])
+
+
+def test_tournament_invalid_mode(battle_model):
+    """Test error when running a tournament with an unknown mode."""
+    with pytest.raises(ValueError, match="Invalid tournament mode: swiss"):
+        battle_model.run_tournament([1, 2], mode="swiss")
+
+
+def test_tournament_not_enough_meals(battle_model):
+    """Test error when running a tournament with a single meal."""
+    with pytest.raises(ValueError, match="At least two meals are needed for a tournament."):
+        battle_model.run_tournament([1])
+
+
+def test_tournament_duplicate_meals(battle_model):
+    """Test error when a meal enters a tournament twice."""
+    with pytest.raises(ValueError, match="Each meal can only enter a tournament once."):
+        battle_model.run_tournament([1, 1])
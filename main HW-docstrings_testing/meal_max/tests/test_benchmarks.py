@@ -0,0 +1,57 @@
+import pytest
+
+from benchmarks.bench_kitchen_model import compare, percentile, run_benchmarks
+from meal_max.models import kitchen_model
+from meal_max.utils.cache_utils import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def private_meal_cache(monkeypatch):
+    """Gives the benchmarks their own meal cache, so its counters do not leak into other tests."""
+    monkeypatch.setattr(kitchen_model, "meal_cache", TTLCache(max_size=1000, ttl=60))
+
+
+def make_report(**timings):
+    """Returns a minimal report with the given p50 timings for 1000 meals."""
+    return {'results': {'1000': {name: {'p50_us': value} for name, value in timings.items()}}}
+
+
+##################################################
+# Benchmark Test Cases
+##################################################
+
+def test_percentile():
+    """Test the nearest-rank percentile of sorted samples."""
+    samples = [float(i) for i in range(1, 101)]
+
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([7.0], 0.99) == 7.0
+
+def test_run_benchmarks_small_catalog():
+    """Test that a run against a small catalog times every operation."""
+    report = run_benchmarks([20], iterations=3)
+
+    operations = report['results']['20']
+    for name in ('create_meal', 'get_meal_by_id', 'get_meal_by_name', 'get_leaderboard_wins',
+                 'update_meal_stats', 'battle'):
+        assert operations[name]['iterations'] == 3
+        assert operations[name]['p50_us'] > 0
+
+def test_run_benchmarks_invalid_iterations():
+    """Test that a run needs at least one iteration."""
+    with pytest.raises(ValueError, match="Invalid number of iterations"):
+        run_benchmarks([20], iterations=0)
+
+def test_compare_flags_regressions():
+    """Test that only operations slower than the threshold allows are flagged."""
+    baseline = make_report(get_meal_by_id=10.0, battle=100.0)
+    report = make_report(get_meal_by_id=12.0, battle=150.0, create_meal=50.0)
+
+    comparison = {entry['operation']: entry for entry in compare(report, baseline, threshold=0.25)}
+
+    assert not comparison['get_meal_by_id']['regression']
+    assert comparison['battle']['regression']
+    assert comparison['battle']['ratio'] == 1.5
+    # Operations missing from the baseline are not compared
+    assert 'create_meal' not in comparison
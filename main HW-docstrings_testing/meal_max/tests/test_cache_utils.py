@@ -0,0 +1,98 @@
+import pytest
+
+from meal_max.utils import cache_utils
+from meal_max.utils.cache_utils import MISSING, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the cache clock with one the test can move forward."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    return now
+
+
+##################################################
+# TTL Cache Test Cases
+##################################################
+
+def test_get_and_set():
+    """Test caching and looking up a value."""
+    cache = TTLCache(max_size=2, ttl=10)
+    assert cache.get('a') is MISSING
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted when the cache is full."""
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiry(clock):
+    """Test that entries expire after their time to live."""
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=1)
+
+    clock[0] += 5
+    assert cache.get('a') == 1
+    assert cache.get('b') is MISSING
+
+    clock[0] += 10
+    assert cache.get('a') is MISSING
+    assert cache.stats()['expired'] == 2
+
+
+def test_invalidate():
+    """Test dropping entries explicitly."""
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set('a', 1)
+    cache.invalidate('a', 'missing')
+
+    assert cache.get('a') is MISSING
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_get_or_set():
+    """Test that the factory only runs on a miss."""
+    cache = TTLCache(max_size=2, ttl=10)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_set('a', factory) == 1
+    assert cache.get_or_set('a', factory) == 1
+    assert calls == [1]
+
+
+def test_get_or_set_touch(clock):
+    """Test that touching on a hit keeps busy entries alive and lets idle ones expire."""
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.get_or_set('busy', object)
+    idle = cache.get_or_set('idle', object)
+    busy = cache.get_or_set('busy', object)
+
+    for _ in range(3):
+        clock[0] += 6
+        assert cache.get_or_set('busy', object, touch=True) is busy
+    assert cache.get_or_set('idle', object) is not idle
+
+
+def test_invalid_size():
+    """Test error when creating a cache with no room."""
+    with pytest.raises(ValueError, match="Invalid cache size: 0"):
+        TTLCache(max_size=0, ttl=10)
@@ -1,6 +1,14 @@
+from contextlib import contextmanager
+import sqlite3
+
 import pytest
-from meal_max.models.kitchen_model import Meal, create_meal, delete_meal, get_meal_by_id, get_meal_by_name, update_meal_stats
-from meal_max.utils.sql_utils import get_db_connection
+from meal_max.models import kitchen_model
+from meal_max.models.kitchen_model import BattleRecord, Meal, create_meal, create_meals_bulk, delete_meal, get_leaderboard, get_leaderboard_page, get_meal_by_id, get_meal_by_name, get_meals_by_ids, meal_cache, flush_battle_stats, get_battle_history, get_data_version, get_head_to_head, get_head_to_head_summary, record_battle_result, search_meals, update_meal_stats, update_meal_stats_bulk
+from meal_max.utils import sql_utils
+from meal_max.utils.migrations import migrate
+from meal_max.utils.sql_utils import close_pool, get_db_connection
+from meal_max.utils.write_behind import WriteBehindBuffer
+
 
 @pytest.fixture()
 def meal_data():
@@ -18,11 +26,13 @@ def meal_instance(meal_data):
     return Meal(id=1, **meal_data)
 
 @pytest.fixture(autouse=True)
-def setup_database():
+def setup_database(tmp_path, monkeypatch):
     """Setup and teardown the database for testing."""
-    # Code to create test database tables, if needed
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    migrate()
     yield
-    # Code to drop test database tables, if needed
+    meal_cache.clear()
+    close_pool()
 
 ##################################################
 # Meal Creation Test Cases
@@ -149,3 +159,586 @@ def test_update_deleted_meal_stats(meal_instance):
 
     with pytest.raises(ValueError, match=f"Meal with ID {meal.id} has been deleted"):
         update_meal_stats(meal.id, 'win')
+
+##################################################
+# Bulk Meal Creation Test Cases
+##################################################
+
+def test_create_meals_bulk(meal_data):
+    """Test creating many meals across several batches."""
+    rows = ({**meal_data, 'meal': f'Meal {i}'} for i in range(25))
+    result = create_meals_bulk(rows, batch_size=10)
+
+    assert result == {'inserted': 25, 'failed': 0, 'errors': []}
+    assert get_meal_by_name('Meal 24').cuisine == meal_data['cuisine']
+
+def test_create_meals_bulk_invalid_rows(meal_data):
+    """Test that invalid rows are reported without aborting the load."""
+    rows = [
+        {**meal_data, 'meal': 'Good 1'},
+        {**meal_data, 'meal': 'Bad Price', 'price': -1},
+        {**meal_data, 'meal': 'Bad Difficulty', 'difficulty': 'INVALID'},
+        "not a meal",
+        {**meal_data, 'meal': 'Good 2', 'price': '12.5'},
+    ]
+    result = create_meals_bulk(rows)
+
+    assert result['inserted'] == 2
+    assert [error['row'] for error in result['errors']] == [2, 3, 4]
+    assert result['errors'][0]['error'] == "Price must be a positive value."
+    assert result['errors'][1]['error'] == "Difficulty must be 'LOW', 'MED', or 'HIGH'."
+    assert get_meal_by_name('Good 2').price == 12.5
+
+def test_create_meals_bulk_duplicates(meal_data):
+    """Test that duplicate names, in the load or already stored, are reported per row."""
+    create_meal(**meal_data)
+    rows = [
+        {**meal_data, 'meal': 'New Meal'},
+        meal_data,
+        {**meal_data, 'meal': 'New Meal'},
+    ]
+    result = create_meals_bulk(rows, batch_size=2)
+
+    assert result['inserted'] == 1
+    assert result['errors'] == [
+        {'row': 2, 'meal': 'Test Meal', 'error': "Meal with name 'Test Meal' already exists"},
+        {'row': 3, 'meal': 'New Meal', 'error': "Meal with name 'New Meal' already exists"},
+    ]
+
+def test_create_meals_bulk_invalid_batch_size():
+    """Test error when bulk loading with a non-positive batch size."""
+    with pytest.raises(ValueError, match="Invalid batch size: 0"):
+        create_meals_bulk([], batch_size=0)
+
+##################################################
+# Batched Lookup and Stats Test Cases
+##################################################
+
+def test_get_meals_by_ids(meal_data):
+    """Test retrieving several meals in the requested order."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(3))
+    meals = get_meals_by_ids([3, 1])
+    assert [meal.meal for meal in meals] == ['Meal 2', 'Meal 0']
+
+def test_get_meals_by_ids_missing():
+    """Test error when one of the requested meals does not exist."""
+    with pytest.raises(ValueError, match="Meal with ID 999 not found"):
+        get_meals_by_ids([999])
+
+def test_update_meal_stats_bulk(meal_data):
+    """Test applying several results to the same meal at once."""
+    create_meal(**meal_data)
+    update_meal_stats_bulk([(1, 'win'), (1, 'loss'), (1, 'win')])
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT battles, wins FROM meals WHERE id = 1").fetchone() == (3, 2)
+
+def test_update_meal_stats_bulk_deleted_meal(meal_data):
+    """Test that no results are written when one of the meals has been deleted."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(2))
+    delete_meal(2)
+
+    with pytest.raises(ValueError, match="Meal with ID 2 has been deleted"):
+        update_meal_stats_bulk([(1, 'win'), (2, 'loss')])
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT battles FROM meals WHERE id = 1").fetchone() == (0,)
+
+##################################################
+# Leaderboard Test Cases
+##################################################
+
+@pytest.fixture()
+def leaderboard_meals(meal_data):
+    """Creates four meals with (battles, wins) of (4, 3), (2, 2), (5, 3) and (0, 0), and deletes a fifth."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(1, 6))
+    update_meal_stats_bulk(
+        [(1, 'win')] * 3 + [(1, 'loss')] +
+        [(2, 'win')] * 2 +
+        [(3, 'win')] * 3 + [(3, 'loss')] * 2 +
+        [(5, 'win')] * 9
+    )
+    delete_meal(5)
+
+def test_get_leaderboard_by_wins(leaderboard_meals):
+    """Test sorting by wins, with ties broken by meal ID."""
+    leaderboard = get_leaderboard("wins")
+    assert [meal['id'] for meal in leaderboard] == [1, 3, 2, 4]
+    assert leaderboard[0]['win_pct'] == 75.0
+
+def test_get_leaderboard_by_win_pct(leaderboard_meals):
+    """Test sorting by win percentage."""
+    assert [meal['id'] for meal in get_leaderboard("win_pct")] == [2, 1, 3, 4]
+
+def test_get_leaderboard_by_battles(leaderboard_meals):
+    """Test sorting by the number of battles."""
+    assert [meal['id'] for meal in get_leaderboard("battles")] == [3, 1, 2, 4]
+
+def test_get_leaderboard_limit_offset(leaderboard_meals):
+    """Test paging through the leaderboard with limit and offset."""
+    assert [meal['id'] for meal in get_leaderboard("wins", limit=2, offset=1)] == [3, 2]
+
+def test_get_leaderboard_keyset(leaderboard_meals):
+    """Test paging through the leaderboard with the keyset cursor, including across a tie."""
+    first_page, after = get_leaderboard_page("wins", limit=1)
+    assert after == (3, 1)
+    second_page, after = get_leaderboard_page("wins", limit=2, after=after)
+    third_page, after = get_leaderboard_page("wins", limit=2, after=after)
+    assert [meal['id'] for meal in first_page + second_page + third_page] == [1, 3, 2, 4]
+    assert after is None
+
+def test_get_leaderboard_keyset_after_cursor_meal_moves(leaderboard_meals):
+    """Test that the next page starts where the previous one ended, after its last meal battles."""
+    _, after = get_leaderboard_page("win_pct", limit=1)
+    for _ in range(3):
+        record_battle_result(1, 2)
+
+    # Meal 2 dropped below the cursor, so it shows up again rather than hiding meals 1 and 3
+    assert [meal['id'] for meal in get_leaderboard("win_pct", after=after)] == [1, 3, 2, 4]
+
+def test_get_leaderboard_uses_index(leaderboard_meals):
+    """Test that the leaderboard query is served from an index rather than a sort."""
+    with get_db_connection() as conn:
+        plan = conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM meals WHERE deleted = FALSE ORDER BY win_pct DESC, id ASC LIMIT 10
+        """).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_meals_leaderboard_win_pct" in details
+    assert "TEMP B-TREE" not in details
+
+def test_get_leaderboard_invalid_sort():
+    """Test error when sorting the leaderboard by an unknown field."""
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: price"):
+        get_leaderboard("price")
+
+##################################################
+# Meal Cache Test Cases
+##################################################
+
+def test_get_meal_by_name_cached(meal_data, mocker):
+    """Test that a second lookup by name or ID is served from the cache."""
+    create_meal(**meal_data)
+    meal = get_meal_by_name(meal_data['meal'])
+
+    spy = mocker.patch("meal_max.models.kitchen_model.get_db_connection", side_effect=AssertionError("cache bypassed"))
+    assert get_meal_by_name(meal_data['meal']) is meal
+    assert get_meal_by_id(meal.id) is meal
+    assert spy.call_count == 0
+    assert meal_cache.stats()['hits'] == 2
+
+def test_get_meal_by_id_fresh_sees_other_worker_delete(meal_data):
+    """Test that a fresh lookup by ID reads past the cache and drops the stale name entry."""
+    create_meal(**meal_data)
+    meal = get_meal_by_name(meal_data['meal'])
+
+    other = sqlite3.connect(sql_utils.DB_PATH)
+    other.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal.id,))
+    other.commit()
+    other.close()
+
+    assert get_meal_by_id(meal.id) is meal
+    with pytest.raises(ValueError, match=f"Meal with ID {meal.id} has been deleted"):
+        get_meal_by_id(meal.id, fresh=True)
+    with pytest.raises(ValueError, match="Meal with name Test Meal has been deleted"):
+        get_meal_by_name(meal_data['meal'])
+
+def test_get_meal_by_name_fresh_sees_other_worker_create(meal_data):
+    """Test that a fresh lookup by name reads past a cached not-found and caches the meal."""
+    with pytest.raises(ValueError, match="Meal with name Test Meal not found"):
+        get_meal_by_name(meal_data['meal'])
+
+    other = sqlite3.connect(sql_utils.DB_PATH)
+    other.execute("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Test Meal', 'Italian', 10.0, 'LOW')")
+    other.commit()
+    other.close()
+
+    meal = get_meal_by_name(meal_data['meal'], fresh=True)
+    assert get_meal_by_name(meal_data['meal']) is meal
+    assert get_meal_by_id(meal.id) is meal
+
+def test_not_found_cached_until_created(meal_data):
+    """Test that a cached not-found is dropped when the meal is created."""
+    with pytest.raises(ValueError, match="Meal with name Test Meal not found"):
+        get_meal_by_name(meal_data['meal'])
+    with pytest.raises(ValueError, match="Meal with ID 1 not found"):
+        get_meal_by_id(1)
+
+    create_meal(**meal_data)
+    assert get_meal_by_name(meal_data['meal']).id == 1
+    assert get_meal_by_id(1).meal == meal_data['meal']
+
+def test_not_found_cached_until_bulk_created(meal_data):
+    """Test that cached not-founds by ID and name are dropped when the meals are bulk loaded."""
+    for meal_id in (1, 2):
+        with pytest.raises(ValueError, match=f"Meal with ID {meal_id} not found"):
+            get_meal_by_id(meal_id)
+    with pytest.raises(ValueError, match="Meal with name Meal 2 not found"):
+        get_meal_by_name('Meal 2')
+
+    create_meals_bulk([{**meal_data, 'meal': 'Meal 1'}, {**meal_data, 'meal': 'Meal 2'}])
+
+    assert get_meal_by_id(1).meal == 'Meal 1'
+    assert get_meal_by_id(2).meal == 'Meal 2'
+    assert get_meal_by_name('Meal 2').id == 2
+
+def test_not_found_cached_until_bulk_created_row_by_row(meal_data, mocker):
+    """Test that the row by row fallback of a bulk load also drops cached not-founds by ID."""
+    with pytest.raises(ValueError, match="Meal with ID 2 not found"):
+        get_meal_by_id(2)
+
+    # Another writer inserts 'Meal 1' between the duplicate check and the batch insert
+    class RacingCursor:
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def __getattr__(self, name):
+            return getattr(self.cursor, name)
+
+        def executemany(self, *args):
+            other = sqlite3.connect(sql_utils.DB_PATH)
+            other.execute("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Meal 1', 'Thai', 9.0, 'LOW')")
+            other.commit()
+            other.close()
+            return self.cursor.executemany(*args)
+
+    class RacingConnection:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+        def cursor(self):
+            return RacingCursor(self.conn.cursor())
+
+    original = kitchen_model.get_db_connection
+
+    @contextmanager
+    def racing_connection():
+        with original() as conn:
+            yield RacingConnection(conn)
+
+    mocker.patch.object(kitchen_model, "get_db_connection", racing_connection)
+    result = create_meals_bulk([{**meal_data, 'meal': 'Meal 1'}, {**meal_data, 'meal': 'Meal 2'}])
+
+    assert result['inserted'] == 1
+    assert get_meal_by_id(2).meal == 'Meal 2'
+
+def test_delete_meal_invalidates_cache(meal_data):
+    """Test that deleting a meal drops both of its cache entries."""
+    create_meal(**meal_data)
+    get_meal_by_id(1)
+    delete_meal(1)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_meal_by_id(1)
+    with pytest.raises(ValueError, match="Meal with name Test Meal has been deleted"):
+        get_meal_by_name(meal_data['meal'])
+
+def test_update_meal_stats_invalidates_stale_entry(meal_data):
+    """Test that a stats update on a meal deleted behind the cache's back drops the stale entry."""
+    create_meal(**meal_data)
+    get_meal_by_id(1)
+    with get_db_connection() as conn:
+        conn.execute("UPDATE meals SET deleted = TRUE WHERE id = 1")
+        conn.commit()
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        update_meal_stats(1, 'win')
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_meal_by_id(1)
+
+##################################################
+# Battle Result Test Cases
+##################################################
+
+def test_record_battle_result(meal_data):
+    """Test recording a win and a loss in one statement."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(2))
+    record_battle_result(2, 1)
+
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT id, battles, wins FROM meals ORDER BY id").fetchall()
+    assert rows == [(1, 1, 0), (2, 1, 1)]
+
+def test_record_battle_result_deleted_meal(meal_data):
+    """Test that neither meal is updated when one of them has been deleted."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(2))
+    delete_meal(2)
+
+    with pytest.raises(ValueError, match="Meal with ID 2 has been deleted"):
+        record_battle_result(1, 2)
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT battles FROM meals WHERE id = 1").fetchone() == (0,)
+
+def test_record_battle_result_missing_meal(meal_data):
+    """Test error when the winner does not exist."""
+    create_meal(**meal_data)
+    with pytest.raises(ValueError, match="Meal with ID 999 not found"):
+        record_battle_result(999, 1)
+
+def test_record_battle_result_same_meal():
+    """Test error when a meal is recorded as battling itself."""
+    with pytest.raises(ValueError, match="A meal cannot battle itself: 1"):
+        record_battle_result(1, 1)
+
+
+##################################################
+# Write-Behind Test Cases
+##################################################
+
+@pytest.fixture()
+def write_behind(monkeypatch):
+    """Turns on write-behind mode with a buffer that only flushes when asked to."""
+    buffer = WriteBehindBuffer(kitchen_model.write_stats_deltas, width=2, interval_ms=60000, max_pending=1000)
+    monkeypatch.setattr(kitchen_model, "stats_buffer", buffer)
+    yield buffer
+    buffer.stop()
+
+def test_record_battle_result_buffered(meal_data, write_behind):
+    """Test that buffered results reach the table in one batch on flush."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(3))
+    record_battle_result(2, 1)
+    record_battle_result(2, 3)
+    record_battle_result(1, 3)
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT SUM(battles) FROM meals").fetchone() == (0,)
+
+    assert flush_battle_stats() == 3
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT id, battles, wins FROM meals ORDER BY id").fetchall()
+    assert rows == [(1, 2, 1), (2, 2, 2), (3, 2, 0)]
+    assert write_behind.stats()['pending_results'] == 0
+
+def test_leaderboard_merges_pending_results(leaderboard_meals, write_behind):
+    """Test that the leaderboard counts results that have not been flushed yet."""
+    for _ in range(4):
+        record_battle_result(4, 2)
+
+    leaderboard = get_leaderboard("wins")
+    assert [meal['id'] for meal in leaderboard] == [4, 1, 3, 2]
+    assert leaderboard[0]['battles'] == 4
+    assert leaderboard[0]['win_pct'] == 100.0
+    assert leaderboard[-1]['win_pct'] == 33.3
+
+    flush_battle_stats()
+    assert get_leaderboard("wins") == leaderboard
+
+def test_leaderboard_first_page_includes_pending_meals(leaderboard_meals, write_behind):
+    """Test that a buffered meal ranked below the fetched page still climbs into it."""
+    for _ in range(4):
+        record_battle_result(4, 2)
+
+    leaderboard = get_leaderboard("wins", limit=2)
+    assert [meal['id'] for meal in leaderboard] == [4, 1]
+    assert leaderboard[0]['wins'] == 4
+
+def test_flush_drops_deleted_meals(meal_data, write_behind):
+    """Test that a meal deleted before the flush does not hold back the rest of the batch."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(2))
+    record_battle_result(1, 2)
+    delete_meal(2)
+
+    flush_battle_stats()
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT id, battles, wins FROM meals ORDER BY id").fetchall()
+    assert rows == [(1, 1, 1), (2, 0, 0)]
+
+def test_buffered_battles_flushed_with_stats(meal_data, write_behind):
+    """Test that buffered battles reach the history in the same flush as the stats."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(2))
+    record_battle_result(1, 2, battle=BattleRecord(1, 2, 40.0, 20.0, 0.2, 0.1, 1))
+    assert get_battle_history(1) == []
+
+    flush_battle_stats()
+    assert [battle['winner_id'] for battle in get_battle_history(1)] == [1]
+
+
+##################################################
+# Battle History Test Cases
+##################################################
+
+@pytest.fixture()
+def battle_history(meal_data):
+    """Creates three meals and records six battles between them, two per pair."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(3))
+    for meal_1, meal_2 in [(1, 2), (2, 1), (1, 3), (3, 2), (2, 3), (3, 1)]:
+        record_battle_result(meal_1, meal_2, battle=BattleRecord(meal_1, meal_2, 40.0, 20.0, 0.2, 0.1, meal_1))
+
+def test_record_battle_result_appends_history(battle_history):
+    """Test that each battle is stored with its combatants, scores and winner."""
+    battle = get_battle_history(1, limit=1)[0]
+    assert battle['id'] == 6
+    assert (battle['meal_1_id'], battle['meal_2_id'], battle['winner_id']) == (3, 1, 3)
+    assert (battle['score_1'], battle['score_2'], battle['delta'], battle['random_number']) == (40.0, 20.0, 0.2, 0.1)
+    assert battle['created_at']
+
+def test_failed_battle_not_in_history(meal_data):
+    """Test that a battle rejected for a deleted meal leaves no history behind."""
+    create_meals_bulk({**meal_data, 'meal': f'Meal {i}'} for i in range(2))
+    delete_meal(2)
+    with pytest.raises(ValueError):
+        record_battle_result(1, 2, battle=BattleRecord(1, 2, 40.0, 20.0, 0.2, 0.1, 1))
+    assert get_battle_history(1) == []
+
+def test_get_battle_history_keyset(battle_history):
+    """Test paging through a meal's battles from either side, newest first."""
+    first_page = get_battle_history(2, limit=3)
+    second_page = get_battle_history(2, limit=3, before_id=first_page[-1]['id'])
+    assert [battle['id'] for battle in first_page] == [5, 4, 2]
+    assert [battle['id'] for battle in second_page] == [1]
+
+def test_get_head_to_head(battle_history):
+    """Test that head-to-head finds the pair in either combatant order."""
+    assert [battle['id'] for battle in get_head_to_head(3, 2)] == [5, 4]
+    assert [battle['id'] for battle in get_head_to_head(2, 3, limit=1, before_id=5)] == [4]
+    assert get_head_to_head_summary(3, 2) == {'battles': 2, 'a_wins': 1, 'b_wins': 1}
+
+def test_head_to_head_uses_index(battle_history):
+    """Test that the head-to-head page is served from the pair index rather than a sort."""
+    with get_db_connection() as conn:
+        plan = conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM battles WHERE pair_low = 2 AND pair_high = 3 AND id < 100 ORDER BY id DESC LIMIT 10
+        """).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_battles_pair" in details
+    assert "TEMP B-TREE" not in details
+
+def test_get_battle_history_invalid_limit():
+    """Test error when asking for an empty page."""
+    with pytest.raises(ValueError, match="Invalid limit: 0. Must be at least 1."):
+        get_battle_history(1, limit=0)
+
+##################################################
+# Meal Search Test Cases
+##################################################
+
+@pytest.fixture()
+def search_catalog():
+    """Creates meals whose names and cuisines overlap."""
+    create_meals_bulk([
+        {'meal': 'Chicken Tikka Masala', 'cuisine': 'Indian', 'price': 12.0, 'difficulty': 'MED'},
+        {'meal': 'Chicken Parmesan', 'cuisine': 'Italian', 'price': 14.0, 'difficulty': 'MED'},
+        {'meal': 'Tikka Paneer', 'cuisine': 'Indian', 'price': 11.0, 'difficulty': 'LOW'},
+        {'meal': 'Crème Brûlée', 'cuisine': 'French', 'price': 8.0, 'difficulty': 'HIGH'},
+    ])
+
+def test_search_meals_prefix_matches_last_word(search_catalog):
+    """Test that every word must match and the last word may be a prefix."""
+    assert [meal['meal'] for meal in search_meals("chicken tik")] == ['Chicken Tikka Masala']
+    assert {meal['meal'] for meal in search_meals("chick")} == {'Chicken Tikka Masala', 'Chicken Parmesan'}
+    assert search_meals("chick tikka") == []
+
+def test_search_meals_ranks_name_above_cuisine(search_catalog):
+    """Test that a name match outranks a cuisine match."""
+    create_meal('Indian Summer Salad', 'Fusion', 9.0, 'LOW')
+    # bm25 gives no weight to a word that most meals contain
+    create_meals_bulk({'meal': f'Filler {i}', 'cuisine': 'Greek', 'price': 5.0, 'difficulty': 'LOW'} for i in range(20))
+
+    results = search_meals("indian")
+    assert results[0]['meal'] == 'Indian Summer Salad'
+    assert results[0]['score'] < results[1]['score']
+
+def test_search_meals_ignores_diacritics_and_operators(search_catalog):
+    """Test that accents are folded and FTS5 syntax in the query is matched literally."""
+    assert [meal['meal'] for meal in search_meals("creme brul")] == ['Crème Brûlée']
+    assert search_meals('tikka" OR "chicken') == []
+
+def test_search_meals_excludes_deleted(search_catalog):
+    """Test that deleted meals drop out of the search index."""
+    delete_meal(1)
+
+    assert [meal['id'] for meal in search_meals("tikka")] == [3]
+
+def test_search_meals_follows_renames(search_catalog):
+    """Test that the search index follows updates to the name and cuisine."""
+    with get_db_connection() as conn:
+        conn.execute("UPDATE meals SET meal = 'Butter Chicken' WHERE id = 1")
+        conn.commit()
+
+    assert [meal['id'] for meal in search_meals("tikka")] == [3]
+    assert [meal['id'] for meal in search_meals("butter")] == [1]
+
+def test_search_meals_stats_update_skips_index(search_catalog):
+    """Test that battle stats updates leave the search index alone."""
+    update_meal_stats(1, 'win')
+
+    assert [meal['id'] for meal in search_meals("masala")] == [1]
+
+def test_search_meals_pagination(search_catalog):
+    """Test that pages follow the ranking without overlap."""
+    everything = search_meals("indian")
+    assert search_meals("indian", limit=1) + search_meals("indian", limit=1, offset=1) == everything
+
+def test_search_meals_broad_query_unranked(search_catalog, monkeypatch):
+    """Test that queries matching too many meals come back unranked in catalog order."""
+    monkeypatch.setattr(kitchen_model, "SEARCH_RANK_MAX", 1)
+
+    results = search_meals("indian")
+    assert [meal['id'] for meal in results] == [1, 3]
+    assert results[0]['score'] is None
+
+def test_search_meals_empty_query():
+    """Test error when the query has no words."""
+    with pytest.raises(ValueError, match="at least one letter or digit"):
+        search_meals(" -*- ")
+
+
+##################################################
+# Data Version Test Cases
+##################################################
+
+def test_data_version_unchanged_by_reads(meal_data):
+    """Test that reads leave the data version alone."""
+    create_meal(**meal_data)
+    version = get_data_version()
+
+    get_meal_by_id(1)
+    get_leaderboard()
+
+    assert get_data_version() == version
+
+def test_data_version_moves_on_writes(meal_data):
+    """Test that every kind of write moves the data version."""
+    create_meal(**meal_data)
+    create_meal('Other Meal', 'Thai', 9.0, 'LOW')
+    versions = [get_data_version()]
+
+    update_meal_stats(1, 'win')
+    versions.append(get_data_version())
+    record_battle_result(1, 2)
+    versions.append(get_data_version())
+    update_meal_stats_bulk([(1, 'loss'), (2, 'win')])
+    versions.append(get_data_version())
+    delete_meal(2)
+    versions.append(get_data_version())
+
+    assert len(set(versions)) == len(versions)
+
+def test_data_version_moves_on_buffered_results(meal_data, monkeypatch):
+    """Test that results held in the write-behind buffer move the data version before they are flushed."""
+    buffer = WriteBehindBuffer(kitchen_model.write_stats_deltas, width=2, interval_ms=60000, max_pending=1000)
+    monkeypatch.setattr(kitchen_model, "stats_buffer", buffer)
+    create_meal(**meal_data)
+    create_meal('Other Meal', 'Thai', 9.0, 'LOW')
+    version = get_data_version()
+
+    record_battle_result(1, 2)
+
+    assert get_data_version() != version
+
+def test_data_version_moves_on_writes_by_other_processes(meal_data):
+    """Test that a commit made outside this module, as another worker would, moves the data version."""
+    create_meal(**meal_data)
+    version = get_data_version()
+
+    conn = sqlite3.connect(sql_utils.DB_PATH)
+    conn.execute("UPDATE meals SET wins = 5 WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    assert get_data_version() != version
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from loadtest import MealMaxScenario
+from meal_max.utils import sql_utils
+from meal_max.utils.loadtest_harness import Recorder, run_load, summarize
+from meal_max.utils.migrations import migrate
+from meal_max.utils.random_utils import RandomPool, local_random, set_random_pool
+
+
+@pytest.fixture
+def base_url(tmp_path, monkeypatch):
+    """Serves the app from a background thread against a fresh database."""
+    db_path = str(tmp_path / "meal_max.db")
+    migrate(db_path)
+    monkeypatch.setattr(sql_utils, "DB_PATH", db_path)
+    set_random_pool(RandomPool(lambda num: [local_random() for _ in range(num)], background=False))
+
+    from app import app
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+    set_random_pool(None)
+    sql_utils.close_pool()
+
+
+##################################################
+# Report Test Cases
+##################################################
+
+def test_summarize():
+    """Test the counts, throughput and percentiles of a route summary."""
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=5, elapsed=2.0)
+
+    assert summary['requests'] == 100
+    assert summary['error_rate'] == 0.05
+    assert summary['throughput_rps'] == 50.0
+    assert summary['p50_ms'] == 50.0
+    assert summary['p99_ms'] == 99.0
+    assert summary['max_ms'] == 100.0
+
+def test_summarize_no_requests():
+    """Test that a route without requests summarizes to zeros."""
+    summary = summarize([], errors=0, elapsed=1.0)
+
+    assert summary['requests'] == 0
+    assert summary['p99_ms'] == 0.0
+
+def test_recorder_counts_errors_by_route():
+    """Test that failed and 4xx/5xx requests count as errors of their own route."""
+    recorder = Recorder()
+    recorder.record("GET /a", 0.01, 200)
+    recorder.record("GET /a", 0.02, 500)
+    recorder.record("GET /b", 0.03, None)
+
+    report = recorder.report(elapsed=1.0)
+
+    assert report['routes']['GET /a']['errors'] == 1
+    assert report['routes']['GET /a']['statuses'] == {'200': 1, '500': 1}
+    assert report['routes']['GET /b']['statuses'] == {'failed': 1}
+    assert report['totals']['requests'] == 3
+    assert report['totals']['errors'] == 2
+
+
+##################################################
+# Load Run Test Cases
+##################################################
+
+def test_run_load_against_app(base_url):
+    """Test a short run of the meal_max mix against the live app."""
+    report = run_load(MealMaxScenario(meals=10), base_url, concurrency=4, duration=5, max_requests=200)
+
+    assert report['totals']['requests'] >= 200
+    assert report['totals']['errors'] == 0
+    assert "GET /arenas/<arena_id>/battle" in report['routes']
+    assert "GET /leaderboard" in report['routes']
+
+def test_run_load_invalid_concurrency():
+    """Test that a run needs at least one worker."""
+    with pytest.raises(ValueError, match="Invalid concurrency"):
+        run_load(MealMaxScenario(), "http://127.0.0.1:9/api", concurrency=0)
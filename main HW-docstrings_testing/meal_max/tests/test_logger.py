@@ -0,0 +1,61 @@
+import io
+import logging
+
+import pytest
+
+from meal_max.utils import logger as logger_module
+from meal_max.utils.logger import SamplingFilter, configure_logger, get_queue_handler, parse_sample_rates
+
+
+def make_record(level):
+    """Returns a log record at the given level."""
+    return logging.LogRecord("test", level, __file__, 1, "message", None, None)
+
+
+##################################################
+# Logger Test Cases
+##################################################
+
+def test_configure_logger_once():
+    """Test that configuring a logger twice does not add a second handler."""
+    logger = logging.getLogger("meal_max.tests.configure_once")
+    configure_logger(logger)
+    configure_logger(logger)
+
+    assert logger.handlers == [get_queue_handler()]
+    assert logger.level == logging.INFO
+
+def test_records_reach_stream_through_queue():
+    """Test that records are written by the listener thread, not the caller."""
+    logger = logging.getLogger("meal_max.tests.queue")
+    configure_logger(logger)
+    stream = io.StringIO()
+    previous = logger_module._stream_handler.setStream(stream)
+    try:
+        logger.warning("queued %s", "message")
+        # Stopping the listener drains the queue
+        logger_module._listener.stop()
+        logger_module._start_listener()
+    finally:
+        logger_module._stream_handler.setStream(previous)
+    assert "meal_max.tests.queue - WARNING - queued message" in stream.getvalue()
+
+def test_sampling_filter(monkeypatch):
+    """Test that INFO records are sampled while warnings always pass."""
+    draws = iter([0.05, 0.5])
+    monkeypatch.setattr("meal_max.utils.logger.random.random", lambda: next(draws))
+    sampling_filter = SamplingFilter(0.1)
+
+    assert sampling_filter.filter(make_record(logging.INFO))
+    assert not sampling_filter.filter(make_record(logging.INFO))
+    assert sampling_filter.filter(make_record(logging.WARNING))
+
+def test_parse_sample_rates():
+    """Test parsing per-logger sample rates."""
+    assert parse_sample_rates("a=0.1, b.c=1") == {'a': 0.1, 'b.c': 1.0}
+    assert parse_sample_rates("") == {}
+
+def test_parse_sample_rates_invalid():
+    """Test error when a sample rate is out of range."""
+    with pytest.raises(ValueError, match="Invalid log sample rate: a=2. Must be between 0 and 1."):
+        parse_sample_rates("a=2")
@@ -0,0 +1,178 @@
+import time
+
+from flask import Flask
+import pytest
+import requests
+
+from meal_max.utils.metrics import Histogram, MetricsRegistry, instrument_app, metrics
+from meal_max.utils.random_utils import RandomOrgProvider
+from meal_max.utils import sql_utils
+
+
+@pytest.fixture
+def registry():
+    """Provides an empty metrics registry."""
+    return MetricsRegistry()
+
+@pytest.fixture
+def client():
+    """Provides a test client for an instrumented app with one route."""
+    app = Flask(__name__)
+    instrument_app(app)
+
+    @app.route('/items/<int:item_id>')
+    def get_item(item_id):
+        return {'id': item_id}
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError("boom")
+
+    return app.test_client()
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Points the shared pool at a fresh database file and closes it afterwards."""
+    path = str(tmp_path / "meal_max.db")
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    yield path
+    sql_utils.close_pool()
+
+
+def sample(name, labels=""):
+    """Returns the value of a series on the global registry's metrics page."""
+    for line in metrics.render().splitlines():
+        if line.startswith(f"{name}{labels} "):
+            return float(line.split()[-1])
+    return 0.0
+
+
+##################################################
+# Registry Test Cases
+##################################################
+
+def test_histogram_buckets():
+    """Test that observations land in the first bucket whose bound is not below them."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(5.65)
+
+def test_render_histogram_is_cumulative(registry):
+    """Test that histogram buckets are rendered cumulatively with a +Inf bucket."""
+    registry.observe("latency_seconds", 0.0001, (('route', '/a'),))
+    registry.observe("latency_seconds", 0.3, (('route', '/a'),))
+    page = registry.render()
+
+    assert "# TYPE latency_seconds histogram" in page
+    assert 'latency_seconds_bucket{route="/a",le="0.0005"} 1' in page
+    assert 'latency_seconds_bucket{route="/a",le="0.5"} 2' in page
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in page
+    assert 'latency_seconds_count{route="/a"} 2' in page
+
+def test_render_counter_with_help(registry):
+    """Test that counters are rendered with their help and type."""
+    registry.describe("failures_total", "Failed things.")
+    registry.inc("failures_total", (('reason', 'timeout'),))
+    registry.inc("failures_total", (('reason', 'timeout'),), amount=2)
+    page = registry.render()
+
+    assert "# HELP failures_total Failed things." in page
+    assert "# TYPE failures_total counter" in page
+    assert 'failures_total{reason="timeout"} 3' in page
+
+def test_render_escapes_label_values(registry):
+    """Test that quotes and backslashes in label values are escaped."""
+    registry.inc("requests_total", (('route', 'a"b\\c'),))
+
+    assert 'requests_total{route="a\\"b\\\\c"} 1' in registry.render()
+
+def test_timer_records_on_error(registry):
+    """Test that the timer records the duration even when the block raises."""
+    with pytest.raises(RuntimeError):
+        with registry.timer("work_seconds"):
+            raise RuntimeError("boom")
+
+    assert "work_seconds_count 1" in registry.render()
+
+def test_observe_overhead(registry):
+    """Test that recording into an existing series stays within a few microseconds."""
+    labels = (('route', '/api/get-meal-by-id/<int:meal_id>'), ('method', 'GET'))
+    registry.observe("latency_seconds", 0.001, labels)
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        registry.observe("latency_seconds", 0.001, labels)
+    per_call = (time.perf_counter() - start) / 10000
+
+    assert per_call < 20e-6
+
+
+##################################################
+# Instrumentation Test Cases
+##################################################
+
+def test_requests_labelled_by_route_template(client):
+    """Test that requests are counted by route template, not by path."""
+    labels = '{route="/items/<int:item_id>",method="GET",status="200"}'
+    before = sample("http_requests_total", labels)
+
+    client.get('/items/1')
+    client.get('/items/2')
+
+    assert sample("http_requests_total", labels) == before + 2
+
+def test_unmatched_requests_share_a_series(client):
+    """Test that requests for unknown paths do not create a series per path."""
+    labels = '{route="unmatched",method="GET",status="404"}'
+    before = sample("http_requests_total", labels)
+
+    client.get('/nope/1')
+    client.get('/nope/2')
+
+    assert sample("http_requests_total", labels) == before + 2
+
+@pytest.mark.parametrize("propagate", [False, True])
+def test_unhandled_exception_recorded_as_500(client, propagate):
+    """Test that a request ending in an unhandled exception is timed and counted as a 500."""
+    client.application.config['PROPAGATE_EXCEPTIONS'] = propagate
+    labels = '{route="/fail",method="GET"}'
+    timed = sample("http_request_duration_seconds_count", labels)
+    counted = sample("http_requests_total", '{route="/fail",method="GET",status="500"}')
+
+    if propagate:
+        with pytest.raises(RuntimeError):
+            client.get('/fail')
+    else:
+        assert client.get('/fail').status_code == 500
+
+    assert sample("http_request_duration_seconds_count", labels) == timed + 1
+    assert sample("http_requests_total", '{route="/fail",method="GET",status="500"}') == counted + 1
+
+def test_db_connection_timed(db_path):
+    """Test that acquiring and holding a database connection are both recorded."""
+    acquired = sample("db_connection_acquire_seconds_count")
+    held = sample("db_connection_hold_seconds_count")
+
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("SELECT 1")
+
+    assert sample("db_connection_acquire_seconds_count") == acquired + 1
+    assert sample("db_connection_hold_seconds_count") == held + 1
+
+def test_random_provider_failures_counted(mocker):
+    """Test that provider latency and failures are recorded by reason."""
+    session = mocker.Mock()
+    session.get.side_effect = requests.exceptions.Timeout
+    provider = RandomOrgProvider(session=session)
+    requests_before = sample("random_provider_request_seconds_count")
+    failures_before = sample("random_provider_failures_total", '{reason="timeout"}')
+
+    with pytest.raises(RuntimeError):
+        provider(1)
+
+    assert sample("random_provider_request_seconds_count") == requests_before + 1
+    assert sample("random_provider_failures_total", '{reason="timeout"}') == failures_before + 1
@@ -0,0 +1,198 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.utils.migrations import get_schema_version, load_migrations, migrate, split_statements
+
+
+BASELINE_SCHEMA = """
+CREATE TABLE meals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    meal TEXT NOT NULL UNIQUE,
+    cuisine TEXT NOT NULL,
+    price REAL NOT NULL,
+    difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
+    battles INTEGER DEFAULT 0,
+    wins INTEGER DEFAULT 0,
+    deleted BOOLEAN DEFAULT FALSE
+);
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide the path of a database that does not exist yet."""
+    return str(tmp_path / "meal_max.db")
+
+
+def write_migrations(directory, *scripts):
+    """Writes the scripts as migrations 1, 2, 3 and so on."""
+    directory.mkdir(exist_ok=True)
+    for number, script in enumerate(scripts, start=1):
+        (directory / f"{number:04d}_step.sql").write_text(script)
+    return str(directory)
+
+
+##################################################
+# Migration Loading Test Cases
+##################################################
+
+def test_load_migrations_in_order():
+    """Test that the shipped migrations are numbered from 1 without gaps."""
+    migrations = load_migrations()
+
+    assert [number for number, _ in migrations] == list(range(1, len(migrations) + 1))
+
+def test_load_migrations_gap(tmp_path):
+    """Test error when a migration number is skipped."""
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    (directory / "0001_first.sql").write_text("SELECT 1;")
+    (directory / "0003_third.sql").write_text("SELECT 1;")
+
+    with pytest.raises(ValueError, match="expected number 2"):
+        load_migrations(str(directory))
+
+def test_split_statements_keeps_triggers_whole():
+    """Test that a trigger body is not split at its inner semicolons."""
+    statements = split_statements("""
+        -- a comment
+        CREATE TABLE t (x);
+        CREATE TRIGGER t_insert AFTER INSERT ON t BEGIN
+            SELECT 1;
+            SELECT 2;
+        END;
+    """)
+
+    assert len(statements) == 2
+    assert statements[1].endswith("END;")
+
+def test_split_statements_incomplete():
+    """Test error when a script ends in the middle of a statement."""
+    with pytest.raises(ValueError, match="Incomplete SQL statement"):
+        split_statements("CREATE TABLE t (x);\nINSERT INTO t VALUES (1)")
+
+
+##################################################
+# Migrate Test Cases
+##################################################
+
+def test_migrate_fresh_database(db_path):
+    """Test that a new database gets every table and the latest schema version."""
+    version = migrate(db_path)
+
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert version == len(load_migrations())
+    assert get_schema_version(conn) == version
+    assert {'meals', 'battles', 'arenas', 'meals_fts'} <= tables
+    conn.close()
+
+def test_migrate_is_idempotent(db_path):
+    """Test that migrating an up to date database changes nothing."""
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Meal 1', 'Italian', 12.5, 'MED')")
+    conn.commit()
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+
+    migrate(db_path)
+
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+    assert conn.execute("SELECT COUNT(*) FROM meals").fetchone()[0] == 1
+    conn.close()
+
+def test_migrate_baseline_database_keeps_data(db_path):
+    """Test that a database created before migrations is upgraded in place."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins) VALUES ('Pad Thai', 'Thai', 9.0, 'LOW', 4, 3)")
+    conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty, deleted) VALUES ('Old Stew', 'Irish', 7.0, 'LOW', TRUE)")
+    conn.commit()
+
+    migrate(db_path)
+
+    assert conn.execute("SELECT meal, win_pct, rating FROM meals WHERE id = 1").fetchone() == ('Pad Thai', 0.75, 1500)
+    # Existing meals are searchable, deleted ones are not
+    assert conn.execute("SELECT rowid FROM meals_fts WHERE meals_fts MATCH 'thai OR irish'").fetchall() == [(1,)]
+    conn.close()
+
+def test_migrate_only_pending(db_path, tmp_path):
+    """Test that only migrations newer than the schema version run."""
+    directory = write_migrations(tmp_path / "migrations", "CREATE TABLE a (x);")
+    assert migrate(db_path, directory) == 1
+
+    write_migrations(tmp_path / "migrations", "CREATE TABLE a (x);", "CREATE TABLE b (x);")
+    assert migrate(db_path, directory) == 2
+
+def test_migrate_failure_rolls_back(db_path, tmp_path):
+    """Test that a failing migration leaves neither its changes nor a version bump behind."""
+    directory = write_migrations(tmp_path / "migrations", "CREATE TABLE a (x);", "CREATE TABLE b (x);\nINSERT INTO missing VALUES (1);")
+
+    with pytest.raises(sqlite3.Error):
+        migrate(db_path, directory)
+
+    conn = sqlite3.connect(db_path)
+    assert get_schema_version(conn) == 1
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'b'").fetchone()[0] == 0
+    conn.close()
+
+def test_migrate_newer_database(db_path, tmp_path):
+    """Test that a database newer than the migrations is left alone."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA user_version = 99")
+    conn.close()
+
+    assert migrate(db_path, write_migrations(tmp_path / "migrations", "CREATE TABLE a (x);")) == 99
+
+def test_migrate_concurrently(db_path):
+    """Test that processes migrating at the same time apply each migration once."""
+    errors = []
+
+    def run():
+        try:
+            migrate(db_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    conn = sqlite3.connect(db_path)
+    assert get_schema_version(conn) == len(load_migrations())
+    conn.close()
+
+
+##################################################
+# Index Test Cases
+##################################################
+
+@pytest.mark.parametrize("column", ['wins', 'win_pct', 'battles', 'rating'])
+def test_leaderboard_uses_partial_index(db_path, column):
+    """Test that every leaderboard sort reads its partial index instead of sorting."""
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+
+    plan = " ".join(row[3] for row in conn.execute(f"""
+        EXPLAIN QUERY PLAN
+        SELECT id FROM meals WHERE deleted = FALSE ORDER BY {column} DESC, id ASC LIMIT 10
+    """))
+
+    assert f"idx_meals_leaderboard_{column}" in plan
+    assert "TEMP B-TREE" not in plan
+    conn.close()
+
+def test_lookup_by_name_uses_index(db_path):
+    """Test that looking a meal up by name reads the unique index on meals(meal)."""
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+
+    plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN SELECT id FROM meals WHERE meal = 'x'"))
+
+    assert "USING COVERING INDEX sqlite_autoindex_meals_1" in plan or "USING INDEX sqlite_autoindex_meals_1" in plan
+    conn.close()
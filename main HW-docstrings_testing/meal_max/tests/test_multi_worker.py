@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+from meal_max.utils.migrations import migrate
+
+pytest.importorskip("gunicorn")
+
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..")
+WORKERS = 4
+
+
+@pytest.fixture(scope="module")
+def base_url(tmp_path_factory):
+    """Starts the app under gunicorn with several workers sharing one database."""
+    db_path = str(tmp_path_factory.mktemp("multi_worker") / "meal_max.db")
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)",
+        [('Meal 1', 'Italian', 12.5, 'MED'), ('Meal 2', 'Thai', 9.0, 'LOW')]
+    )
+    conn.commit()
+    conn.close()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    env = {
+        **os.environ,
+        'DB_PATH': db_path,
+        'ARENA_BACKEND': 'sqlite',
+        # Nothing listens here, so random numbers come from the local fallback
+        'RANDOM_ORG_URL': 'http://127.0.0.1:9/',
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--workers", str(WORKERS), "--bind", f"127.0.0.1:{port}", "app:app"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}/api"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"{url}/health", timeout=5)
+                break
+            except requests.exceptions.RequestException:
+                time.sleep(0.1)
+        else:
+            pytest.fail("gunicorn did not start")
+        yield url, db_path
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+##################################################
+# Multi-Worker Test Cases
+##################################################
+
+def test_arenas_across_workers(base_url):
+    """Test prepping and battling many arenas concurrently, each request landing on any worker."""
+    url, db_path = base_url
+
+    def play(arena_id):
+        statuses = []
+        for meal in ('Meal 1', 'Meal 2'):
+            statuses.append(requests.post(f"{url}/arenas/{arena_id}/prep-combatant", json={'meal': meal}).status_code)
+        battle = requests.get(f"{url}/arenas/{arena_id}/battle")
+        statuses.append(battle.status_code)
+        combatants = requests.get(f"{url}/arenas/{arena_id}/get-combatants").json()['combatants']
+        return statuses, battle.json().get('winner'), combatants
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(play, [f"arena-{i}" for i in range(32)]))
+
+    for statuses, winner, combatants in results:
+        assert statuses == [200, 200, 200]
+        assert [combatant['meal'] for combatant in combatants] == [winner]
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT SUM(battles) FROM meals").fetchone() == (64,)
+        assert conn.execute("SELECT COUNT(*) FROM battles").fetchone() == (32,)
+
+def test_same_arena_across_workers(base_url):
+    """Test that concurrent preps of one arena from several workers never overfill it."""
+    url, _ = base_url
+
+    def prep(i):
+        return requests.post(f"{url}/arenas/contested/prep-combatant", json={'meal': f'Meal {i % 2 + 1}'}).status_code
+
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        statuses = list(executor.map(prep, range(12)))
+
+    assert statuses.count(200) == 2
+    combatants = requests.get(f"{url}/arenas/contested/get-combatants").json()['combatants']
+    assert len(combatants) == 2
@@ -1,6 +1,12 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import threading
+from urllib.parse import parse_qs, urlparse
+
 import pytest
+import requests
 from unittest.mock import patch
-from meal_max.utils.random_utils import get_random
+
+from meal_max.utils.random_utils import RandomOrgProvider, RandomPool, get_random, get_random_numbers, set_random_pool
 
 
 @pytest.fixture
@@ -9,40 +15,211 @@ def mock_response():
     return "0.75"  # Example random number as a string
 
 
-@patch('meal_max.utils.random_utils.requests.get')
+@pytest.fixture
+def stub_pool():
+    """Installs a pool backed by a stub provider that counts up from 0.01."""
+    calls = []
+
+    def provider(num):
+        calls.append(num)
+        return [round((i % 100) / 100, 2) for i in range(1, num + 1)]
+
+    pool = RandomPool(provider, capacity=10, low_water=3, fallback=False, background=False)
+    set_random_pool(pool)
+    yield pool, calls
+    set_random_pool(None)
+
+
+##################################################
+# Provider Test Cases
+##################################################
+
+@patch('meal_max.utils.random_utils.requests.Session.get')
 def test_get_random_success(mock_get, mock_response):
     """Test fetching a random number successfully."""
     mock_get.return_value.text = mock_response
     mock_get.return_value.status_code = 200
 
-    random_number = get_random()
-    assert random_number == 0.75
+    random_numbers = RandomOrgProvider()(1)
+    assert random_numbers == [0.75]
     mock_get.assert_called_once()  # Ensure the request was made
 
 
-@patch('meal_max.utils.random_utils.requests.get')
+@patch('meal_max.utils.random_utils.requests.Session.get')
 def test_get_random_invalid_response(mock_get):
     """Test error handling when the response cannot be converted to a float."""
     mock_get.return_value.text = "invalid"
     mock_get.return_value.status_code = 200
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid"):
-        get_random()
+        RandomOrgProvider()(1)
 
 
-@patch('meal_max.utils.random_utils.requests.get')
+@patch('meal_max.utils.random_utils.requests.Session.get')
 def test_get_random_timeout(mock_get):
     """Test error handling for a timeout exception."""
     mock_get.side_effect = requests.exceptions.Timeout
 
     with pytest.raises(RuntimeError, match="Request to random.org timed out."):
-        get_random()
+        RandomOrgProvider()(1)
 
 
-@patch('meal_max.utils.random_utils.requests.get')
+@patch('meal_max.utils.random_utils.requests.Session.get')
 def test_get_random_request_exception(mock_get):
     """Test error handling for a generic request exception."""
     mock_get.side_effect = requests.exceptions.RequestException("Connection error")
 
     with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
-        get_random()
+        RandomOrgProvider()(1)
+
+
+@patch('meal_max.utils.random_utils.requests.Session.get')
+def test_get_random_numbers_short_response(mock_get):
+    """Test error handling when random.org returns fewer numbers than requested."""
+    mock_get.return_value.text = "0.10\n"
+    mock_get.return_value.status_code = 200
+
+    with pytest.raises(ValueError, match="Expected 2 numbers from random.org, got 1"):
+        RandomOrgProvider()(2)
+
+
+def test_provider_against_local_server():
+    """Test the provider against a local stub server speaking the random.org API."""
+    requests_seen = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            num = int(parse_qs(urlparse(self.path).query)['num'][0])
+            requests_seen.append(num)
+            body = "\n".join("0.42" for _ in range(num)).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        provider = RandomOrgProvider(url=f"http://127.0.0.1:{server.server_port}/decimal-fractions/")
+        assert provider(3) == [0.42, 0.42, 0.42]
+        assert provider(2) == [0.42, 0.42]
+        assert requests_seen == [3, 2]
+    finally:
+        server.shutdown()
+
+
+##################################################
+# Random Pool Test Cases
+##################################################
+
+def test_get_random_from_pool(stub_pool):
+    """Test that get_random serves numbers from one bulk refill."""
+    pool, calls = stub_pool
+
+    assert [get_random() for _ in range(3)] == [0.01, 0.02, 0.03]
+    assert calls == [10]
+
+    stats = pool.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['refills'] == 1
+    assert stats['size'] == 7
+
+
+def test_get_random_numbers_from_pool(stub_pool):
+    """Test taking a batch that is larger than the pool capacity."""
+    pool, calls = stub_pool
+
+    numbers = get_random_numbers(25)
+    assert len(numbers) == 25
+    assert calls == [25]
+
+
+def test_pool_fallback_when_provider_down():
+    """Test that the local CSPRNG is used when the provider fails and fallback is on."""
+    def provider(num):
+        raise RuntimeError("Request to random.org failed: down")
+
+    pool = RandomPool(provider, capacity=10, low_water=3, fallback=True, background=False)
+    number = pool.get()
+
+    assert 0 <= number < 1
+    assert round(number, 2) == number
+    stats = pool.stats()
+    assert stats['fallbacks'] == 1
+    assert stats['refill_failures'] == 1
+
+
+def test_pool_no_fallback_when_provider_down():
+    """Test error when the provider fails and fallback is off."""
+    def provider(num):
+        raise RuntimeError("Request to random.org failed: down")
+
+    pool = RandomPool(provider, capacity=10, low_water=3, fallback=False, background=False)
+    with pytest.raises(RuntimeError, match="Request to random.org failed: down"):
+        pool.get()
+
+
+def test_pool_background_refill():
+    """Test that dropping below the low-water mark refills the pool on the background thread."""
+    requests_made = []
+    refilled = threading.Event()
+
+    def provider(num):
+        requests_made.append(num)
+        if len(requests_made) == 2:
+            refilled.set()
+        return [0.5] * num
+
+    pool = RandomPool(provider, capacity=4, low_water=2, fallback=True, background=True)
+    try:
+        # The pool starts empty, so the first draws refill it inline
+        assert pool.get_many(3) == [0.5, 0.5, 0.5]
+        # One number is left, below the low-water mark, which wakes the refill thread
+        assert refilled.wait(timeout=5)
+        pool.stop()
+        assert requests_made == [4, 3]
+        stats = pool.stats()
+        assert stats['size'] == 4
+        assert stats['inline_refills'] == 1
+        assert stats['fallbacks'] == 0
+    finally:
+        pool.stop()
+
+
+def test_pool_cold_start_waits_for_provider():
+    """Test that a new pool draws its first number from the provider, not the fallback."""
+    pool = RandomPool(lambda num: [0.42] * num, capacity=10, low_water=3, fallback=True, background=True)
+    try:
+        assert pool.get() == 0.42
+        assert pool.stats()['fallbacks'] == 0
+    finally:
+        pool.stop()
+
+
+def test_pool_fallback_without_waiting_after_failure():
+    """Test that after a failed refill an empty pool falls back instead of waiting on the provider again."""
+    requests_made = []
+
+    def provider(num):
+        requests_made.append(num)
+        raise RuntimeError("Request to random.org failed: down")
+
+    pool = RandomPool(provider, capacity=10, low_water=0, fallback=True, background=False)
+    pool.get()
+    pool.get()
+
+    assert requests_made == [10]
+    stats = pool.stats()
+    assert stats['inline_refills'] == 1
+    assert stats['fallbacks'] == 2
+
+
+def test_invalid_low_water():
+    """Test error when the low-water mark is above capacity."""
+    with pytest.raises(ValueError, match="Invalid low-water mark: 11"):
+        RandomPool(lambda num: [], capacity=10, low_water=11)
@@ -0,0 +1,111 @@
+import pytest
+
+from meal_max.models.kitchen_model import BattleRecord, create_meals_bulk, get_leaderboard, meal_cache, record_battle_result, update_meal_stats_bulk
+from meal_max.models.rating_model import RATING_INITIAL, expected_score, recompute_ratings, update_elo
+from meal_max.utils import sql_utils
+from meal_max.utils.migrations import migrate
+from meal_max.utils.sql_utils import close_pool, get_db_connection
+
+
+@pytest.fixture(autouse=True)
+def setup_database(tmp_path, monkeypatch):
+    """Setup and teardown the database with three meals for testing."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    migrate()
+    create_meals_bulk({'meal': f'Meal {i}', 'cuisine': 'Test Cuisine', 'price': 10.0, 'difficulty': 'MED'} for i in range(3))
+    yield
+    meal_cache.clear()
+    close_pool()
+
+def get_ratings():
+    """Returns the rating of every meal by ID."""
+    with get_db_connection() as conn:
+        return dict(conn.execute("SELECT id, rating FROM meals").fetchall())
+
+def battle(meal_1_id, meal_2_id, winner_id):
+    """Returns a BattleRecord between two meals."""
+    return BattleRecord(meal_1_id, meal_2_id, 40.0, 20.0, 0.2, 0.1, winner_id)
+
+
+##################################################
+# Elo Test Cases
+##################################################
+
+def test_expected_score():
+    """Test that equal ratings are a coin flip and 400 points is ten to one."""
+    assert expected_score(1500, 1500) == 0.5
+    assert expected_score(1900, 1500) == pytest.approx(10 / 11)
+
+def test_update_elo():
+    """Test that the winner gains exactly what the loser gives up."""
+    winner, loser = update_elo(1500, 1500, k=32)
+    assert (winner, loser) == (1516, 1484)
+
+def test_upset_moves_more_points():
+    """Test that beating a stronger meal earns more than beating a weaker one."""
+    upset, _ = update_elo(1400, 1600, k=32)
+    expected, _ = update_elo(1600, 1400, k=32)
+    assert upset - 1400 > expected - 1600
+
+
+##################################################
+# Write Path Test Cases
+##################################################
+
+def test_record_battle_result_updates_ratings():
+    """Test that recording a battle moves both ratings in the same transaction."""
+    record_battle_result(1, 2)
+    assert get_ratings() == {1: 1516.0, 2: 1484.0, 3: RATING_INITIAL}
+
+def test_update_meal_stats_bulk_replays_battles_in_order():
+    """Test that batched battles are rated one after the other, not from the starting ratings."""
+    update_meal_stats_bulk([(1, 'win'), (2, 'loss'), (1, 'win'), (3, 'loss')], battles=[battle(1, 2, 1), battle(1, 3, 1)])
+
+    ratings = get_ratings()
+    assert ratings[1] == pytest.approx(update_elo(1516, 1500)[0])
+    assert ratings[3] < RATING_INITIAL
+
+def test_leaderboard_by_rating():
+    """Test that an unbeaten meal with one battle ranks below a meal that won two."""
+    record_battle_result(1, 2)
+    record_battle_result(1, 3)
+    record_battle_result(3, 2)
+
+    leaderboard = get_leaderboard("rating")
+    assert [meal['id'] for meal in leaderboard] == [1, 3, 2]
+    assert leaderboard[0]['rating'] > 1500
+
+def test_leaderboard_by_rating_uses_index():
+    """Test that the rating leaderboard is served from an index rather than a sort."""
+    with get_db_connection() as conn:
+        plan = conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM meals WHERE deleted = FALSE ORDER BY rating DESC, id ASC LIMIT 10
+        """).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_meals_leaderboard_rating" in details
+    assert "TEMP B-TREE" not in details
+
+
+##################################################
+# Recompute Test Cases
+##################################################
+
+def test_recompute_ratings_matches_incremental():
+    """Test that replaying the history gives the same ratings as the incremental updates."""
+    for meal_1_id, meal_2_id, winner_id in [(1, 2, 1), (2, 3, 3), (3, 1, 3), (1, 2, 2)]:
+        loser_id = meal_2_id if winner_id == meal_1_id else meal_1_id
+        record_battle_result(winner_id, loser_id, battle=battle(meal_1_id, meal_2_id, winner_id))
+    incremental = get_ratings()
+
+    with get_db_connection() as conn:
+        conn.execute("UPDATE meals SET rating = 0")
+        conn.commit()
+
+    assert recompute_ratings(batch_size=3) == {'battles': 4, 'meals': 3}
+    assert get_ratings() == pytest.approx(incremental)
+
+def test_recompute_ratings_invalid_batch_size():
+    """Test error when recomputing with an empty batch."""
+    with pytest.raises(ValueError, match="Invalid batch size: 0. Must be at least 1."):
+        recompute_ratings(batch_size=0)
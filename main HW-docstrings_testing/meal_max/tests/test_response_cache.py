@@ -0,0 +1,99 @@
+from flask import Flask
+import pytest
+
+from meal_max.utils import response_cache as response_cache_module
+from meal_max.utils.cache_utils import TTLCache
+from meal_max.utils.response_cache import cached_json_response
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Provides the data version and build counter behind the test route, with an empty response cache."""
+    monkeypatch.setattr(response_cache_module, "response_cache", TTLCache(max_size=10, ttl=60))
+    return {'version': 1, 'builds': 0}
+
+@pytest.fixture
+def client(state):
+    """Provides a test client for an app with one cached route."""
+    app = Flask(__name__)
+
+    @app.route('/items/<int:item_id>')
+    def get_item(item_id):
+        def build():
+            state['builds'] += 1
+            if item_id == 0:
+                raise ValueError("Item 0 not found")
+            return {'id': item_id, 'version': state['version']}
+        try:
+            return cached_json_response('/items', item_id, state['version'], build)
+        except ValueError as e:
+            return {'error': str(e)}, 404
+
+    return app.test_client()
+
+
+##################################################
+# Response Cache Test Cases
+##################################################
+
+def test_response_cached_per_version(client, state):
+    """Test that unchanged reads are served from the cache until the data version moves."""
+    first = client.get('/items/1')
+    second = client.get('/items/1')
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_json() == {'id': 1, 'version': 1}
+    assert second.data == first.data
+    assert state['builds'] == 1
+
+    state['version'] = 2
+    third = client.get('/items/1')
+
+    assert third.get_json() == {'id': 1, 'version': 2}
+    assert third.headers['ETag'] != first.headers['ETag']
+    assert state['builds'] == 2
+
+def test_response_cached_per_params(client, state):
+    """Test that different parameters are cached separately."""
+    client.get('/items/1')
+    client.get('/items/2')
+
+    assert state['builds'] == 2
+
+def test_matching_etag_not_modified(client, state):
+    """Test that a request with the current ETag gets 304 without a body."""
+    etag = client.get('/items/1').headers['ETag']
+
+    response = client.get('/items/1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert state['builds'] == 1
+
+def test_stale_etag_gets_new_body(client, state):
+    """Test that a request with an outdated ETag gets the new response."""
+    etag = client.get('/items/1').headers['ETag']
+    state['version'] = 2
+
+    response = client.get('/items/1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+
+def test_etag_depends_on_content_only(client, state):
+    """Test that rebuilding the same content gives the same ETag, as another worker would."""
+    first = client.get('/items/1')
+    response_cache_module.response_cache.clear()
+
+    second = client.get('/items/1')
+
+    assert state['builds'] == 2
+    assert second.headers['ETag'] == first.headers['ETag']
+
+def test_errors_not_cached(client, state):
+    """Test that a failed build is not cached."""
+    assert client.get('/items/0').status_code == 404
+    assert client.get('/items/0').status_code == 404
+
+    assert state['builds'] == 2
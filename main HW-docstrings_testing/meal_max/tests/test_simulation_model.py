@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from meal_max.models.simulation_model import get_battle_scores, get_win_probabilities, iter_win_probability_blocks, simulate_win_probabilities
+
+
+@pytest.fixture()
+def mock_catalog(mocker):
+    """Mocks the catalog query with three meals whose scores are 38, 137 and 116."""
+    rows = [
+        (1, 'Meal 1', 4.0, 10, 'MED'),
+        (2, 'Meal 2', 10.0, 14, 'LOW'),
+        (4, 'Meal 4', 9.0, 13, 'HIGH'),
+    ]
+    return mocker.patch("meal_max.models.simulation_model.get_battle_catalog", return_value=rows)
+
+
+##################################################
+# Score Calculation Test Cases
+##################################################
+
+def test_get_battle_scores():
+    """Test that the vectorized scores match BattleModel.get_battle_score."""
+    scores = get_battle_scores(np.array([10.0, 15.0, 12.0]), np.array([9.0, 9.0, 9.0]), ['MED', 'HIGH', 'LOW'])
+    assert scores.tolist() == [88.0, 134.0, 105.0]
+
+
+def test_win_probabilities_match_two_decimal_draws():
+    """Test that the exact chance counts the two-decimal random numbers below delta."""
+    delta = np.array([0.0, 0.005, 0.29, 0.3, 0.99, 1.5])
+    assert get_win_probabilities(delta).tolist() == [0.0, 0.01, 0.29, 0.3, 0.99, 1.0]
+
+    # Deltas are computed as battle() computes them, rounding included
+    delta = np.array([abs(130.0 - 100.0) / 100, abs(138.0 - 109.0) / 100])
+    expected = [sum(d > k / 100 for k in range(100)) / 100 for d in delta]
+    assert get_win_probabilities(delta).tolist() == expected
+
+
+##################################################
+# Simulation Test Cases
+##################################################
+
+def test_blocks_cover_matrix():
+    """Test that blocks tile the whole matrix and the diagonal is left out."""
+    scores = np.array([0.0, 50.0, 100.0, 300.0, 20.0])
+    matrix = np.zeros((5, 5))
+    for row_start, col_start, block in iter_win_probability_blocks(scores, 10, np.random.default_rng(0), block_size=2):
+        matrix[row_start:row_start + block.shape[0], col_start:col_start + block.shape[1]] = block
+
+    assert np.isnan(np.diag(matrix)).all()
+    # A delta of 1 or more always wins for combatant 1
+    assert matrix[0, 3] == 1.0
+    assert matrix[2, 3] == 1.0
+
+
+def test_simulate_matrix(mock_catalog):
+    """Test that the simulated matrix converges on the exact win probability."""
+    result = simulate_win_probabilities([1, 2], draws=100000, seed=42)
+
+    assert [meal['meal'] for meal in result['meals']] == ['Meal 1', 'Meal 2']
+    assert result['matrix'][0][0] is None
+    assert result['matrix'][0][1] == pytest.approx(0.99, abs=0.01)
+
+
+def test_simulate_matrix_is_reproducible(mock_catalog):
+    """Test that the same seed gives the same matrix."""
+    first = simulate_win_probabilities([1, 2, 4], draws=50, seed=7)
+    second = simulate_win_probabilities([1, 2, 4], draws=50, seed=7)
+    assert first == second
+
+
+def test_simulate_catalog_summary(mock_catalog):
+    """Test the per-meal summary over the whole catalog."""
+    result = simulate_win_probabilities(draws=100000, seed=1, block_size=2)
+
+    meal_1 = result['meals'][0]
+    # Meal 1 faces deltas of 0.99 and 0.78
+    assert meal_1['win_prob_as_combatant_1'] == pytest.approx((0.99 + 0.78) / 2, abs=0.01)
+    assert meal_1['win_prob_as_combatant_2'] == pytest.approx((0.01 + 0.22) / 2, abs=0.01)
+
+
+def test_simulate_unknown_meal(mock_catalog):
+    """Test error when asking for a meal that is not in the catalog."""
+    with pytest.raises(ValueError, match="Meal with ID 3 not found"):
+        simulate_win_probabilities([1, 3])
+
+
+def test_simulate_invalid_draws(mock_catalog):
+    """Test error when simulating with no draws."""
+    with pytest.raises(ValueError, match="Invalid number of draws: 0"):
+        simulate_win_probabilities(draws=0)
+
+
+def test_simulate_too_many_draws(mock_catalog, mocker):
+    """Test error when simulating with more draws than allowed."""
+    mocker.patch("meal_max.models.simulation_model.SIMULATION_MAX_DRAWS", 10)
+    with pytest.raises(ValueError, match="Invalid number of draws: 11. Must be between 1 and 10."):
+        simulate_win_probabilities(draws=11)
+
+
+def test_simulate_catalog_too_large(mock_catalog, mocker):
+    """Test error when summarizing a catalog larger than allowed, while a subset still works."""
+    mocker.patch("meal_max.models.simulation_model.SIMULATION_MAX_CATALOG_MEALS", 2)
+    with pytest.raises(ValueError, match="Catalog too large to simulate: 3 meals"):
+        simulate_win_probabilities(draws=10)
+    assert len(simulate_win_probabilities([1, 2], draws=10)['meals']) == 2
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_utils import ConnectionPool, close_pool, get_db_connection, get_pool_stats
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Points the shared pool at a fresh database file and closes it afterwards."""
+    path = str(tmp_path / "meal_max.db")
+    monkeypatch.setattr(sql_utils, "DB_PATH", path)
+    yield path
+    close_pool()
+
+
+##################################################
+# Connection Pool Test Cases
+##################################################
+
+def test_get_db_connection_reuses_connection(db_path):
+    """Test that consecutive calls get the same pooled connection back."""
+    with get_db_connection() as conn1:
+        conn1.execute("SELECT 1;")
+    with get_db_connection() as conn2:
+        conn2.execute("SELECT 1;")
+
+    assert conn1 is conn2
+    stats = get_pool_stats()
+    assert stats['open'] == 1
+    assert stats['idle'] == 1
+    assert stats['acquired'] == 2
+
+
+def test_connection_pragmas(db_path):
+    """Test that pooled connections are opened in WAL mode with the configured pragmas."""
+    with get_db_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout;").fetchone()[0] == sql_utils.DB_BUSY_TIMEOUT_MS
+        assert conn.execute("PRAGMA cache_size;").fetchone()[0] == sql_utils.DB_CACHE_SIZE
+
+
+def test_uncommitted_work_rolled_back(db_path):
+    """Test that a connection goes back to the pool without a dangling transaction."""
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with get_db_connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_pool_is_bounded(db_path):
+    """Test that the pool never opens more than max_size connections and counts waits."""
+    pool = ConnectionPool(db_path, max_size=1, timeout=1.0)
+    conn = pool.acquire()
+
+    # Hand the connection back shortly, so the second acquire has to wait for it
+    timer = threading.Timer(0.05, pool.release, args=(conn,))
+    timer.start()
+    assert pool.acquire() is conn
+    timer.join()
+
+    stats = pool.stats()
+    assert stats['open'] == 1
+    assert stats['waits'] == 1
+    pool.close()
+
+
+def test_pool_timeout(db_path):
+    """Test error when no connection frees up within the timeout."""
+    pool = ConnectionPool(db_path, max_size=1, timeout=0.01)
+    pool.acquire()
+    with pytest.raises(RuntimeError, match="Timed out waiting for a database connection"):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_invalid_pool_size(db_path):
+    """Test error when creating a pool with no connections."""
+    with pytest.raises(ValueError, match="Invalid pool size: 0"):
+        ConnectionPool(db_path, max_size=0)
+
+
+def test_pool_rebuilt_when_db_path_changes(db_path, tmp_path, monkeypatch):
+    """Test that changing DB_PATH switches the shared pool to the new database."""
+    with get_db_connection():
+        pass
+    new_path = str(tmp_path / "other.db")
+    monkeypatch.setattr(sql_utils, "DB_PATH", new_path)
+    assert get_pool_stats()['db_path'] == new_path
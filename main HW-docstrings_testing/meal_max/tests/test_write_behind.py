@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.utils.write_behind import WriteBehindBuffer, WriteBehindFullError
+
+
+@pytest.fixture
+def flushed():
+    """Fixture to collect the (batch, events) pairs handed to the flush function."""
+    return []
+
+
+def collect(flushed):
+    """Returns a flush function that appends to flushed."""
+    return lambda batch, events: flushed.append((batch, events))
+
+
+##################################################
+# Write-Behind Buffer Test Cases
+##################################################
+
+def test_add_merges_deltas(flushed):
+    """Test that deltas for the same key are summed until the flush."""
+    buffer = WriteBehindBuffer(collect(flushed), width=2, interval_ms=60000)
+    buffer.add({1: (1, 1), 2: (1, 0)})
+    buffer.add({1: (1, 0)})
+
+    assert buffer.pending() == {1: (2, 1), 2: (1, 0)}
+    assert buffer.flush() == 2
+    assert flushed == [({1: [2, 1], 2: [1, 0]}, [])]
+    assert buffer.pending() == {}
+    buffer.stop()
+
+def test_events_flushed_with_deltas(flushed):
+    """Test that events are handed over in order, in the same flush as their deltas."""
+    buffer = WriteBehindBuffer(collect(flushed), width=1, interval_ms=60000)
+    buffer.add({1: (1,)}, events=["a"])
+    buffer.add({2: (1,)}, events=["b", "c"])
+    buffer.flush()
+
+    assert flushed == [({1: [1], 2: [1]}, ["a", "b", "c"])]
+    buffer.stop()
+
+def test_flush_on_max_pending():
+    """Test that reaching max_pending wakes the background thread before the interval."""
+    done = threading.Event()
+    buffer = WriteBehindBuffer(lambda batch, events: done.set(), width=1, interval_ms=60000, max_pending=3)
+    try:
+        for _ in range(3):
+            buffer.add({1: (1,)})
+        assert done.wait(timeout=5)
+    finally:
+        buffer.stop()
+
+def test_flush_on_interval(flushed):
+    """Test that the background thread flushes every interval."""
+    buffer = WriteBehindBuffer(collect(flushed), width=1, interval_ms=10)
+    try:
+        buffer.add({1: (1,)})
+        for _ in range(500):
+            if flushed:
+                break
+            threading.Event().wait(0.01)
+        assert flushed == [({1: [1]}, [])]
+    finally:
+        buffer.stop()
+
+def test_failed_flush_keeps_deltas():
+    """Test that deltas and events are kept and retried when the flush function fails."""
+    batches = []
+
+    def flush_fn(batch, events):
+        if not batches:
+            batches.append(None)
+            raise sqlite3.OperationalError("database is locked")
+        batches.append((batch, events))
+
+    buffer = WriteBehindBuffer(flush_fn, width=1, interval_ms=60000)
+    buffer.add({1: (1,)}, events=["a"])
+    with pytest.raises(sqlite3.OperationalError):
+        buffer.flush()
+    buffer.add({1: (1,)}, events=["b"])
+
+    assert buffer.flush() == 2
+    assert batches[-1] == ({1: [2]}, ["a", "b"])
+    assert buffer.stats()['failures'] == 1
+    buffer.stop()
+
+def test_in_flight_batch_stays_pending():
+    """Test that a batch being flushed is still reported as pending until its commit lands."""
+    started, release = threading.Event(), threading.Event()
+
+    def flush_fn(batch, events):
+        started.set()
+        release.wait(5)
+
+    buffer = WriteBehindBuffer(flush_fn, width=1, interval_ms=60000)
+    buffer.add({1: (1,)})
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    try:
+        assert started.wait(5)
+        buffer.add({1: (1,)})
+        assert buffer.pending() == {1: (2,)}
+        assert buffer.stats()['in_flight_results'] == 1
+    finally:
+        release.set()
+        flusher.join()
+
+    assert buffer.pending() == {1: (1,)}
+    buffer.stop()
+
+def test_read_with_pending_retries_across_flush(flushed):
+    """Test that a read overlapped by a flush is run again against a fresh snapshot."""
+    buffer = WriteBehindBuffer(collect(flushed), width=1, interval_ms=60000)
+    buffer.add({1: (1,)})
+    snapshots = []
+
+    def read(pending):
+        snapshots.append(pending)
+        if len(snapshots) == 1:
+            buffer.flush()
+        return len(flushed)
+
+    assert buffer.read_with_pending(read) == (1, {})
+    assert snapshots == [{1: (1,)}, {}]
+    buffer.stop()
+
+def test_full_buffer_refuses_results():
+    """Test that results are refused once failed flushes have filled the buffer."""
+    def flush_fn(batch, events):
+        raise sqlite3.OperationalError("database is locked")
+
+    buffer = WriteBehindBuffer(flush_fn, width=1, interval_ms=60000, max_pending=2, max_buffered=3)
+    buffer.add({1: (1,)}, results=2)
+    with pytest.raises(sqlite3.OperationalError):
+        buffer.flush()
+    buffer.add({1: (1,)})
+
+    with pytest.raises(WriteBehindFullError, match="full"):
+        buffer.add({1: (1,)})
+    assert buffer.pending() == {1: (2,)}
+    assert buffer.stats()['rejected'] == 1
+
+def test_stop_flushes_pending(flushed):
+    """Test that stopping the buffer writes whatever is still pending."""
+    buffer = WriteBehindBuffer(collect(flushed), width=1, interval_ms=60000)
+    buffer.add({1: (1,)})
+    buffer.stop()
+    assert flushed == [({1: [1]}, [])]
+
+def test_invalid_interval():
+    """Test error when the flush interval is not positive."""
+    with pytest.raises(ValueError, match="Invalid flush interval: 0"):
+        WriteBehindBuffer(lambda batch, events: None, width=1, interval_ms=0)
+
+def test_invalid_max_buffered():
+    """Test error when max buffered is below max pending."""
+    with pytest.raises(ValueError, match="Invalid max buffered: 5"):
+        WriteBehindBuffer(lambda batch, events: None, width=1, max_pending=10, max_buffered=5)
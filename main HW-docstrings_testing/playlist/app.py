@@ -3,6 +3,9 @@ from flask import Flask, jsonify, make_response, Response, request
 
 from music_collection.models import song_model
 from music_collection.models.playlist_model import PlaylistModel
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import instrument_app, metrics_response
+from music_collection.utils.random_utils import get_random_pool
 from music_collection.utils.sql_utils import check_database_connection, check_table_exists
 
 
@@ -10,6 +13,8 @@ from music_collection.utils.sql_utils import check_database_connection, check_ta
 load_dotenv()
 
 app = Flask(__name__)
+configure_logger(app.logger)
+instrument_app(app)
 
 playlist_model = PlaylistModel()
 
@@ -54,6 +59,29 @@ def db_check() -> Response:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose request latencies, database and random.org timings to Prometheus.
+
+    Returns:
+        Plain text response in the Prometheus exposition format.
+    """
+    return metrics_response()
+
+
+@app.route('/api/random-pool-stats', methods=['GET'])
+def random_pool_stats() -> Response:
+    """
+    Route to report the hit, miss and refill metrics of the random number pool.
+
+    Returns:
+        JSON response with the random number pool counters.
+    """
+    app.logger.info('Retrieving random pool stats')
+    return make_response(jsonify({'status': 'success', 'pool': get_random_pool().stats()}), 200)
+
+
 ##########################################################
 #
 # Song Management
@@ -203,15 +231,32 @@ def get_song_by_compound_key() -> Response:
 @app.route('/api/get-random-song', methods=['GET'])
 def get_random_song() -> Response:
     """
-    Route to retrieve a random song from the catalog.
+    Route to retrieve a random song, or several distinct random songs, from the catalog.
+
+    Expected query parameters:
+        - count (int, optional): The number of distinct songs to return as a list.
 
     Returns:
-        JSON response with the details of a random song or error message.
+        JSON response with the details of a random song, or a list of songs when count is given.
+    Raises:
+        400 error if count is invalid.
+        500 error if there is an issue retrieving the songs.
     """
     try:
-        app.logger.info("Retrieving a random song from the catalog")
-        song = song_model.get_random_song()
-        return make_response(jsonify({'status': 'success', 'song': song}), 200)
+        count = request.args.get('count')
+        if count is None:
+            app.logger.info("Retrieving a random song from the catalog")
+            song = song_model.get_random_song()
+            return make_response(jsonify({'status': 'success', 'song': song}), 200)
+
+        if not count.isdigit():
+            return make_response(jsonify({'error': 'count must be a positive integer'}), 400)
+        app.logger.info(f"Retrieving {count} random songs from the catalog")
+        try:
+            songs = song_model.get_random_songs(int(count))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
     except Exception as e:
         app.logger.error(f"Error retrieving a random song: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -710,5 +755,36 @@ def get_song_leaderboard() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+@app.route('/api/charts', methods=['GET'])
+def get_charts() -> Response:
+    """
+    Route to get the most played songs in a recent window.
+
+    Expected query parameters:
+        - window (str): '1h', '24h' or '7d', trailing the current time. Defaults to '24h'.
+        - limit (int): The maximum number of songs. Defaults to 10.
+
+    Returns:
+        JSON response with the songs and their plays in the window.
+    Raises:
+        400 error if the window or limit is invalid.
+        500 error if there is an issue generating the chart.
+    """
+    try:
+        window = request.args.get('window', '24h')
+        limit = request.args.get('limit', '10')
+        if not limit.isdigit():
+            return make_response(jsonify({'error': 'limit must be a positive integer'}), 400)
+        limit = int(limit)
+        app.logger.info(f"Generating the {window} chart")
+        chart = song_model.get_top_songs(window, limit)
+        return make_response(jsonify({'status': 'success', 'window': window, 'chart': chart}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error generating chart: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
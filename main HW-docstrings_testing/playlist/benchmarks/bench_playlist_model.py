@@ -0,0 +1,211 @@
+"""
+Benchmarks for the playlist's SongList against a plain Python list.
+
+The list side does what PlaylistModel did before SongList: it finds songs by scanning for
+their ID and moves them with list.remove plus list.insert. Both sides start from the same
+playlist and replay the same sequence of positions and song IDs, so only the data structure
+differs.
+
+Run from the playlist directory:
+
+    python -m benchmarks.bench_playlist_model --output results.json
+    python -m benchmarks.bench_playlist_model --sizes 1000 100000 --iterations 200
+"""
+import argparse
+from datetime import datetime, timezone
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Optional
+
+from music_collection.models.playlist_model import SongList
+from music_collection.models.song_model import Song
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_ITERATIONS = 500
+
+
+def make_songs(first_id: int, count: int) -> list[Song]:
+    """
+    Returns count songs with consecutive IDs starting at first_id.
+    """
+    return [Song(song_id, f"Artist {song_id}", f"Song {song_id}", 2000, "Pop", 180)
+            for song_id in range(first_id, first_id + count)]
+
+
+def find_position(songs: list, song_id: int) -> int:
+    """
+    Returns the position of a song in a plain list, scanning for its ID.
+    """
+    return next(index for index, song in enumerate(songs) if song.id == song_id)
+
+
+def list_move(songs: list, song_id: int, index: int) -> None:
+    song = songs[find_position(songs, song_id)]
+    songs.remove(song)
+    songs.insert(index, song)
+
+
+def list_swap(songs: list, song_id_1: int, song_id_2: int) -> None:
+    index_1, index_2 = find_position(songs, song_id_1), find_position(songs, song_id_2)
+    songs[index_1], songs[index_2] = songs[index_2], songs[index_1]
+
+
+# Each operation is called with the playlist and two random numbers in [0, 1)
+OPERATIONS: dict[str, dict[str, Callable[[Any, float, float], Any]]] = {
+    'get_by_track_number': {
+        'list': lambda songs, a, b: songs[int(a * len(songs))],
+        'song_list': lambda songs, a, b: songs[int(a * len(songs))],
+    },
+    'move_song_to_track_number': {
+        'list': lambda songs, a, b: list_move(songs, songs[int(a * len(songs))].id, int(b * len(songs))),
+        'song_list': lambda songs, a, b: songs.move(songs.index_of(songs[int(a * len(songs))].id), int(b * len(songs))),
+    },
+    'swap_songs': {
+        'list': lambda songs, a, b: list_swap(songs, songs[int(a * len(songs))].id, songs[int(b * len(songs))].id),
+        'song_list': lambda songs, a, b: songs.swap(songs.index_of(songs[int(a * len(songs))].id),
+                                                    songs.index_of(songs[int(b * len(songs))].id)),
+    },
+    'remove_and_reinsert': {
+        'list': lambda songs, a, b: songs.insert(int(b * len(songs)), songs.pop(int(a * len(songs)))),
+        'song_list': lambda songs, a, b: songs.insert(int(b * len(songs)), songs.pop(int(a * len(songs)))),
+    },
+}
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of sorted samples.
+
+    Args:
+        samples (list[float]): The samples, sorted ascending.
+        fraction (float): The percentile as a fraction, for example 0.95.
+
+    Returns:
+        float: The sample at that rank.
+    """
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def time_operation(operation: Callable[[Any, float, float], Any], playlist: Any,
+                   draws: list[tuple[float, float]]) -> dict[str, float]:
+    """
+    Calls an operation once per draw and summarizes how long each call took.
+
+    Args:
+        operation (Callable[[Any, float, float], Any]): Called with the playlist and a draw.
+        playlist (Any): The playlist to operate on.
+        draws (list[tuple[float, float]]): The random numbers for each call.
+
+    Returns:
+        dict[str, float]: The iteration count, mean, percentiles and extremes in microseconds, and throughput.
+    """
+    samples = []
+    for a, b in draws:
+        start = time.perf_counter()
+        operation(playlist, a, b)
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        'iterations': len(samples),
+        'mean_us': round(total / len(samples) * 1e6, 2),
+        'p50_us': round(percentile(samples, 0.50) * 1e6, 2),
+        'p95_us': round(percentile(samples, 0.95) * 1e6, 2),
+        'p99_us': round(percentile(samples, 0.99) * 1e6, 2),
+        'min_us': round(samples[0] * 1e6, 2),
+        'max_us': round(samples[-1] * 1e6, 2),
+        'ops_per_sec': round(len(samples) / total, 1) if total else 0.0,
+    }
+
+
+def benchmark_size(size: int, iterations: int, seed: int) -> dict[str, dict[str, Any]]:
+    """
+    Times every operation on a plain list and on a SongList of size songs.
+
+    Args:
+        size (int): The number of songs in the playlist.
+        iterations (int): Timed calls per operation and structure.
+        seed (int): Seeds the positions each operation is called with.
+
+    Returns:
+        dict[str, dict[str, Any]]: The timings of each structure and the median speedup, per operation.
+    """
+    songs = make_songs(1, size)
+    results = {}
+    for name, implementations in OPERATIONS.items():
+        rng = random.Random(seed)
+        draws = [(rng.random(), rng.random()) for _ in range(iterations)]
+        timings = {
+            'list': time_operation(implementations['list'], list(songs), draws),
+            'song_list': time_operation(implementations['song_list'], SongList(songs), draws),
+        }
+        timings['speedup_p50'] = round(timings['list']['p50_us'] / timings['song_list']['p50_us'], 2)
+        results[name] = timings
+    return results
+
+
+def run_benchmarks(sizes: list[int], iterations: int = DEFAULT_ITERATIONS, seed: int = 0) -> dict[str, Any]:
+    """
+    Runs the benchmarks at every playlist size.
+
+    Args:
+        sizes (list[int]): The playlist sizes to benchmark.
+        iterations (int): Timed calls per operation and structure.
+        seed (int): Seeds the positions each operation is called with.
+
+    Returns:
+        dict[str, Any]: The environment, settings and per-size timings, ready to dump as JSON.
+    """
+    if iterations < 1:
+        raise ValueError(f"Invalid number of iterations: {iterations}. Must be at least 1.")
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'iterations': iterations,
+        'seed': seed,
+        'results': {},
+    }
+    for size in sizes:
+        if size < 2:
+            raise ValueError(f"Invalid playlist size: {size}. Must be at least 2.")
+        print(f"Benchmarking {size} songs...", file=sys.stderr)
+        report['results'][str(size)] = benchmark_size(size, iterations, seed)
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the playlist's SongList against a plain list.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="playlist sizes to benchmark")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="timed calls per operation")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the positions operated on")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.iterations, args.seed)
+    for size, operations in report['results'].items():
+        for name, timings in operations.items():
+            print("%-8s %-28s list %10.2f us  song_list %10.2f us  x%.2f" % (
+                size, name, timings['list']['p50_us'], timings['song_list']['p50_us'], timings['speedup_p50']),
+                file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
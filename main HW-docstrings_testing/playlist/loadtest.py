@@ -0,0 +1,122 @@
+"""
+Concurrent HTTP load generator for a running playlist service.
+
+Unlike smoketest.sh, which checks each route once, this replays a weighted mix of real
+routes from many threads for a fixed time and reports throughput, latency percentiles and
+error rates per route. The playlist is shared by every client of the service, so the
+workers take turns adding catalog songs to it and, once every song is in, cycle them out
+and back in.
+
+    python loadtest.py --base-url http://localhost:5000/api --concurrency 16 --duration 30 --report loadtest.json
+
+The workers, reporting and options are in music_collection.utils.loadtest_harness; this
+module only defines the playlist route mix.
+"""
+import random
+import sys
+import threading
+from typing import Any, Callable, Optional
+
+import requests
+
+from music_collection.utils.loadtest_harness import Client, run_cli
+
+
+####################################################
+#
+# Playlist Scenario
+#
+####################################################
+
+
+class PlaylistScenario:
+    """
+    The playlist route mix: adding songs to the shared playlist, playing it and listing the catalog.
+
+    Songs are added in catalog order. Once they are all in, adding the next one first removes
+    it, so the playlist keeps its length instead of failing on duplicates.
+
+    Attributes:
+        songs (int): The number of songs seeded before the run.
+        weights (dict[str, int]): The relative frequency of each task.
+    """
+
+    service = "playlist"
+
+    def __init__(self, songs: int = 200, weights: Optional[dict[str, int]] = None):
+        self.songs = songs
+        self.weights = weights or {
+            'add-song-to-playlist': 3, 'play-current-song': 3, 'get-all-songs': 1, 'get-all-songs-from-playlist': 1,
+        }
+        self.tasks: dict[str, Callable[[Client, dict, random.Random], None]] = {
+            'add-song-to-playlist': self.add_song_to_playlist,
+            'play-current-song': self.play_current_song,
+            'get-all-songs': self.get_all_songs,
+            'get-all-songs-from-playlist': self.get_all_songs_from_playlist,
+        }
+        self.catalog: list[dict[str, Any]] = []
+        self._next_song = 0
+        self._lock = threading.Lock()
+
+    def setup(self, base_url: str) -> None:
+        """
+        Creates the seed songs, skipping those left over from earlier runs, and starts from an empty playlist.
+
+        Args:
+            base_url (str): The API root of the running service.
+
+        Raises:
+            RuntimeError: If a seed song cannot be created or the playlist cannot be cleared.
+        """
+        base_url = base_url.rstrip("/")
+        genres = ("Rock", "Pop", "Jazz", "Hip-Hop", "Classical", "Folk")
+        self.catalog = [
+            {'artist': f"Load Test Artist {i % 20}", 'title': f"Load Test Song {i}", 'year': 1960 + i % 60}
+            for i in range(self.songs)
+        ]
+        with requests.Session() as session:
+            for i, song in enumerate(self.catalog):
+                response = session.get(f"{base_url}/get-song-from-catalog-by-compound-key", params=song, timeout=10)
+                if response.status_code == 200:
+                    continue
+                response = session.post(f"{base_url}/create-song", timeout=10,
+                                        json={**song, 'genre': genres[i % len(genres)], 'duration': 120 + i % 240})
+                if response.status_code != 201:
+                    raise RuntimeError(f"Failed to seed song {song['title']}: {response.status_code} {response.text}")
+
+            response = session.post(f"{base_url}/clear-playlist", timeout=10)
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to clear the playlist: {response.status_code} {response.text}")
+        self._next_song = 0
+
+    def start_worker(self, worker_id: int) -> dict:
+        return {}
+
+    def add_song_to_playlist(self, client: Client, state: dict, rng: random.Random) -> None:
+        with self._lock:
+            index = self._next_song
+            self._next_song += 1
+        song = self.catalog[index % len(self.catalog)]
+        if index >= len(self.catalog):
+            client.request("DELETE /remove-song-from-playlist", "DELETE", "/remove-song-from-playlist", json=song)
+        client.request("POST /add-song-to-playlist", "POST", "/add-song-to-playlist", json=song)
+
+    def play_current_song(self, client: Client, state: dict, rng: random.Random) -> None:
+        client.request("POST /play-current-song", "POST", "/play-current-song")
+
+    def get_all_songs(self, client: Client, state: dict, rng: random.Random) -> None:
+        client.request("GET /get-all-songs-from-catalog", "GET", "/get-all-songs-from-catalog",
+                       params={'sort_by_play_count': rng.choice(("true", "false"))})
+
+    def get_all_songs_from_playlist(self, client: Client, state: dict, rng: random.Random) -> None:
+        client.request("GET /get-all-songs-from-playlist", "GET", "/get-all-songs-from-playlist")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    return run_cli("Replay a weighted mix of playlist routes against a running service.",
+                   lambda parser: parser.add_argument("--songs", type=int, default=200, help="number of songs to seed"),
+                   lambda args: PlaylistScenario(songs=args.songs), argv)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
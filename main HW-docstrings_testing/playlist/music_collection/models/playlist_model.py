@@ -1,19 +1,249 @@
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from itertools import accumulate, chain
 import logging
-from typing import List
-from music_collection.models.song_model import Song, update_play_count
+from typing import Iterable, Iterator, List, Optional
+from music_collection.models.song_model import Song, update_play_count, update_play_counts
 from music_collection.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+class SongList(MutableSequence):
+    """
+    The songs of a playlist in order, held in blocks of song IDs and indexed by song ID.
+
+    Each block holds between block_size / 2 and 2 * block_size IDs, except when the whole
+    list is smaller. A position is found by binary search over the block offsets, and
+    inserting or removing a song only shifts the IDs within one block. Access by position,
+    insert, remove and looking up a song's position all cost O(block_size + number of
+    blocks), which is O(sqrt n) for the default block size up to a few hundred thousand
+    songs. Membership checks and lookups by ID are O(1).
+
+    Song IDs must be unique within the list.
+
+    Attributes:
+        block_size (int): The target number of songs per block.
+    """
+
+    def __init__(self, songs: Iterable[Song] = (), block_size: int = 512):
+        if block_size < 2:
+            raise ValueError(f"Invalid block size: {block_size}. Must be at least 2.")
+
+        self.block_size = block_size
+        self._blocks: List[List[int]] = []
+        self._by_id: dict[int, Song] = {}
+        self._block_of: dict[int, List[int]] = {}
+        self._length = 0
+        # Derived from the blocks on demand, None while out of date
+        self._offsets: Optional[List[int]] = None
+        self._block_numbers: Optional[dict[int, int]] = None
+        self.extend(songs)
+
+    def _check_new_ids(self, songs: List[Song], replacing: Iterable[Song] = ()) -> None:
+        replaced = {song.id for song in replacing}
+        seen = set()
+        for song in songs:
+            if song.id in seen or (song.id in self._by_id and song.id not in replaced):
+                raise ValueError(f"Song with ID {song.id} already exists in the playlist")
+            seen.add(song.id)
+
+    def _rebuild(self, songs: Iterable[Song]) -> None:
+        songs = list(songs)
+        self._check_new_ids(songs, replacing=self)
+        self._blocks = [[song.id for song in songs[start:start + self.block_size]]
+                        for start in range(0, len(songs), self.block_size)]
+        self._by_id = {song.id: song for song in songs}
+        self._block_of = {song_id: block for block in self._blocks for song_id in block}
+        self._length = len(songs)
+        self._offsets = None
+        self._block_numbers = None
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """
+        Returns the block number and the index within that block of a valid 0-based position.
+        """
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(map(len, self._blocks[:-1]))]
+        block_number = bisect_right(self._offsets, index) - 1
+        return block_number, index - self._offsets[block_number]
+
+    def _normalize(self, index: int) -> int:
+        return range(self._length)[index]
+
+    def _split(self, block_number: int) -> None:
+        block = self._blocks[block_number]
+        if len(block) <= 2 * self.block_size:
+            return
+        tail = block[self.block_size:]
+        del block[self.block_size:]
+        self._blocks.insert(block_number + 1, tail)
+        for song_id in tail:
+            self._block_of[song_id] = tail
+        self._block_numbers = None
+
+    def _rebalance(self, block_number: int) -> None:
+        block = self._blocks[block_number]
+        if not block:
+            del self._blocks[block_number]
+            self._block_numbers = None
+        elif len(block) < self.block_size // 2 and len(self._blocks) > 1:
+            # Merge into the neighbour on the left, or the right for the first block
+            left = block_number - 1 if block_number > 0 else block_number
+            merged, absorbed = self._blocks[left], self._blocks[left + 1]
+            merged.extend(absorbed)
+            for song_id in absorbed:
+                self._block_of[song_id] = merged
+            del self._blocks[left + 1]
+            self._block_numbers = None
+            self._split(left)
+
+    def has_id(self, song_id: int) -> bool:
+        """
+        Returns whether a song with the given ID is in the list.
+        """
+        return song_id in self._by_id
+
+    def get_by_id(self, song_id: int) -> Optional[Song]:
+        """
+        Returns the song with the given ID, or None if it is not in the list.
+        """
+        return self._by_id.get(song_id)
+
+    def index_of(self, song_id: int) -> int:
+        """
+        Returns the 0-based position of the song with the given ID.
+
+        Args:
+            song_id (int): The ID of the song.
+
+        Raises:
+            ValueError: If no song with that ID is in the list.
+        """
+        block = self._block_of.get(song_id)
+        if block is None:
+            raise ValueError(f"Song with id {song_id} not found in playlist")
+        if self._block_numbers is None:
+            self._block_numbers = {id(block): number for number, block in enumerate(self._blocks)}
+        block_number = self._block_numbers[id(block)]
+        if self._offsets is None:
+            self._locate(0)
+        return self._offsets[block_number] + block.index(song_id)
+
+    def swap(self, index1: int, index2: int) -> None:
+        """
+        Swaps the songs at two 0-based positions.
+        """
+        block_number1, offset1 = self._locate(self._normalize(index1))
+        block_number2, offset2 = self._locate(self._normalize(index2))
+        block1, block2 = self._blocks[block_number1], self._blocks[block_number2]
+        block1[offset1], block2[offset2] = block2[offset2], block1[offset1]
+        self._block_of[block1[offset1]] = block1
+        self._block_of[block2[offset2]] = block2
+
+    def move(self, from_index: int, to_index: int) -> None:
+        """
+        Moves the song at one 0-based position to another, shifting the songs in between.
+        """
+        to_index = self._normalize(to_index)
+        self.insert(to_index, self.pop(from_index))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Song]:
+        return map(self._by_id.__getitem__, chain.from_iterable(self._blocks))
+
+    def __contains__(self, song: object) -> bool:
+        return isinstance(song, Song) and self._by_id.get(song.id) == song
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (SongList, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SongList({list(self)!r})"
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        block_number, offset = self._locate(self._normalize(index))
+        return self._by_id[self._blocks[block_number][offset]]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            songs = list(self)
+            songs[index] = value
+            self._rebuild(songs)
+            return
+        block_number, offset = self._locate(self._normalize(index))
+        block = self._blocks[block_number]
+        old = self._by_id[block[offset]]
+        self._check_new_ids([value], replacing=[old])
+        del self._by_id[old.id], self._block_of[old.id]
+        block[offset] = value.id
+        self._by_id[value.id] = value
+        self._block_of[value.id] = block
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            songs = list(self)
+            del songs[index]
+            self._rebuild(songs)
+            return
+        block_number, offset = self._locate(self._normalize(index))
+        song_id = self._blocks[block_number].pop(offset)
+        del self._by_id[song_id], self._block_of[song_id]
+        self._length -= 1
+        self._offsets = None
+        self._rebalance(block_number)
+
+    def insert(self, index: int, song: Song) -> None:
+        self._check_new_ids([song])
+        index = max(0, min(self._length, index if index >= 0 else self._length + index))
+        if not self._blocks:
+            self._blocks.append([])
+            self._block_numbers = None
+        if index == self._length:
+            block_number, offset = len(self._blocks) - 1, len(self._blocks[-1])
+        else:
+            block_number, offset = self._locate(index)
+        block = self._blocks[block_number]
+        block.insert(offset, song.id)
+        self._by_id[song.id] = song
+        self._block_of[song.id] = block
+        self._length += 1
+        self._offsets = None
+        self._split(block_number)
+
+    def extend(self, songs: Iterable[Song]) -> None:
+        songs = list(songs)
+        self._check_new_ids(songs)
+        for song in songs:
+            self.insert(self._length, song)
+
+    def remove(self, song: Song) -> None:
+        if song not in self:
+            raise ValueError("SongList.remove(x): x not in list")
+        del self[self.index_of(song.id)]
+
+    def clear(self) -> None:
+        self._rebuild(())
+
+    def reverse(self) -> None:
+        self._rebuild(reversed(list(self)))
+
+
 class PlaylistModel:
     """
     A class to manage a playlist of songs.
 
     Attributes:
         current_track_number (int): The current track number being played.
-        playlist (List[Song]): The list of songs in the playlist.
+        playlist (SongList): The songs in the playlist, in order and indexed by song ID.
+            Assigning a plain list wraps it in a SongList.
 
     """
 
@@ -22,7 +252,15 @@ class PlaylistModel:
         Initializes the PlaylistModel with an empty playlist and the current track set to 1.
         """
         self.current_track_number = 1
-        self.playlist: List[Song] = []
+        self.playlist = SongList()
+
+    @property
+    def playlist(self) -> SongList:
+        return self._playlist
+
+    @playlist.setter
+    def playlist(self, songs: Iterable[Song]) -> None:
+        self._playlist = songs if isinstance(songs, SongList) else SongList(songs)
 
     ##################################################
     # Song Management Functions
@@ -45,7 +283,7 @@ class PlaylistModel:
             raise TypeError("Song is not a valid song")
 
         song_id = self.validate_song_id(song.id, check_in_playlist=False)
-        if song_id in [song_in_playlist.id for song_in_playlist in self.playlist]:
+        if self.playlist.has_id(song_id):
             logger.error("Song with ID %d already exists in the playlist", song.id)
             raise ValueError(f"Song with ID {song.id} already exists in the playlist")
 
@@ -64,7 +302,7 @@ class PlaylistModel:
         logger.info("Removing song with id %d from playlist", song_id)
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
-        self.playlist = [song_in_playlist for song_in_playlist in self.playlist if song_in_playlist.id != song_id]
+        del self.playlist[self.playlist.index_of(song_id)]
         logger.info("Song with id %d has been removed", song_id)
 
     def remove_song_by_track_number(self, track_number: int) -> None:
@@ -103,7 +341,7 @@ class PlaylistModel:
         """
         self.check_if_empty()
         logger.info("Getting all songs in the playlist")
-        return self.playlist
+        return list(self.playlist)
 
     def get_song_by_song_id(self, song_id: int) -> Song:
         """
@@ -118,7 +356,7 @@ class PlaylistModel:
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
         logger.info("Getting song with id %d from playlist", song_id)
-        return next((song for song in self.playlist if song.id == song_id), None)
+        return self.playlist.get_by_id(song_id)
 
     def get_song_by_track_number(self, track_number: int) -> Song:
         """
@@ -181,9 +419,7 @@ class PlaylistModel:
         logger.info("Moving song with ID %d to the beginning of the playlist", song_id)
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
-        song = self.get_song_by_song_id(song_id)
-        self.playlist.remove(song)
-        self.playlist.insert(0, song)
+        self.playlist.move(self.playlist.index_of(song_id), 0)
         logger.info("Song with ID %d has been moved to the beginning", song_id)
 
     def move_song_to_end(self, song_id: int) -> None:
@@ -196,9 +432,7 @@ class PlaylistModel:
         logger.info("Moving song with ID %d to the end of the playlist", song_id)
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
-        song = self.get_song_by_song_id(song_id)
-        self.playlist.remove(song)
-        self.playlist.append(song)
+        self.playlist.move(self.playlist.index_of(song_id), -1)
         logger.info("Song with ID %d has been moved to the end", song_id)
 
     def move_song_to_track_number(self, song_id: int, track_number: int) -> None:
@@ -214,9 +448,7 @@ class PlaylistModel:
         song_id = self.validate_song_id(song_id)
         track_number = self.validate_track_number(track_number)
         playlist_index = track_number - 1
-        song = self.get_song_by_song_id(song_id)
-        self.playlist.remove(song)
-        self.playlist.insert(playlist_index, song)
+        self.playlist.move(self.playlist.index_of(song_id), playlist_index)
         logger.info("Song with ID %d has been moved to track number %d", song_id, track_number)
 
     def swap_songs_in_playlist(self, song1_id: int, song2_id: int) -> None:
@@ -239,11 +471,7 @@ class PlaylistModel:
             logger.error("Cannot swap a song with itself, both song IDs are the same: %d", song1_id)
             raise ValueError(f"Cannot swap a song with itself, both song IDs are the same: {song1_id}")
 
-        song1 = self.get_song_by_song_id(song1_id)
-        song2 = self.get_song_by_song_id(song2_id)
-        index1 = self.playlist.index(song1)
-        index2 = self.playlist.index(song2)
-        self.playlist[index1], self.playlist[index2] = self.playlist[index2], self.playlist[index1]
+        self.playlist.swap(self.playlist.index_of(song1_id), self.playlist.index_of(song2_id))
         logger.info("Swapped songs with IDs %d and %d", song1_id, song2_id)
 
     ##################################################
@@ -279,9 +507,7 @@ class PlaylistModel:
         logger.info("Starting to play the entire playlist.")
         self.current_track_number = 1
         logger.info("Reset current track number to 1.")
-        for _ in range(self.get_playlist_length()):
-            logger.info("Playing track number: %d", self.current_track_number)
-            self.play_current_song()
+        self._play_tracks(self.get_playlist_length())
         logger.info("Finished playing the entire playlist. Current track number reset to 1.")
 
     def play_rest_of_playlist(self) -> None:
@@ -294,11 +520,43 @@ class PlaylistModel:
         """
         self.check_if_empty()
         logger.info("Starting to play the rest of the playlist from track number: %d", self.current_track_number)
-        for _ in range(self.get_playlist_length() - self.current_track_number + 1):
-            logger.info("Playing track number: %d", self.current_track_number)
-            self.play_current_song()
+        self._play_tracks(self.get_playlist_length() - self.current_track_number + 1)
         logger.info("Finished playing the rest of the playlist. Current track number reset to 1.")
 
+    def _play_tracks(self, count: int) -> None:
+        """
+        Plays count tracks from the current track, updating their play counts in one batch.
+
+        If a song cannot be played, the batch changes nothing and the tracks are played one at
+        a time instead, so the songs before it are counted and the current track stops at it,
+        just as when playing each track with play_current_song.
+
+        Args:
+            count (int): The number of tracks to play. The last one must not be past the end of the playlist.
+
+        Side-effects:
+            Updates the current track number.
+            Updates the play count for each song played.
+
+        Raises:
+            ValueError: If a song does not exist or is marked as deleted.
+        """
+        start = self.current_track_number - 1
+        song_ids = [song.id for song in self.playlist[start:start + count]]
+        logger.info("Playing tracks %d to %d", self.current_track_number, self.current_track_number + count - 1)
+        try:
+            update_play_counts(song_ids)
+        except ValueError:
+            logger.info("Could not play tracks %d to %d together, playing them one at a time",
+                        self.current_track_number, self.current_track_number + count - 1)
+            for _ in range(count):
+                self.play_current_song()
+            return
+
+        previous_track_number = self.current_track_number
+        self.current_track_number = (start + count) % self.get_playlist_length() + 1
+        logger.info("Track number updated from %d to %d", previous_track_number, self.current_track_number)
+
     def rewind_playlist(self) -> None:
         """
         Rewinds the playlist to the beginning.
@@ -333,7 +591,7 @@ class PlaylistModel:
             raise ValueError(f"Invalid song id: {song_id}")
 
         if check_in_playlist:
-            if song_id not in [song_in_playlist.id for song_in_playlist in self.playlist]:
+            if not self.playlist.has_id(song_id):
                 logger.error("Song with id %d not found in playlist", song_id)
                 raise ValueError(f"Song with id {song_id} not found in playlist")
 
@@ -1,10 +1,15 @@
+from collections import Counter
 from dataclasses import dataclass
 import logging
+import math
+import os
 import sqlite3
-from typing import Any
+import threading
+import time
+from typing import Any, Optional
 
 from music_collection.utils.logger import configure_logger
-from music_collection.utils.random_utils import get_random
+from music_collection.utils.random_utils import get_random_numbers
 from music_collection.utils.sql_utils import get_db_connection
 
 
@@ -12,6 +17,36 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# The most song IDs bound in one IN query when updating play counts together
+PLAY_COUNT_BATCH_SIZE = 500
+
+# Random picks guess song IDs up to the largest live one, using a cached count of live
+# songs to size the guesses. Writes in this process refresh the cache at once, writes by
+# other workers within RANDOM_SONG_BOUNDS_TTL seconds.
+RANDOM_SONG_BOUNDS_TTL = float(os.getenv("RANDOM_SONG_BOUNDS_TTL", "5"))
+MAX_RANDOM_SONGS = 100
+# At most this many IDs are guessed per query, in at most this many rounds, before falling
+# back to looking songs up by their position among the live songs
+RANDOM_SONG_MAX_GUESSES = 500
+RANDOM_SONG_MAX_ROUNDS = 3
+
+_catalog_bounds: Optional[tuple[int, int]] = None
+_catalog_bounds_at = 0.0
+_catalog_bounds_lock = threading.Lock()
+
+# The length in seconds of each chart window. Windows trail the current time with hourly
+# granularity: they start on the hour the window length ago falls in, so 24h covers the last
+# 24 hours, whatever the time of day, plus the part of the hour before them.
+CHART_WINDOWS = {
+    '1h': 3600,
+    '24h': 86400,
+    '7d': 7 * 86400,
+}
+
+# The play rollups and their bucket lengths in seconds, coarsest first
+PLAY_ROLLUPS = (('song_plays_daily', 86400), ('song_plays_hourly', 3600))
+
+
 @dataclass
 class Song:
     id: int
@@ -59,6 +94,7 @@ def create_song(artist: str, title: str, year: int, genre: str, duration: int) -
                 VALUES (?, ?, ?, ?, ?)
             """, (artist, title, year, genre, duration))
             conn.commit()
+            invalidate_catalog_bounds()
 
             logger.info("Song created successfully: %s - %s (%d)", artist, title, year)
 
@@ -99,6 +135,7 @@ def delete_song(song_id: int) -> None:
             # Perform the soft delete by setting 'deleted' to TRUE
             cursor.execute("UPDATE songs SET deleted = TRUE WHERE id = ?", (song_id,))
             conn.commit()
+            invalidate_catalog_bounds()
 
             logger.info("Song with ID %s marked as deleted.", song_id)
 
@@ -237,6 +274,129 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def invalidate_catalog_bounds() -> None:
+    """
+    Forgets the cached live song count, so the next random pick counts again.
+    """
+    global _catalog_bounds
+    with _catalog_bounds_lock:
+        _catalog_bounds = None
+
+def get_catalog_bounds(cursor: sqlite3.Cursor, refresh: bool = False) -> tuple[int, int]:
+    """
+    Returns the number of live songs and the largest live song ID, cached for RANDOM_SONG_BOUNDS_TTL seconds.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor to count with on a cache miss.
+        refresh (bool): If True, count again even if the cached values are fresh.
+
+    Returns:
+        tuple[int, int]: The number of non-deleted songs and the largest ID among them, 0 if there are none.
+    """
+    global _catalog_bounds, _catalog_bounds_at
+    with _catalog_bounds_lock:
+        if not refresh and _catalog_bounds is not None and time.monotonic() - _catalog_bounds_at < RANDOM_SONG_BOUNDS_TTL:
+            return _catalog_bounds
+
+    # Both come from the partial index on live songs, without reading the songs themselves
+    cursor.execute("SELECT COUNT(*), MAX(id) FROM songs WHERE deleted = FALSE")
+    count, max_id = cursor.fetchone()
+    bounds = (count, max_id or 0)
+    with _catalog_bounds_lock:
+        _catalog_bounds, _catalog_bounds_at = bounds, time.monotonic()
+    logger.info("Counted %d live songs, largest ID %d", *bounds)
+    return bounds
+
+def get_random_songs(count: int = 1) -> list[Song]:
+    """
+    Retrieves distinct random songs from the catalog without reading the whole catalog.
+
+    Random IDs up to the largest live one are guessed and looked up together, so a pick
+    usually takes one query. Guesses that land on deleted songs or gaps are dropped, which
+    keeps every live song equally likely. If the live songs are too sparse for guessing, each
+    remaining song is the first live one at or after a random ID, a seek on the partial index
+    of live songs that stays O(log n) however many songs are deleted. Those picks favour songs
+    that follow long runs of deleted IDs.
+
+    Args:
+        count (int): The number of songs to pick, at most MAX_RANDOM_SONGS.
+
+    Returns:
+        list[Song]: count distinct songs in random order.
+
+    Raises:
+        ValueError: If count is out of range or the catalog has fewer than count songs.
+        sqlite3.Error: If there is a database error.
+    """
+    if not 1 <= count <= MAX_RANDOM_SONGS:
+        raise ValueError(f"Invalid count: {count}. Must be between 1 and {MAX_RANDOM_SONGS}.")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            live, max_id = get_catalog_bounds(cursor)
+            if live < count:
+                live, max_id = get_catalog_bounds(cursor, refresh=True)
+            if live == 0:
+                logger.info("Cannot retrieve random song because the song catalog is empty.")
+                raise ValueError("The song catalog is empty.")
+            if live < count:
+                raise ValueError(f"Cannot pick {count} distinct songs from a catalog of {live} songs.")
+
+            # Picked songs by ID, in the order they were picked
+            songs: dict[int, Song] = {}
+            guessed: set[int] = set()
+            for _ in range(RANDOM_SONG_MAX_ROUNDS):
+                needed = count - len(songs)
+                # Expect one guess in max_id / live to hit a live song, and allow for misses
+                guesses = math.ceil(needed * max_id / live * 1.5) + 2
+                if needed == 0 or guesses > RANDOM_SONG_MAX_GUESSES:
+                    break
+                candidates = [song_id for song_id in dict.fromkeys(get_random_numbers(max_id, guesses))
+                              if song_id not in guessed]
+                guessed.update(candidates)
+
+                placeholders = ", ".join("?" * len(candidates))
+                cursor.execute(f"""
+                    SELECT id, artist, title, year, genre, duration
+                    FROM songs
+                    WHERE id IN ({placeholders}) AND deleted = FALSE
+                """, candidates)
+                found = {row[0]: Song(*row) for row in cursor.fetchall()}
+                for song_id in candidates:
+                    if song_id in found and len(songs) < count:
+                        songs[song_id] = found[song_id]
+
+            repeats = 0
+            while len(songs) < count:
+                # Seek the first live song from a random ID on, wrapping around past the largest
+                start_id = get_random_numbers(max_id, 1)[0]
+                cursor.execute("""
+                    SELECT id, artist, title, year, genre, duration
+                    FROM songs
+                    WHERE id = COALESCE(
+                        (SELECT MIN(id) FROM songs WHERE deleted = FALSE AND id >= ?),
+                        (SELECT MIN(id) FROM songs WHERE deleted = FALSE)
+                    )
+                """, (start_id,))
+                row = cursor.fetchone()
+                if row is None or row[0] in songs:
+                    repeats += 1
+                    if row is None or repeats % RANDOM_SONG_MAX_GUESSES == 0:
+                        # Songs may have been deleted since they were counted
+                        live, max_id = get_catalog_bounds(cursor, refresh=True)
+                        if live < count:
+                            raise ValueError(f"Cannot pick {count} distinct songs from a catalog of {live} songs.")
+                    continue
+                songs[row[0]] = Song(*row)
+
+            logger.info("Picked %d random songs from %d live songs", count, live)
+            return list(songs.values())
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving random songs: %s", str(e))
+        raise e
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
@@ -248,31 +408,37 @@ def get_random_song() -> Song:
         ValueError: If the catalog is empty.
     """
     try:
-        all_songs = get_all_songs()
-
-        if not all_songs:
-            logger.info("Cannot retrieve random song because the song catalog is empty.")
-            raise ValueError("The song catalog is empty.")
-
-        # Get a random index using the random.org API
-        random_index = get_random(len(all_songs))
-        logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
-
-        # Return the song at the random index, adjust for 0-based indexing
-        song_data = all_songs[random_index - 1]
-        return Song(
-            id=song_data["id"],
-            artist=song_data["artist"],
-            title=song_data["title"],
-            year=song_data["year"],
-            genre=song_data["genre"],
-            duration=song_data["duration"]
-        )
+        song = get_random_songs(1)[0]
+        logger.info("Random song selected: %s (ID: %d)", song.title, song.id)
+        return song
 
     except Exception as e:
         logger.error("Error while retrieving random song: %s", str(e))
         raise e
 
+def record_plays(cursor: sqlite3.Cursor, song_ids: list[int]) -> None:
+    """
+    Appends a play event for each song and adds the plays to the hourly and daily rollups.
+
+    Does not commit, so the events and rollups land in the caller's transaction together
+    with the play counts.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor in the caller's transaction.
+        song_ids (list[int]): The IDs of the songs played, once per play.
+    """
+    played_at = int(time.time())
+    cursor.executemany("INSERT INTO plays (song_id, played_at) VALUES (?, ?)",
+                       [(song_id, played_at) for song_id in song_ids])
+
+    plays_by_song = Counter(song_ids)
+    for table, bucket_seconds in PLAY_ROLLUPS:
+        bucket_start = played_at - played_at % bucket_seconds
+        cursor.executemany(f"""
+            INSERT INTO {table} (bucket_start, song_id, plays) VALUES (?, ?, ?)
+            ON CONFLICT (bucket_start, song_id) DO UPDATE SET plays = plays + excluded.plays
+        """, [(bucket_start, song_id, plays) for song_id, plays in plays_by_song.items()])
+
 def update_play_count(song_id: int) -> None:
     """
     Increments the play count of a song by song ID.
@@ -302,6 +468,7 @@ def update_play_count(song_id: int) -> None:
 
             # Increment the play count
             cursor.execute("UPDATE songs SET play_count = play_count + 1 WHERE id = ?", (song_id,))
+            record_plays(cursor, [song_id])
             conn.commit()
 
             logger.info("Play count incremented for song with ID: %d", song_id)
@@ -309,3 +476,136 @@ def update_play_count(song_id: int) -> None:
     except sqlite3.Error as e:
         logger.error("Database error while updating play count for song with ID %d: %s", song_id, str(e))
         raise e
+
+def update_play_counts(song_ids: list[int]) -> None:
+    """
+    Increments the play counts of several songs in a single transaction.
+
+    The songs are checked with one query and updated with one executemany. A song listed
+    more than once is counted once per listing. If any song does not exist or is marked as
+    deleted, no play count is changed.
+
+    Args:
+        song_ids (list[int]): The IDs of the songs whose play counts should be incremented.
+
+    Raises:
+        ValueError: If a song does not exist or is marked as deleted. The error names the
+            first such song in song_ids.
+        sqlite3.Error: If there is a database error.
+    """
+    if not song_ids:
+        return
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Attempting to update play counts for %d songs", len(song_ids))
+
+            # Check which songs exist and which are deleted, in batches below SQLite's variable limit
+            unique_ids = list(dict.fromkeys(song_ids))
+            deleted_by_id = {}
+            for start in range(0, len(unique_ids), PLAY_COUNT_BATCH_SIZE):
+                batch = unique_ids[start:start + PLAY_COUNT_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                cursor.execute(f"SELECT id, deleted FROM songs WHERE id IN ({placeholders})", batch)
+                deleted_by_id.update(cursor.fetchall())
+
+            for song_id in song_ids:
+                if song_id not in deleted_by_id:
+                    logger.info("Song with ID %d not found", song_id)
+                    raise ValueError(f"Song with ID {song_id} not found")
+                if deleted_by_id[song_id]:
+                    logger.info("Song with ID %d has been deleted", song_id)
+                    raise ValueError(f"Song with ID {song_id} has been deleted")
+
+            # Increment every play count in the same transaction
+            cursor.executemany("UPDATE songs SET play_count = play_count + 1 WHERE id = ?",
+                               [(song_id,) for song_id in song_ids])
+            record_plays(cursor, song_ids)
+            conn.commit()
+
+            logger.info("Play counts incremented for %d songs", len(song_ids))
+
+    except sqlite3.Error as e:
+        logger.error("Database error while updating play counts: %s", str(e))
+        raise e
+
+def get_top_songs(window: str = '24h', limit: int = 10) -> list[dict]:
+    """
+    Retrieves the most played songs in a recent window, read from the play rollups.
+
+    The window trails the current time with hourly granularity, so it starts at the beginning
+    of the hour the window length ago falls in and can hold up to an hour of older plays. The
+    whole days in it are read from the daily rollup and the hours around them from the hourly
+    one; the raw play events are never read.
+
+    Args:
+        window (str): One of the CHART_WINDOWS: '1h', '24h' or '7d'.
+        limit (int): The maximum number of songs to return.
+
+    Returns:
+        list[dict]: The non-deleted songs played in the window, most plays first, each with
+            its number of plays in the window.
+
+    Raises:
+        ValueError: If the window is unknown or the limit is not positive.
+        sqlite3.Error: If there is a database error.
+    """
+    if window not in CHART_WINDOWS:
+        raise ValueError(f"Invalid chart window: {window}. Must be one of {', '.join(CHART_WINDOWS)}.")
+    if limit < 1:
+        raise ValueError(f"Invalid chart limit: {limit}. Must be at least 1.")
+
+    finest_bucket = PLAY_ROLLUPS[-1][1]
+    since = int(time.time()) - CHART_WINDOWS[window]
+    since -= since % finest_bucket
+
+    # Each rollup covers its whole buckets from the window start on, up to where a coarser
+    # rollup took over. The finest rollup starts exactly at the window start.
+    sources = []
+    params: list[int] = []
+    covered_from = None
+    for table, bucket_seconds in PLAY_ROLLUPS:
+        first_bucket = -(-since // bucket_seconds) * bucket_seconds
+        if covered_from is None:
+            sources.append(f"SELECT song_id, plays FROM {table} WHERE bucket_start >= ?")
+            params.append(first_bucket)
+        elif first_bucket < covered_from:
+            sources.append(f"SELECT song_id, plays FROM {table} WHERE bucket_start >= ? AND bucket_start < ?")
+            params += [first_bucket, covered_from]
+        covered_from = first_bucket
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Attempting to retrieve the top %d songs of the last %s", limit, window)
+
+            cursor.execute(f"""
+                SELECT s.id, s.artist, s.title, s.year, s.genre, s.duration, SUM(r.plays) AS plays
+                FROM ({' UNION ALL '.join(sources)}) r
+                JOIN songs s ON s.id = r.song_id
+                WHERE s.deleted = FALSE
+                GROUP BY s.id
+                ORDER BY plays DESC, s.id ASC
+                LIMIT ?
+            """, (*params, limit))
+            rows = cursor.fetchall()
+
+            songs = [
+                {
+                    "id": row[0],
+                    "artist": row[1],
+                    "title": row[2],
+                    "year": row[3],
+                    "genre": row[4],
+                    "duration": row[5],
+                    "plays": row[6],
+                }
+                for row in rows
+            ]
+            logger.info("Retrieved %d songs for the %s chart", len(songs), window)
+            return songs
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving the %s chart: %s", window, str(e))
+        raise e
@@ -1,26 +1,137 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
+import threading
+from typing import Optional
 
-from flask import current_app, has_request_context
+from flask.logging import default_handler
 
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+# Logging settings, overridable from the environment. LOG_SAMPLE_RATES keeps only a fraction
+# of the INFO and DEBUG records of busy loggers, e.g.
+# "meal_max.models.battle_model=0.1,music_collection.models.playlist_model=0.05".
+# Warnings and errors are never sampled out.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """
+    Parses a comma-separated list of logger=rate pairs.
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+    Args:
+        spec (str): The pairs, for example "meal_max.models.battle_model=0.1".
 
-    # Add the handler to the logger
+    Returns:
+        dict[str, float]: The sample rate of each logger.
+
+    Raises:
+        ValueError: If a pair is malformed or a rate is not between 0 and 1.
+    """
+    rates = {}
+    for pair in filter(None, (pair.strip() for pair in spec.split(","))):
+        name, _, rate = pair.partition("=")
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            raise ValueError(f"Invalid log sample rate: {pair}. Expected logger=rate.")
+        if not 0 <= rates[name.strip()] <= 1:
+            raise ValueError(f"Invalid log sample rate: {pair}. Must be between 0 and 1.")
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through a random fraction of the records at or below a level, and every record above it.
+
+    Attributes:
+        rate (float): The fraction of records to keep, between 0 and 1.
+        max_level (int): The highest level that is sampled.
+    """
+
+    def __init__(self, rate: float, max_level: int = logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self.max_level or random.random() < self.rate
+
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_stream_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_configured: set = set()
+_lock = threading.Lock()
+
+
+def _start_listener() -> None:
+    global _listener
+    _listener = logging.handlers.QueueListener(_queue, _stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener_after_fork() -> None:
+    # The listener thread does not survive fork, so a forked worker needs its own
+    global _lock
+    _lock = threading.Lock()
+    if _listener is not None:
+        _start_listener()
+
+
+def get_queue_handler() -> logging.handlers.QueueHandler:
+    """
+    Returns the handler shared by every configured logger, starting the listener on first use.
+
+    Records are put on an in-memory queue, and a single background thread formats them and
+    writes them to stderr, so the calling thread never waits on I/O.
+
+    Returns:
+        logging.handlers.QueueHandler: The shared queue handler.
+    """
+    global _queue_handler, _stream_handler
+    with _lock:
+        if _queue_handler is None:
+            _stream_handler = logging.StreamHandler(sys.stderr)
+            _stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            _start_listener()
+            atexit.register(_stop_listener)
+            os.register_at_fork(after_in_child=_restart_listener_after_fork)
+            _queue_handler = logging.handlers.QueueHandler(_queue)
+        return _queue_handler
+
+
+def configure_logger(logger: logging.Logger) -> None:
+    """
+    Sets a logger's level from LOG_LEVEL and routes it through the shared queue handler.
+
+    Configuring the same logger again does nothing, so handlers never pile up. Flask's own
+    stderr handler is replaced, and loggers listed in LOG_SAMPLE_RATES get a sampling filter.
+
+    Args:
+        logger (logging.Logger): The logger to configure.
+    """
+    handler = get_queue_handler()
+    with _lock:
+        if logger.name in _configured:
+            return
+        _configured.add(logger.name)
+
+    logger.setLevel(LOG_LEVEL)
+    logger.removeHandler(default_handler)
     logger.addHandler(handler)
 
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+    rate = parse_sample_rates(LOG_SAMPLE_RATES).get(logger.name)
+    if rate is not None and rate < 1:
+        logger.addFilter(SamplingFilter(rate))
@@ -0,0 +1,212 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+from typing import Iterator, Optional
+
+from flask import Flask, Response, g, request
+
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Labels are passed as a tuple of (name, value) pairs so they can be used as a dictionary key
+Labels = tuple
+
+
+class Counter:
+    """
+    A monotonically increasing count.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets, plus their total and sum.
+
+    Attributes:
+        buckets (tuple[float, ...]): The sorted upper bounds of the buckets.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Holds every counter and histogram of the process and renders them in the Prometheus text format.
+
+    Looking up an existing series is a plain dictionary read, so recording a value costs
+    about a microsecond. The registry lock is only taken when a new series is created.
+    """
+
+    def __init__(self):
+        self._series: dict[tuple[str, Labels], object] = {}
+        self._types: dict[str, str] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, labels: Labels, kind: type) -> object:
+        metric = self._series.get((name, labels))
+        if metric is None:
+            with self._lock:
+                metric = self._series.get((name, labels))
+                if metric is None:
+                    metric = kind()
+                    self._series[(name, labels)] = metric
+                    self._types.setdefault(name, 'counter' if kind is Counter else 'histogram')
+        return metric
+
+    def describe(self, name: str, help_text: str) -> None:
+        """
+        Sets the help text shown for a metric.
+
+        Args:
+            name (str): The metric name.
+            help_text (str): One line describing the metric.
+        """
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        """
+        Adds to a counter, creating it on first use.
+
+        Args:
+            name (str): The metric name.
+            labels (Labels): The (name, value) label pairs of the series.
+            amount (float): How much to add.
+        """
+        self._get(name, labels, Counter).inc(amount)
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """
+        Records a value in a histogram, creating it on first use.
+
+        Args:
+            name (str): The metric name.
+            value (float): The value to record, in seconds for timings.
+            labels (Labels): The (name, value) label pairs of the series.
+        """
+        self._get(name, labels, Histogram).observe(value)
+
+    @contextmanager
+    def timer(self, name: str, labels: Labels = ()) -> Iterator[None]:
+        """
+        Records how long the block took in a histogram, even if it raises.
+
+        Args:
+            name (str): The metric name.
+            labels (Labels): The (name, value) label pairs of the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def render(self) -> str:
+        """
+        Renders every series in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+        current = None
+        for (name, labels), metric in series:
+            if name != current:
+                current = name
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types[name]}")
+
+            if isinstance(metric, Counter):
+                lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+                continue
+
+            with metric._lock:
+                counts, total, count = list(metric.counts), metric.sum, metric.count
+            cumulative = 0
+            for bound, bucket_count in zip(metric.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in labels)
+    return "{" + pairs + "}"
+
+
+# The process-wide registry. Under several worker processes each worker reports its own.
+metrics = MetricsRegistry()
+metrics.describe("http_request_duration_seconds", "Time spent handling a request, by route template.")
+metrics.describe("http_requests_total", "Requests handled, by route template and status code.")
+
+
+def instrument_app(app: Flask) -> None:
+    """
+    Records the latency and status of every request, labelled by route template and method.
+
+    The sample is taken on teardown, which runs even when a view or an after_request hook raises,
+    so requests that end in an unhandled exception are recorded as 500s.
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_status(response: Response) -> Response:
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exc: Optional[BaseException]) -> None:
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            # The route template rather than the path, so IDs do not create a series each
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            labels = (('route', route), ('method', request.method))
+            # No response was finished if the request raised past Flask's error handling
+            status = g.pop('metrics_status', 500)
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start, labels)
+            metrics.inc("http_requests_total", labels + (('status', str(status)),))
+
+
+def metrics_response() -> Response:
+    """
+    Builds the response for a /api/metrics route.
+
+    Returns:
+        Response: The metrics page in the Prometheus text format.
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
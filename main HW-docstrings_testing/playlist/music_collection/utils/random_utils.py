@@ -1,48 +1,350 @@
+from collections import deque
 import logging
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Optional
+
 import requests
 
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("random_provider_request_seconds", "Time spent waiting on random.org.")
+metrics.describe("random_provider_failures_total", "Failed random.org requests, by reason.")
+metrics.describe("random_pool_draws_total", "Random numbers taken from the pool, by source (pool or fallback).")
+
+
+# random.org serves at most this many integers per request, each at most this large
+RANDOM_ORG_MAX_NUM = 10000
+RANDOM_ORG_MAX_VALUE = 10**9
+
+# pool settings, overridable from the environment
+RANDOM_POOL_SIZE = int(os.getenv("RANDOM_POOL_SIZE", "1000"))
+RANDOM_POOL_LOW_WATER = int(os.getenv("RANDOM_POOL_LOW_WATER", "250"))
+RANDOM_POOL_FALLBACK = os.getenv("RANDOM_POOL_FALLBACK", "true").lower() == "true"
+# after a failed refill, an empty pool falls back for this many seconds instead of waiting on random.org
+RANDOM_POOL_RETRY_AFTER = float(os.getenv("RANDOM_POOL_RETRY_AFTER", "30"))
+
 
-def get_random(num_songs: int) -> int:
+# One keep-alive session for every refill, recreated in forked workers
+_session = requests.Session()
+
+
+def fetch_random_integers(num: int) -> list[int]:
     """
-    Fetches a random int between 1 and the number of songs in the catalog from random.org.
+    Fetches num random ints between 0 and RANDOM_ORG_MAX_VALUE - 1 from random.org in one request,
+    over a keep-alive session.
+
+    Args:
+        num (int): How many numbers to fetch, at most RANDOM_ORG_MAX_NUM.
 
     Returns:
-        int: The random number fetched from random.org.
+        list[int]: The random numbers fetched from random.org.
 
     Raises:
-        RuntimeError: If the request to random.org fails or returns an invalid response.
-        ValueError: If the response from random.org is not a valid float.
+        RuntimeError: If the request to random.org fails or times out.
+        ValueError: If the response from random.org is not num valid ints.
     """
-    url = f"https://www.random.org/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
+    url = (f"https://www.random.org/integers/?num={num}&min=0&max={RANDOM_ORG_MAX_VALUE - 1}"
+           "&col=1&base=10&format=plain&rnd=new")
 
     try:
-        # Log the request to random.org
-        logger.info("Fetching random number from %s", url)
+        logger.info("Fetching %d random numbers from random.org", num)
 
-        response = requests.get(url, timeout=5)
+        with metrics.timer("random_provider_request_seconds"):
+            response = _session.get(url, timeout=5)
 
-        # Check if the request was successful
         response.raise_for_status()
 
-        random_number_str = response.text.strip()
-
         try:
-            random_number = int(random_number_str)
+            numbers = [int(line) for line in response.text.split()]
         except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
+            raise ValueError("Invalid response from random.org: %s" % response.text.strip()[:80])
+        if len(numbers) != num:
+            raise ValueError("Expected %d numbers from random.org, got %d" % (num, len(numbers)))
 
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        return numbers
 
     except requests.exceptions.Timeout:
+        metrics.inc("random_provider_failures_total", (('reason', 'timeout'),))
         logger.error("Request to random.org timed out.")
         raise RuntimeError("Request to random.org timed out.")
 
     except requests.exceptions.RequestException as e:
+        metrics.inc("random_provider_failures_total", (('reason', 'error'),))
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+    except ValueError:
+        metrics.inc("random_provider_failures_total", (('reason', 'invalid'),))
+        raise
+
+
+class RandomPool:
+    """
+    A pool of prefetched random ints between 0 and RANDOM_ORG_MAX_VALUE - 1, refilled in bulk from a provider.
+
+    Draws in any range are cut from the pooled numbers by rejection sampling, so one refill
+    serves catalogs of every size. When the pool drops below the low-water mark a background
+    thread refills it. An empty pool, such as a new one after a worker starts, is refilled
+    inline before it is drawn from. If that refill fails, numbers come from the local CSPRNG
+    when fallback is on, and the pool does not wait on the provider again for
+    RANDOM_POOL_RETRY_AFTER seconds. The provider is never called with the pool lock held.
+
+    Attributes:
+        provider (Callable[[int], list[int]]): Fetches the given number of random ints.
+        capacity (int): The number of numbers the pool is filled up to.
+        low_water (int): The pool size that triggers a refill.
+        fallback (bool): Whether to fall back to the local CSPRNG instead of failing.
+        background (bool): Whether refills below the low-water mark run on a background thread.
+    """
+
+    def __init__(self, provider: Callable[[int], list[int]] = fetch_random_integers,
+                 capacity: int = RANDOM_POOL_SIZE, low_water: int = RANDOM_POOL_LOW_WATER,
+                 fallback: bool = RANDOM_POOL_FALLBACK, background: bool = True):
+        if not 1 <= capacity <= RANDOM_ORG_MAX_NUM:
+            raise ValueError(f"Invalid pool capacity: {capacity}. Must be between 1 and {RANDOM_ORG_MAX_NUM}.")
+        if not 0 <= low_water <= capacity:
+            raise ValueError(f"Invalid low-water mark: {low_water}. Must be between 0 and {capacity}.")
+
+        self.provider = provider
+        self.capacity = capacity
+        self.low_water = low_water
+        self.fallback = fallback
+        self.background = background
+
+        self._numbers: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retry_at = 0.0
+
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
+        self._inline_refills = 0
+        self._refills = 0
+        self._refill_failures = 0
+        self._fetched = 0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="random-pool-refill", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.refill()
+                backoff = 1.0
+            except (RuntimeError, ValueError):
+                # Give the provider time to recover before asking again
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                if len(self._numbers) < self.low_water:
+                    self._wake.set()
+
+    def refill(self) -> int:
+        """
+        Tops the pool up to capacity with a single request to the provider.
+
+        Returns:
+            int: The number of random numbers added.
+
+        Raises:
+            RuntimeError: If the provider request fails.
+            ValueError: If the provider response is invalid.
+        """
+        with self._refill_lock:
+            needed = self.capacity - len(self._numbers)
+            if needed <= 0:
+                return 0
+
+            try:
+                numbers = self.provider(needed)
+            except (RuntimeError, ValueError) as e:
+                with self._lock:
+                    self._refill_failures += 1
+                    self._retry_at = time.monotonic() + RANDOM_POOL_RETRY_AFTER
+                logger.error("Random pool refill failed: %s", e)
+                raise
+
+            with self._lock:
+                self._retry_at = 0.0
+                self._numbers.extend(numbers)
+                self._refills += 1
+                self._fetched += len(numbers)
+
+            logger.info("Random pool refilled with %d numbers", len(numbers))
+            return len(numbers)
+
+    def _take(self, count: int) -> list[int]:
+        with self._lock:
+            taken = [self._numbers.popleft() for _ in range(min(count, len(self._numbers)))]
+            low = len(self._numbers) < self.low_water
+        if low and self.background:
+            self._start()
+            self._wake.set()
+        return taken
+
+    def _draw(self, count: int) -> list[int]:
+        # Takes count raw numbers, refilling inline while the pool runs dry
+        numbers = self._take(count)
+        hits = len(numbers)
+        while len(numbers) < count and (not self.fallback or time.monotonic() >= self._retry_at):
+            with self._lock:
+                self._inline_refills += 1
+            try:
+                self.refill()
+            except (RuntimeError, ValueError):
+                if not self.fallback:
+                    raise
+                break
+            numbers.extend(self._take(count - len(numbers)))
+
+        missing = count - len(numbers)
+        with self._lock:
+            self._hits += hits
+            self._misses += count - hits
+            self._fallbacks += missing
+        if missing:
+            logger.warning("Random pool empty, drawing %d numbers from the local CSPRNG", missing)
+            metrics.inc("random_pool_draws_total", (('source', 'fallback'),), missing)
+            numbers.extend(secrets.randbelow(RANDOM_ORG_MAX_VALUE) for _ in range(missing))
+        metrics.inc("random_pool_draws_total", (('source', 'pool'),), count - missing)
+        return numbers
+
+    def get_many(self, max_value: int, count: int) -> list[int]:
+        """
+        Takes count random ints between 1 and max_value.
+
+        Args:
+            max_value (int): The largest number to return, at most RANDOM_ORG_MAX_VALUE.
+            count (int): How many numbers to take.
+
+        Returns:
+            list[int]: count uniformly distributed ints between 1 and max_value, possibly repeated.
+
+        Raises:
+            ValueError: If max_value or count is out of range, or the provider response is invalid and fallback is off.
+            RuntimeError: If the provider fails and fallback is off.
+        """
+        if not 1 <= max_value <= RANDOM_ORG_MAX_VALUE:
+            raise ValueError(f"Invalid range: 1 to {max_value}. Must be within 1 to {RANDOM_ORG_MAX_VALUE}.")
+        if count < 0:
+            raise ValueError(f"Invalid count: {count}. Must be non-negative.")
+
+        # Reject the top of the range that max_value does not divide, so every result is equally likely
+        limit = RANDOM_ORG_MAX_VALUE - RANDOM_ORG_MAX_VALUE % max_value
+        numbers = []
+        while len(numbers) < count:
+            numbers.extend(number % max_value + 1 for number in self._draw(count - len(numbers)) if number < limit)
+        return numbers
+
+    def stop(self) -> None:
+        """
+        Stops the background refill thread.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the pool hit, miss and refill counters.
+
+        Returns:
+            dict[str, Any]: The pool counters.
+        """
+        with self._lock:
+            return {
+                'size': len(self._numbers),
+                'capacity': self.capacity,
+                'low_water': self.low_water,
+                'hits': self._hits,
+                'misses': self._misses,
+                'fallbacks': self._fallbacks,
+                'inline_refills': self._inline_refills,
+                'refills': self._refills,
+                'refill_failures': self._refill_failures,
+                'fetched': self._fetched,
+            }
+
+
+_pool: Optional[RandomPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_random_pool() -> RandomPool:
+    """
+    Returns the process-wide random number pool, creating it on first use.
+
+    Returns:
+        RandomPool: The shared pool, backed by random.org.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RandomPool()
+    return _pool
+
+
+def _reset_random_pool_after_fork() -> None:
+    # The refill thread does not survive fork, so a forked worker starts with a pool of its own,
+    # and a session of its own rather than sockets shared with the parent
+    global _pool, _pool_lock, _session
+    _pool = None
+    _pool_lock = threading.Lock()
+    _session = requests.Session()
+
+
+os.register_at_fork(after_in_child=_reset_random_pool_after_fork)
+
+
+def set_random_pool(pool: Optional[RandomPool]) -> None:
+    """
+    Replaces the process-wide random number pool, for example with one backed by a stub provider.
+
+    Args:
+        pool (Optional[RandomPool]): The new pool, or None to create a default one on next use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.stop()
+        _pool = pool
+
+
+def get_random_numbers(max_value: int, count: int) -> list[int]:
+    """
+    Takes count random ints between 1 and max_value from the pooled random.org numbers.
+
+    Args:
+        max_value (int): The largest number to return.
+        count (int): How many numbers to take.
+
+    Returns:
+        list[int]: The random numbers, possibly repeated.
+
+    Raises:
+        ValueError: If the arguments are out of range, or random.org sends an invalid response and fallback is off.
+        RuntimeError: If the request to random.org fails and fallback is off.
+    """
+    numbers = get_random_pool().get_many(max_value, count)
+    logger.info("Took %d random numbers up to %d from the pool", len(numbers), max_value)
+    return numbers
@@ -2,13 +2,18 @@ from contextlib import contextmanager
 import logging
 import os
 import sqlite3
+import time
 
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import metrics
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("db_connection_acquire_seconds", "Time spent opening a database connection.")
+metrics.describe("db_connection_hold_seconds", "Time a connection was held by its caller, which is mostly query time.")
+
 
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/song_catalog.db")
@@ -55,17 +60,24 @@ def get_db_connection():
     """
     Context manager for SQLite database connection.
 
+    The time taken to connect, and how long the caller held the connection, are recorded
+    in the metrics registry.
+
     Yields:
         sqlite3.Connection: The SQLite connection object.
     """
     conn = None
     try:
+        start = time.perf_counter()
         conn = sqlite3.connect(DB_PATH)
+        connected = time.perf_counter()
+        metrics.observe("db_connection_acquire_seconds", connected - start)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
         if conn:
+            metrics.observe("db_connection_hold_seconds", time.perf_counter() - connected)
             conn.close()
             logger.info("Database connection closed.")
@@ -460,6 +460,23 @@ get_song_leaderboard() {
   fi
 }
 
+# Function to get the most played songs in a window
+get_charts() {
+  window=$1
+  echo "Getting the $window chart..."
+  response=$(curl -s -X GET "$BASE_URL/charts?window=$window&limit=5")
+  if echo "$response" | grep -q '"status": "success"'; then
+    echo "Chart for $window retrieved successfully."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Chart JSON ($window):"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to get the $window chart."
+    exit 1
+  fi
+}
+
 
 # Health checks
 check_health
@@ -510,5 +527,8 @@ play_current_song
 play_rest_of_playlist
 
 get_song_leaderboard
+get_charts 1h
+get_charts 24h
+get_charts 7d
 
 echo "All tests passed successfully!"
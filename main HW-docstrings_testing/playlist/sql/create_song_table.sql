@@ -1,3 +1,6 @@
+DROP TABLE IF EXISTS song_plays_daily;
+DROP TABLE IF EXISTS song_plays_hourly;
+DROP TABLE IF EXISTS plays;
 DROP TABLE IF EXISTS songs;
 CREATE TABLE songs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -9,4 +12,30 @@ CREATE TABLE songs (
     play_count INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE,
     UNIQUE(artist, title, year)
-);
\ No newline at end of file
+);
+
+-- The IDs of the live songs, for counting them and picking random ones
+CREATE INDEX idx_songs_live ON songs(id) WHERE deleted = FALSE;
+
+-- One row per play, appended by the playback path. played_at is a Unix timestamp in seconds.
+CREATE TABLE plays (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    played_at INTEGER NOT NULL
+);
+
+-- Plays per song per hour and per day (UTC), kept up to date in the same transaction as
+-- the plays themselves so that charts never read the raw events.
+CREATE TABLE song_plays_hourly (
+    bucket_start INTEGER NOT NULL,
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, song_id)
+) WITHOUT ROWID;
+
+CREATE TABLE song_plays_daily (
+    bucket_start INTEGER NOT NULL,
+    song_id INTEGER NOT NULL REFERENCES songs(id),
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, song_id)
+) WITHOUT ROWID;
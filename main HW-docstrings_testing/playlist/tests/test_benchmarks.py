@@ -0,0 +1,31 @@
+import pytest
+
+from benchmarks.bench_playlist_model import percentile, run_benchmarks
+
+
+##################################################
+# Benchmark Test Cases
+##################################################
+
+def test_percentile():
+    """Test the nearest-rank percentile of sorted samples."""
+    samples = [float(i) for i in range(1, 101)]
+
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([7.0], 0.99) == 7.0
+
+def test_run_benchmarks_small_playlist():
+    """Test that a run against a small playlist times every operation on both structures."""
+    report = run_benchmarks([50], iterations=5)
+
+    operations = report['results']['50']
+    for name in ('get_by_track_number', 'move_song_to_track_number', 'swap_songs', 'remove_and_reinsert'):
+        assert operations[name]['list']['iterations'] == 5
+        assert operations[name]['song_list']['iterations'] == 5
+        assert operations[name]['speedup_p50'] > 0
+
+def test_run_benchmarks_invalid_iterations():
+    """Test that a run needs at least one iteration."""
+    with pytest.raises(ValueError, match="Invalid number of iterations"):
+        run_benchmarks([50], iterations=0)
@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from loadtest import PlaylistScenario
+from music_collection.utils import sql_utils
+from music_collection.utils.loadtest_harness import run_load
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")
+
+
+@pytest.fixture
+def base_url(tmp_path, monkeypatch):
+    """Serves the app from a background thread against a fresh database."""
+    db_path = str(tmp_path / "song_catalog.db")
+    conn = sqlite3.connect(db_path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", db_path)
+
+    from app import app
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+
+
+def test_run_load_against_app(base_url):
+    """Test a short run of the playlist mix against the live app, cycling songs through the playlist."""
+    report = run_load(PlaylistScenario(songs=5), base_url, concurrency=1, duration=5, max_requests=100)
+
+    assert report['totals']['requests'] >= 100
+    assert report['totals']['errors'] == 0
+    assert "POST /add-song-to-playlist" in report['routes']
+    assert "DELETE /remove-song-from-playlist" in report['routes']
+    assert "POST /play-current-song" in report['routes']
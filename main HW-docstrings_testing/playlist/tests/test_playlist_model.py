@@ -1,6 +1,6 @@
 import pytest
 
-from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.playlist_model import PlaylistModel, SongList
 from music_collection.models.song_model import Song
 
 
@@ -14,6 +14,11 @@ def mock_update_play_count(mocker):
     """Mock the update_play_count function for testing purposes."""
     return mocker.patch("music_collection.models.playlist_model.update_play_count")
 
+@pytest.fixture
+def mock_update_play_counts(mocker):
+    """Mock the batched update_play_counts function for testing purposes."""
+    return mocker.patch("music_collection.models.playlist_model.update_play_counts")
+
 """Fixtures providing sample songs for the tests."""
 @pytest.fixture
 def sample_song1():
@@ -283,21 +288,20 @@ def test_go_to_track_number(playlist_model, sample_playlist):
     playlist_model.go_to_track_number(2)
     assert playlist_model.current_track_number == 2, "Expected to be at track 2 after moving song"
 
-def test_play_entire_playlist(playlist_model, sample_playlist, mock_update_play_count):
+def test_play_entire_playlist(playlist_model, sample_playlist, mock_update_play_count, mock_update_play_counts):
     """Test playing the entire playlist."""
     playlist_model.playlist.extend(sample_playlist)
 
     playlist_model.play_entire_playlist()
 
-    # Check that all play counts were updated
-    mock_update_play_count.assert_any_call(1)
-    mock_update_play_count.assert_any_call(2)
-    assert mock_update_play_count.call_count == len(playlist_model.playlist)
+    # Check that all play counts were updated in one batch
+    mock_update_play_counts.assert_called_once_with([1, 2])
+    mock_update_play_count.assert_not_called()
 
     # Check that the current track number was updated back to the first song
     assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
 
-def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play_count):
+def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play_count, mock_update_play_counts):
     """Test playing from the current position to the end of the playlist."""
     playlist_model.playlist.extend(sample_playlist)
     playlist_model.current_track_number = 2
@@ -305,7 +309,107 @@ def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play
     playlist_model.play_rest_of_playlist()
 
     # Check that play counts were updated for the remaining songs
-    mock_update_play_count.assert_any_call(2)
-    assert mock_update_play_count.call_count == 1
+    mock_update_play_counts.assert_called_once_with([2])
+    mock_update_play_count.assert_not_called()
+
+    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
+
+def test_play_entire_playlist_unplayable_song(playlist_model, mock_update_play_count, mock_update_play_counts):
+    """Test that a deleted song stops playback at its track after counting the songs before it."""
+    playlist_model.playlist.extend(make_songs(4))
+    mock_update_play_counts.side_effect = ValueError("Song with ID 3 has been deleted")
+    mock_update_play_count.side_effect = [None, None, ValueError("Song with ID 3 has been deleted")]
+
+    with pytest.raises(ValueError, match="Song with ID 3 has been deleted"):
+        playlist_model.play_entire_playlist()
+
+    assert [call.args[0] for call in mock_update_play_count.call_args_list] == [1, 2, 3]
+    assert playlist_model.current_track_number == 3, "Expected to stop at the deleted song"
+
+##################################################
+# Song Index Test Cases
+##################################################
+
+def make_songs(count):
+    """Returns count songs with IDs 1 to count."""
+    return [Song(i, f'Artist {i}', f'Song {i}', 2020, 'Pop', 100) for i in range(1, count + 1)]
+
+def assert_index_consistent(playlist):
+    """Checks every song's indexed position and lookup against the list itself."""
+    for position, song in enumerate(playlist):
+        assert playlist.index_of(song.id) == position
+        assert playlist.get_by_id(song.id) is song
+
+def test_assigned_list_is_indexed(playlist_model):
+    """Test that assigning a plain list to the playlist indexes it."""
+    playlist_model.playlist = make_songs(3)
+
+    assert isinstance(playlist_model.playlist, SongList)
+    assert playlist_model.get_song_by_song_id(2).title == 'Song 2'
+
+def test_index_follows_reordering(playlist_model):
+    """Test that positions stay correct through moves, swaps and removals."""
+    playlist_model.playlist.extend(make_songs(10))
+
+    playlist_model.move_song_to_beginning(7)
+    playlist_model.swap_songs_in_playlist(1, 10)
+    playlist_model.move_song_to_track_number(3, 9)
+    playlist_model.remove_song_by_track_number(2)
+    playlist_model.move_song_to_end(7)
+    playlist_model.remove_song_by_song_id(5)
+
+    assert [song.id for song in playlist_model.playlist] == [2, 4, 6, 8, 9, 3, 1, 7]
+    assert_index_consistent(playlist_model.playlist)
+
+def test_index_follows_direct_list_changes(playlist_model):
+    """Test that changing the playlist list directly keeps the index in step."""
+    playlist = playlist_model.playlist
+    playlist.extend(make_songs(6))
+
+    playlist.insert(0, Song(7, 'Artist 7', 'Song 7', 2020, 'Pop', 100))
+    del playlist[3]
+    playlist.pop()
+    playlist.reverse()
+    playlist[1] = Song(8, 'Artist 8', 'Song 8', 2020, 'Pop', 100)
+    del playlist[0:1]
+
+    assert_index_consistent(playlist)
+    assert not playlist.has_id(3)
+    assert playlist_model.validate_song_id(8) == 8
+
+def test_duplicate_song_id_rejected_by_list(playlist_model, sample_song1):
+    """Test error when a song ID would appear twice in the playlist list."""
+    playlist_model.playlist.append(sample_song1)
+
+    with pytest.raises(ValueError, match="Song with ID 1 already exists in the playlist"):
+        playlist_model.playlist.extend([sample_song1])
+    assert len(playlist_model.playlist) == 1
 
-    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
\ No newline at end of file
+def test_song_list_blocks_split_and_merge():
+    """Test that positions stay correct while small blocks split and merge."""
+    songs = SongList(make_songs(20), block_size=2)
+
+    for track in (0, 5, 19, 3):
+        songs.insert(track, Song(100 + track, 'Artist', 'Song', 2020, 'Pop', 100))
+    for _ in range(15):
+        del songs[len(songs) // 2]
+    songs.move(0, len(songs) - 1)
+    songs.swap(1, len(songs) - 2)
+
+    assert len(songs) == 9
+    assert_index_consistent(songs)
+    assert all(0 < len(block) <= 4 for block in songs._blocks)
+
+def test_song_list_invalid_block_size():
+    """Test error when the block size is too small."""
+    with pytest.raises(ValueError, match="Invalid block size"):
+        SongList(block_size=1)
+
+def test_song_list_track_out_of_range():
+    """Test that positions past the end raise IndexError like a list."""
+    songs = SongList(make_songs(3))
+
+    with pytest.raises(IndexError):
+        songs[3]
+    with pytest.raises(IndexError):
+        del songs[-4]
@@ -1,50 +1,144 @@
+import threading
+import time
+
 import pytest
 import requests
 
-from music_collection.utils.random_utils import get_random
+from music_collection.utils import random_utils
+from music_collection.utils.random_utils import RANDOM_ORG_MAX_VALUE, RandomPool, fetch_random_integers
 
 
-RANDOM_NUMBER = 42
 NUM_SONGS = 100
+SESSION_GET = "music_collection.utils.random_utils._session.get"
 
 @pytest.fixture
 def mock_random_org(mocker):
-    # Patch the requests.get call
-    # requests.get returns an object, which we have replaced with a mock object
+    """Mocks the random.org session, returning its response."""
     mock_response = mocker.Mock()
-    # We are giving that object a text attribute
-    mock_response.text = f"{RANDOM_NUMBER}"
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.text = "42"
+    mocker.patch(SESSION_GET, return_value=mock_response)
     return mock_response
 
 
-def test_get_random(mock_random_org):
-    """Test retrieving a random number from random.org."""
-    result = get_random(NUM_SONGS)
+def test_fetch_random_integers(mock_random_org):
+    """Test fetching a batch of random numbers in one request."""
+    mock_random_org.text = "5\n17\n42\n"
 
-    # Assert that the result is the mocked random number
-    assert result == RANDOM_NUMBER, f"Expected random number {RANDOM_NUMBER}, but got {result}"
+    assert fetch_random_integers(3) == [5, 17, 42]
+    random_utils._session.get.assert_called_once_with(
+        f"https://www.random.org/integers/?num=3&min=0&max={RANDOM_ORG_MAX_VALUE - 1}&col=1&base=10&format=plain&rnd=new", timeout=5)
 
-    # Ensure that the correct URL was called
-    requests.get.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new", timeout=5)
+def test_fetch_random_integers_reuses_session(mock_random_org):
+    """Test that refills share one keep-alive session instead of opening a connection each."""
+    mock_random_org.text = "1\n"
+    fetch_random_integers(1)
+    fetch_random_integers(1)
 
-def test_get_random_request_failure(mocker):
-    """Simulate  a request failure."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+    assert isinstance(random_utils._session, requests.Session)
+    assert random_utils._session.get.call_count == 2
 
-    with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
-        get_random(NUM_SONGS)
+def test_fetch_random_integers_short_response(mock_random_org):
+    """Test error when random.org sends fewer numbers than asked for."""
+    mock_random_org.text = "5\n17\n"
 
-def test_get_random_timeout(mocker):
-    """Simulate  a timeout."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.Timeout)
+    with pytest.raises(ValueError, match="Expected 3 numbers from random.org, got 2"):
+        fetch_random_integers(3)
 
-    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
-        get_random(NUM_SONGS)
+def test_random_pool_refills_in_batches():
+    """Test that the pool serves many draws from one provider request."""
+    requests_made = []
+    def provider(num):
+        requests_made.append(num)
+        return list(range(num))
+    pool = RandomPool(provider, capacity=10, low_water=0, background=False)
+
+    assert pool.get_many(NUM_SONGS, 4) == [1, 2, 3, 4]
+    assert pool.get_many(NUM_SONGS, 8) == [5, 6, 7, 8, 9, 10, 1, 2]
+    assert requests_made == [10, 10]
+    stats = pool.stats()
+    assert stats['hits'] == 6
+    assert stats['misses'] == 6
+    assert stats['inline_refills'] == 2
+
+def test_random_pool_rejects_biased_numbers():
+    """Test that numbers above the largest multiple of the range are skipped."""
+    pool = RandomPool(lambda num: [RANDOM_ORG_MAX_VALUE - 1, 3] * (num // 2), capacity=10, low_water=0, background=False)
+
+    # 10**9 is not a multiple of 7, so its top numbers would favour small results
+    assert pool.get_many(7, 2) == [4, 4]
+
+def test_random_pool_background_refill():
+    """Test that dropping below the low-water mark refills the pool on the background thread."""
+    requests_made = []
+    refilled = threading.Event()
+
+    def provider(num):
+        requests_made.append(num)
+        if len(requests_made) == 2:
+            refilled.set()
+        return [0] * num
+
+    pool = RandomPool(provider, capacity=4, low_water=2, fallback=True, background=True)
+    try:
+        # The pool starts empty, so the first draws refill it inline
+        assert pool.get_many(NUM_SONGS, 3) == [1, 1, 1]
+        # One number is left, below the low-water mark, which wakes the refill thread
+        assert refilled.wait(timeout=5)
+        pool.stop()
+        assert requests_made == [4, 3]
+        assert pool.stats()['size'] == 4
+        assert pool.stats()['fallbacks'] == 0
+    finally:
+        pool.stop()
+
+def test_random_pool_refill_outside_lock():
+    """Test that a slow provider request does not stop other threads drawing pooled numbers."""
+    release = threading.Event()
+    blocked = threading.Event()
+    requests_made = []
 
-def test_get_random_invalid_response(mock_random_org):
-    """Simulate  an invalid response (non-digit)."""
-    mock_random_org.text = "invalid_response"
+    def provider(num):
+        requests_made.append(num)
+        if len(requests_made) == 2:
+            blocked.set()
+            release.wait(timeout=5)
+        return [0] * num
+
+    pool = RandomPool(provider, capacity=4, low_water=4, fallback=False, background=True)
+    try:
+        pool.get_many(NUM_SONGS, 1)  # Refills, then drops below the low-water mark
+        assert blocked.wait(timeout=5)  # The background refill is now stuck in the provider
+
+        start = time.perf_counter()
+        assert pool.get_many(NUM_SONGS, 2) == [1, 1]
+        assert time.perf_counter() - start < 1
+    finally:
+        release.set()
+        pool.stop()
+
+def test_random_pool_fallback(mocker):
+    """Test that the pool draws from the local CSPRNG when random.org is down."""
+    session_get = mocker.patch(SESSION_GET, side_effect=requests.exceptions.Timeout)
+    pool = RandomPool(capacity=10, low_water=0, fallback=True, background=False)
+
+    numbers = pool.get_many(NUM_SONGS, 5)
+    pool.get_many(NUM_SONGS, 5)
+
+    assert len(numbers) == 5
+    assert all(1 <= number <= NUM_SONGS for number in numbers)
+    # random.org is not asked again for every draw while it is down
+    assert session_get.call_count == 1
+    assert pool.stats()['fallbacks'] == 10
+
+def test_random_pool_no_fallback(mocker):
+    """Test that the provider error is raised when fallback is off."""
+    mocker.patch(SESSION_GET, side_effect=requests.exceptions.Timeout)
+    pool = RandomPool(capacity=10, low_water=0, fallback=False, background=False)
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        pool.get_many(NUM_SONGS, 1)
 
-    with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_SONGS)
\ No newline at end of file
+def test_invalid_low_water():
+    """Test error when the low-water mark is above capacity."""
+    with pytest.raises(ValueError, match="Invalid low-water mark: 11"):
+        RandomPool(lambda num: [], capacity=10, low_water=11)
@@ -1,9 +1,13 @@
 from contextlib import contextmanager
+import os
 import re
 import sqlite3
 
 import pytest
 
+from music_collection.utils import random_utils, sql_utils
+
+from music_collection.models import song_model
 from music_collection.models.song_model import (
     Song,
     create_song,
@@ -12,7 +16,10 @@ from music_collection.models.song_model import (
     get_song_by_compound_key,
     get_all_songs,
     get_random_song,
-    update_play_count
+    get_random_songs,
+    get_top_songs,
+    update_play_count,
+    update_play_counts
 )
 
 ######################################################
@@ -45,6 +52,31 @@ def mock_cursor(mocker):
 
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
+@pytest.fixture
+def song_db(tmp_path, monkeypatch):
+    """Provides the path of a fresh song catalog database that the song model uses."""
+    db_path = str(tmp_path / "song_catalog.db")
+    conn = sqlite3.connect(db_path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")) as f:
+        conn.executescript(f.read())
+    conn.close()
+    monkeypatch.setattr(sql_utils, "DB_PATH", db_path)
+    return db_path
+
+@pytest.fixture
+def random_pool():
+    """Provides the random number pool behind the song model, backed by the local CSPRNG."""
+    song_model.invalidate_catalog_bounds()
+    pool = random_utils.RandomPool(provider=lambda num: [random_utils.secrets.randbelow(10**9) for _ in range(num)])
+    random_utils.set_random_pool(pool)
+    yield pool
+    random_utils.set_random_pool(None)
+    song_model.invalidate_catalog_bounds()
+
+def set_time(mocker, timestamp):
+    """Makes the song model see timestamp as the current time."""
+    mocker.patch.object(song_model.time, "time", return_value=timestamp)
+
 ######################################################
 #
 #    Add and delete
@@ -312,57 +344,98 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
-def test_get_random_song(mock_cursor, mocker):
+def test_get_random_song(song_db, random_pool):
     """Test retrieving a random song from the catalog."""
+    for i in range(1, 4):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+    random_pool.provider = lambda num: [1] * num  # Guesses ID 2
 
-    # Simulate that there are multiple songs in the database
-    mock_cursor.fetchall.return_value = [
-        (1, "Artist A", "Song A", 2020, "Rock", 210, 10),
-        (2, "Artist B", "Song B", 2021, "Pop", 180, 20),
-        (3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
-    ]
-
-    # Mock random number generation to return the 2nd song
-    mock_random = mocker.patch("music_collection.models.song_model.get_random", return_value=2)
-
-    # Call the get_random_song method
     result = get_random_song()
 
-    # Expected result based on the mock random number and fetchall return value
-    expected_result = Song(2, "Artist B", "Song B", 2021, "Pop", 180)
+    assert result == Song(2, "Artist 2", "Song 2", 2020, "Pop", 100)
 
-    # Ensure the result matches the expected output
-    assert result == expected_result, f"Expected {expected_result}, got {result}"
-
-    # Ensure that the random number was called with the correct number of songs
-    mock_random.assert_called_once_with(3)
-
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
-
-def test_get_random_song_empty_catalog(mock_cursor, mocker):
+def test_get_random_song_empty_catalog(song_db, random_pool):
     """Test retrieving a random song when the catalog is empty."""
-
-    # Simulate that the catalog is empty
-    mock_cursor.fetchall.return_value = []
-
-    # Expect a ValueError to be raised when calling get_random_song with an empty catalog
     with pytest.raises(ValueError, match="The song catalog is empty"):
         get_random_song()
 
-    # Ensure that the random number was not called since there are no songs
-    mocker.patch("music_collection.models.song_model.get_random").assert_not_called()
+def test_get_random_song_reads_one_query(mock_cursor, random_pool, mocker):
+    """Test that a random pick looks up its guessed IDs in one query, without reading the catalog."""
+    mocker.patch("music_collection.models.song_model._catalog_bounds", (3, 3))
+    mocker.patch("music_collection.models.song_model._catalog_bounds_at", float("inf"))
+    random_pool.provider = lambda num: list(range(num))
+    mock_cursor.fetchall.return_value = [(2, "Artist B", "Song B", 2021, "Pop", 180)]
 
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    result = get_random_song()
 
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert result == Song(2, "Artist B", "Song B", 2021, "Pop", 180)
+    mock_cursor.execute.assert_called_once()
+    assert "WHERE id IN (?, ?, ?) AND deleted = FALSE" in normalize_whitespace(mock_cursor.execute.call_args[0][0])
+
+def test_get_random_songs_distinct(song_db, random_pool):
+    """Test that several random songs are distinct and skip deleted songs."""
+    for i in range(1, 21):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+    for song_id in range(1, 21, 2):
+        delete_song(song_id)
+
+    songs = get_random_songs(10)
+
+    assert sorted(song.id for song in songs) == list(range(2, 21, 2))
+
+def test_get_random_songs_sparse_catalog(song_db, random_pool, mocker):
+    """Test that a catalog of mostly deleted songs falls back to seeking from random IDs."""
+    mocker.patch("music_collection.models.song_model.RANDOM_SONG_MAX_GUESSES", 4)
+    for i in range(1, 11):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+    for song_id in range(1, 10):
+        if song_id not in (3, 7):
+            delete_song(song_id)
+
+    assert sorted(song.id for song in get_random_songs(3)) == [3, 7, 10]
+
+def test_get_random_songs_seek_next_live(song_db, random_pool, mocker):
+    """Test that the fallback seek takes the first live song at or after the random ID."""
+    mocker.patch("music_collection.models.song_model.RANDOM_SONG_MAX_GUESSES", 1)
+    for i in range(1, 11):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+    for song_id in (1, 2, 4, 5, 6, 8, 9, 10):
+        delete_song(song_id)
+    random_pool.provider = lambda num: [1, 3] * num  # Seeks from IDs 2 and 4
+
+    assert sorted(song.id for song in get_random_songs(2)) == [3, 7]
+
+def test_get_random_songs_seek_uses_index(song_db):
+    """Test that the fallback seek is served from the partial index rather than a scan."""
+    conn = sqlite3.connect(song_db)
+    plan = conn.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT MIN(id) FROM songs WHERE deleted = FALSE AND id >= 5
+    """).fetchall()
+    conn.close()
+    details = " ".join(row[-1] for row in plan)
+    assert "SEARCH" in details
+    assert "SCAN" not in details
+
+def test_get_random_songs_after_other_worker_deletes(song_db, random_pool):
+    """Test that a stale live count from before another worker's deletes is corrected."""
+    for i in range(1, 4):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+    get_random_songs(1)
+
+    conn = sqlite3.connect(song_db)
+    conn.execute("UPDATE songs SET deleted = TRUE WHERE id IN (1, 2)")
+    conn.commit()
+    conn.close()
+
+    assert [song.id for song in get_random_songs(1)] == [3]
+    with pytest.raises(ValueError, match="Cannot pick 2 distinct songs from a catalog of 1 songs"):
+        get_random_songs(2)
+
+def test_get_random_songs_invalid_count():
+    """Test error when asking for no random songs."""
+    with pytest.raises(ValueError, match="Invalid count: 0"):
+        get_random_songs(0)
 
 def test_update_play_count(mock_cursor):
     """Test updating the play count of a song."""
@@ -405,3 +478,159 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+def test_update_play_counts(mock_cursor, mocker):
+    """Test updating the play counts of several songs in one batch."""
+    mock_cursor.fetchall.return_value = [(1, False), (2, False)]
+
+    update_play_counts([1, 2, 1])
+
+    # One query checks every song, deduplicated
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == "SELECT id, deleted FROM songs WHERE id IN (?, ?)"
+    assert mock_cursor.execute.call_args[0][1] == [1, 2]
+
+    # One executemany increments every play count, once per listing
+    assert mock_cursor.executemany.call_args_list[0] == mocker.call(
+        "UPDATE songs SET play_count = play_count + 1 WHERE id = ?", [(1,), (2,), (1,)])
+
+def test_update_play_counts_deleted_song(mock_cursor):
+    """Test that a deleted song fails the whole batch."""
+    mock_cursor.fetchall.return_value = [(1, False), (2, True)]
+
+    with pytest.raises(ValueError, match="Song with ID 2 has been deleted"):
+        update_play_counts([1, 2])
+
+    mock_cursor.executemany.assert_not_called()
+
+def test_update_play_counts_missing_song(mock_cursor):
+    """Test that the error names the first song that cannot be played."""
+    mock_cursor.fetchall.return_value = [(1, False), (3, True)]
+
+    with pytest.raises(ValueError, match="Song with ID 2 not found"):
+        update_play_counts([1, 2, 3])
+
+    mock_cursor.executemany.assert_not_called()
+
+def test_update_play_counts_many_songs(mock_cursor, mocker):
+    """Test that large batches are checked in several IN queries."""
+    mocker.patch("music_collection.models.song_model.PLAY_COUNT_BATCH_SIZE", 2)
+    mock_cursor.fetchall.side_effect = [[(1, False), (2, False)], [(3, False)]]
+
+    update_play_counts([1, 2, 3])
+
+    assert mock_cursor.execute.call_count == 2
+    assert len(mock_cursor.executemany.call_args_list[0][0][1]) == 3
+
+
+######################################################
+#
+#    Play charts
+#
+######################################################
+
+# Monday 2024-01-01 12:30 UTC
+NOON = 1704112200
+
+def test_plays_recorded_with_rollups(song_db, mocker):
+    """Test that every play is logged and added to its hourly and daily rollups."""
+    set_time(mocker, NOON)
+    create_song("Artist 1", "Song 1", 2020, "Pop", 100)
+    create_song("Artist 2", "Song 2", 2020, "Pop", 100)
+
+    update_play_count(1)
+    update_play_counts([1, 2, 1])
+
+    conn = sqlite3.connect(song_db)
+    assert conn.execute("SELECT song_id, played_at FROM plays ORDER BY id").fetchall() == [
+        (1, NOON), (1, NOON), (2, NOON), (1, NOON)]
+    assert conn.execute("SELECT * FROM song_plays_hourly ORDER BY song_id").fetchall() == [
+        (NOON - 1800, 1, 3), (NOON - 1800, 2, 1)]
+    assert conn.execute("SELECT * FROM song_plays_daily ORDER BY song_id").fetchall() == [
+        (NOON - 45000, 1, 3), (NOON - 45000, 2, 1)]
+    conn.close()
+
+def test_failed_play_not_recorded(song_db, mocker):
+    """Test that a batch with a deleted song records no plays."""
+    create_song("Artist 1", "Song 1", 2020, "Pop", 100)
+    create_song("Artist 2", "Song 2", 2020, "Pop", 100)
+    delete_song(2)
+
+    with pytest.raises(ValueError, match="Song with ID 2 has been deleted"):
+        update_play_counts([1, 2])
+
+    conn = sqlite3.connect(song_db)
+    assert conn.execute("SELECT COUNT(*) FROM plays").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM song_plays_hourly").fetchone()[0] == 0
+    conn.close()
+
+def test_get_top_songs_by_window(song_db, mocker):
+    """Test that each window counts only the plays in it."""
+    for i in range(1, 4):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+
+    set_time(mocker, NOON - 3 * 86400)  # Three days ago
+    update_play_counts([3, 3, 3, 3, 3])
+    set_time(mocker, NOON - 3 * 3600)  # Three hours ago
+    update_play_counts([2, 2, 2])
+    set_time(mocker, NOON - 8 * 86400)  # Outside every window
+    update_play_counts([1] * 10)
+    set_time(mocker, NOON)
+    update_play_counts([1, 2])
+
+    assert [(song["id"], song["plays"]) for song in get_top_songs('1h')] == [(1, 1), (2, 1)]
+    assert [(song["id"], song["plays"]) for song in get_top_songs('24h')] == [(2, 4), (1, 1)]
+    assert [(song["id"], song["plays"]) for song in get_top_songs('7d')] == [(3, 5), (2, 4), (1, 1)]
+    assert [song["id"] for song in get_top_songs('7d', limit=1)] == [3]
+
+def test_get_top_songs_trailing_edges(song_db, mocker):
+    """Test that windows trail the current time, starting on the hour the window length ago falls in."""
+    for i in range(1, 4):
+        create_song(f"Artist {i}", f"Song {i}", 2020, "Pop", 100)
+
+    set_time(mocker, NOON - 7 * 86400 - 2400)  # Before the hour the 7d window starts in
+    update_play_counts([1])
+    set_time(mocker, NOON - 7 * 86400 - 600)  # In that hour, just before the exact 7 days
+    update_play_counts([2])
+    set_time(mocker, NOON - 7 * 86400 + 7200)  # Inside the window, in its first whole hour
+    update_play_counts([3])
+    set_time(mocker, NOON - 7800)  # 130 minutes ago, two hours back
+    update_play_counts([1])
+    set_time(mocker, NOON - 3000)  # 50 minutes ago, in the previous hour
+    update_play_counts([2, 3])
+    set_time(mocker, NOON)
+
+    assert [(song["id"], song["plays"]) for song in get_top_songs('1h')] == [(2, 1), (3, 1)]
+    assert [(song["id"], song["plays"]) for song in get_top_songs('24h')] == [(1, 1), (2, 1), (3, 1)]
+    assert [(song["id"], song["plays"]) for song in get_top_songs('7d')] == [(2, 2), (3, 2), (1, 1)]
+
+def test_get_top_songs_reads_only_rollups(song_db, mocker):
+    """Test that charts are served from the rollups without reading the raw play events."""
+    set_time(mocker, NOON)
+    create_song("Artist 1", "Song 1", 2020, "Pop", 100)
+    update_play_counts([1, 1])
+
+    conn = sqlite3.connect(song_db)
+    conn.execute("DROP TABLE plays")
+    conn.close()
+
+    for window in ('1h', '24h', '7d'):
+        assert [(song["id"], song["plays"]) for song in get_top_songs(window)] == [(1, 2)]
+
+def test_get_top_songs_skips_deleted(song_db, mocker):
+    """Test that deleted songs are left out of the charts."""
+    create_song("Artist 1", "Song 1", 2020, "Pop", 100)
+    create_song("Artist 2", "Song 2", 2020, "Pop", 100)
+    update_play_counts([1, 2, 2])
+    delete_song(2)
+
+    assert [song["id"] for song in get_top_songs('1h')] == [1]
+
+def test_get_top_songs_invalid_window():
+    """Test error when asking for an unknown chart window."""
+    with pytest.raises(ValueError, match="Invalid chart window: 2d"):
+        get_top_songs('2d')
+
+def test_get_top_songs_invalid_limit():
+    """Test error when asking for an empty chart."""
+    with pytest.raises(ValueError, match="Invalid chart limit: 0"):
+        get_top_songs('24h', limit=0)